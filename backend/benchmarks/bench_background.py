@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Background generation: per-row draw.line loop + full-frame alpha_composite
+(the old placeholder renderer) versus the NumPy background engine.
+
+Usage: python benchmarks/bench_background.py [--repeat 20]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from services.background_engine import linear_gradient, radial_gradient, blend_panel, to_image
+from services.imagen_service import DEFAULT_PALETTE
+
+SIZES = [(400, 600), (800, 1200), (1600, 2400)]
+MULTI_STOP = ((0.0, (147, 51, 234)), (0.5, (236, 72, 153)), (1.0, (64, 224, 208)))
+
+
+def panel_box(width, height):
+    panel_width, panel_height = width * 3 // 4, height // 3
+    return (width - panel_width) // 2, (height - panel_height) // 2, panel_width, panel_height
+
+
+def legacy_background(width, height):
+    image = Image.new('RGB', (width, height), color='white')
+    draw = ImageDraw.Draw(image)
+    for y in range(height):
+        r = int(147 + (64 - 147) * y / height)
+        g = int(51 + (224 - 51) * y / height)
+        b = int(234 + (208 - 234) * y / height)
+        draw.line([(0, y), (width, y)], fill=(r, g, b))
+
+    x, y, panel_width, panel_height = panel_box(width, height)
+    overlay = Image.new('RGBA', (width, height), (255, 255, 255, 0))
+    # PIL rectangles include their far edge: the panel is (panel_width + 1) x (panel_height + 1)
+    ImageDraw.Draw(overlay).rectangle(
+        [x, y, x + panel_width, y + panel_height], fill=(255, 255, 255, 180)
+    )
+    return Image.alpha_composite(image.convert('RGBA'), overlay).convert('RGB')
+
+
+def numpy_background(width, height, stops=DEFAULT_PALETTE, radial=False):
+    if radial:
+        pixels = radial_gradient(width, height, stops)
+    else:
+        pixels = linear_gradient(width, height, stops)
+    x, y, panel_width, panel_height = panel_box(width, height)
+    blend_panel(pixels, (x, y, panel_width + 1, panel_height + 1), (255, 255, 255), 180)
+    return to_image(pixels)
+
+
+def best_ms(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'size':<10} {'legacy ms':>10} {'linear ms':>10} {'3-stop ms':>10} {'radial ms':>10} {'speedup':>8} {'max diff':>9}")
+    for width, height in SIZES:
+        legacy = best_ms(lambda: legacy_background(width, height), args.repeat)
+        linear = best_ms(lambda: numpy_background(width, height), args.repeat)
+        multi = best_ms(lambda: numpy_background(width, height, MULTI_STOP), args.repeat)
+        radial = best_ms(lambda: numpy_background(width, height, radial=True), args.repeat)
+
+        diff = np.abs(
+            np.asarray(legacy_background(width, height), dtype=np.int16)
+            - np.asarray(numpy_background(width, height), dtype=np.int16)
+        ).max()
+
+        print(
+            f"{width}x{height:<5} {legacy:>10.2f} {linear:>10.2f} {multi:>10.2f} {radial:>10.2f} "
+            f"{legacy / linear:>7.1f}x {diff:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Encode time and size of the 800x1200 placeholder poster for each output
+format and setting: PNG compress levels, lossy WebP qualities, lossless WebP
+and JPEG qualities. Use it to pick POSTER_FORMAT, PNG_COMPRESS_LEVEL,
+WEBP_QUALITY and JPEG_QUALITY for a deployment.
+
+Usage: python benchmarks/bench_encoding.py [--repeat 10] [--output encoding.json]
+"""
+
+import argparse
+import io
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image
+
+from services.image_codec import ImageEncoding, encode_image
+from services.imagen_service import ImagenService
+
+PROMPT = (
+    "A vintage-inspired jazz concert poster featuring bold Art Deco typography with gold and "
+    "deep blue color scheme, with musical notes flowing dynamically across the composition."
+)
+
+ENCODINGS = [
+    ImageEncoding("png", compress_level=0),
+    ImageEncoding("png", compress_level=1),
+    ImageEncoding("png", compress_level=6),
+    ImageEncoding("png", compress_level=9),
+    ImageEncoding("webp", quality=60),
+    ImageEncoding("webp", quality=75),
+    ImageEncoding("webp", quality=85),
+    ImageEncoding("webp", quality=95),
+    ImageEncoding("webp", lossless=True),
+    ImageEncoding("jpeg", quality=60),
+    ImageEncoding("jpeg", quality=75),
+    ImageEncoding("jpeg", quality=85),
+    ImageEncoding("jpeg", quality=95),
+]
+
+
+def poster_image() -> Image.Image:
+    """The rendered poster, decoded from its (lossless) PNG"""
+    result = ImagenService()._render_placeholder_poster(PROMPT)
+    image = Image.open(io.BytesIO(result["image_bytes"]))
+    image.load()
+    return image
+
+
+def describe(encoding: ImageEncoding) -> str:
+    if encoding.format == "png":
+        return f"png level {encoding.compress_level}"
+    if encoding.lossless:
+        return "webp lossless"
+    return f"{encoding.format} q{encoding.quality}"
+
+
+def best_ms(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', type=Path, default=None, help="write the results as JSON here")
+    args = parser.parse_args()
+
+    image = poster_image()
+    baseline = len(encode_image(image, ImageEncoding("png", compress_level=6)))
+
+    results = []
+    print(f"{'encoding':<16} {'ms':>8} {'bytes':>9} {'vs png 6':>9}")
+    for encoding in ENCODINGS:
+        size = len(encode_image(image, encoding))
+        ms = best_ms(lambda: encode_image(image, encoding), args.repeat)
+        results.append({**encoding._asdict(), "ms": round(ms, 3), "bytes": size})
+        print(f"{describe(encoding):<16} {ms:>8.2f} {size:>9} {size / baseline:>8.2f}x")
+
+    if args.output is not None:
+        report = {"dimensions": f"{image.width}x{image.height}", "repeat": args.repeat, "results": results}
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Event-loop responsiveness while posters are rendering.
+
+Fires a steady stream of light requests (the cost of GET /api/poster/{poster_id}
+minus Mongo) while several renders run concurrently, and reports the latency
+percentiles of the light requests for each render mode:
+
+  inline  - Pillow work on the event loop (the old behaviour)
+  thread  - RenderExecutor backed by a thread pool
+  process - RenderExecutor backed by a process pool
+
+Usage: python benchmarks/bench_event_loop.py [--renders 8] [--interval-ms 5]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.imagen_service import ImagenService
+from services.render_executor import RenderExecutor
+import services.imagen_service as imagen_module
+
+PROMPT = (
+    "A vintage-inspired jazz concert poster featuring bold Art Deco typography "
+    "with gold and deep blue color scheme and musicians silhouettes."
+)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def light_request():
+    """Roughly what a cheap JSON endpoint costs once the DB has answered"""
+    await asyncio.sleep(0)
+    return {"id": "poster", "style": "Modern"}
+
+
+async def run_mode(mode: str, renders: int, interval: float) -> dict:
+    service = ImagenService()
+
+    if mode == 'inline':
+        async def render():
+            return service._render_placeholder_poster(PROMPT)
+        executor = None
+    else:
+        executor = RenderExecutor(kind=mode, max_pending=renders * 2)
+        imagen_module.render_executor = executor
+        # Warm the pool so worker start-up is not counted against the loop
+        await executor.run(service._render_placeholder_poster, PROMPT)
+
+        async def render():
+            return await service._generate_placeholder_poster(PROMPT)
+
+    latencies = []
+    done = asyncio.Event()
+
+    async def probe():
+        # Requests arrive on a fixed schedule; latency is measured from the
+        # arrival time, so time spent waiting for a blocked loop is counted.
+        arrival = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            await light_request()
+            finished = time.perf_counter()
+            latencies.append((finished - arrival) * 1000)
+            arrival += interval
+
+    probe_task = asyncio.create_task(probe())
+    # Let the probe establish a baseline before the renders start
+    await asyncio.sleep(interval * 4)
+
+    started = time.perf_counter()
+    render_tasks = []
+    for _ in range(renders):
+        render_tasks.append(asyncio.create_task(render()))
+        await asyncio.sleep(0)
+    await asyncio.gather(*render_tasks)
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    await probe_task
+
+    if executor is not None:
+        executor.shutdown()
+
+    return {
+        "mode": mode,
+        "renders": renders,
+        "render_wall_s": round(elapsed, 3),
+        "light_requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(max(latencies), 3) if latencies else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--renders', type=int, default=8, help='concurrent renders per mode')
+    parser.add_argument('--interval-ms', type=float, default=5.0, help='gap between light requests')
+    parser.add_argument('--modes', default='inline,thread,process')
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'renders':>7} {'wall s':>8} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for mode in args.modes.split(','):
+        result = await run_mode(mode.strip(), args.renders, args.interval_ms / 1000)
+        print(
+            f"{result['mode']:<8} {result['renders']:>7} {result['render_wall_s']:>8} "
+            f"{result['light_requests']:>7} {result['p50_ms']:>9} {result['p99_ms']:>9} {result['max_ms']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the render and prompt parsing hot paths:
+
+  ImagenService._generate_placeholder_poster (on a thread render executor)
+  ImagenService._add_logo_to_image, _wrap_text, _determine_style
+  GeminiService._parse_response, _extract_keywords_from_text
+
+Fixtures are built in memory: short, typical and long prompts, structured and
+free-form LLM replies, and logos from a small PNG up to a 12 MP JPEG. Cases
+that go through a cache run both warm and cold (cache cleared before each
+sample).
+
+Each case is timed `repeat` times; a sample is `number` back-to-back calls
+and is reported per call. Results are written as JSON. --compare runs the
+suite again and fails (exit status 1) if a case's median got slower than the
+baseline by more than --threshold percent. Compare baselines from the same
+machine only.
+
+Usage:
+  python benchmarks/bench_hot_paths.py --output benchmarks/results/hot_paths.json
+  python benchmarks/bench_hot_paths.py --compare benchmarks/results/hot_paths.json [--threshold 10]
+  python benchmarks/bench_hot_paths.py --filter logo --repeat 50
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Renders go through a thread pool so the benchmark measures the renderer, not process start-up
+os.environ.setdefault('RENDER_EXECUTOR', 'thread')
+
+import numpy as np
+import PIL
+from PIL import Image
+
+from services.imagen_service import ImagenService
+from services.gemini_service import GeminiService
+from services.layer_cache import layer_cache, logo_cache
+from services.logo_store import LogoImage
+from services.blob_store import content_hash
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "hot_paths.json"
+
+SHORT_PROMPT = "Jazz night poster"
+TYPICAL_PROMPT = (
+    "A vintage-inspired jazz concert poster featuring bold Art Deco typography with gold and "
+    "deep blue color scheme. Include silhouettes of jazz musicians playing saxophone and trumpet, "
+    "with musical notes flowing dynamically across the composition."
+)
+# Users paste whole event briefs; around 2,000 characters with no style words until the end
+LONG_PROMPT = " ".join(
+    f"Section {i}: the festival runs over three days with food stalls, workshops, a kids area, "
+    f"late night sets on the main stage and a market for local makers along the river."
+    for i in range(12)
+) + " Make it elegant."
+
+STRUCTURED_REPLY = (
+    TYPICAL_PROMPT + " The background should have a subtle textured pattern reminiscent of the "
+    "1920s, with elegant borders and a sophisticated layout.\n\n"
+    "Keywords: vintage, jazz, art deco, gold, deep blue, saxophone, trumpet, musicians, elegant, 1920s"
+)
+# No keywords line, so parsing falls back to keyword extraction over the whole text
+FREEFORM_REPLY = "\n".join(
+    f"Paragraph {i}. A vibrant and dynamic composition with sophisticated typography and a subtle "
+    f"geometric texture, balancing bold color against clean negative space."
+    for i in range(15)
+)
+
+
+def make_logo(width, height, image_format, mode="RGBA"):
+    """A noisy logo so encoders and decoders do realistic work"""
+    rng = np.random.default_rng(width * height)
+    pixels = rng.integers(0, 256, size=(height, width, len(mode)), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, mode).save(buffer, format=image_format)
+    data = buffer.getvalue()
+    return LogoImage(content_hash(data), data)
+
+
+def build_fixtures():
+    return {
+        "logo_small": make_logo(256, 256, "PNG"),
+        "logo_large_png": make_logo(2048, 2048, "PNG"),
+        "logo_large_jpeg": make_logo(4000, 3000, "JPEG", mode="RGB"),
+        "canvas": Image.new("RGB", (800, 1200), (147, 51, 234)),
+    }
+
+
+def build_cases(imagen, gemini, fixtures, loop):
+    """(name, fn, setup, number) for every case; setup runs before each sample, untimed"""
+    def render(prompt, logo=None, position=None):
+        return lambda: loop.run_until_complete(imagen._generate_placeholder_poster(prompt, logo, position))
+
+    def add_logo(logo):
+        return lambda: imagen._add_logo_to_image(fixtures["canvas"], logo, "bottom-right")
+
+    cases = [
+        ("generate_placeholder_poster[warm]", render(TYPICAL_PROMPT), None, 1),
+        ("generate_placeholder_poster[cold_layers]", render(TYPICAL_PROMPT), layer_cache.clear, 1),
+        ("generate_placeholder_poster[long_prompt]", render(LONG_PROMPT), None, 1),
+        ("generate_placeholder_poster[large_logo_warm]",
+         render(TYPICAL_PROMPT, fixtures["logo_large_png"], "top-right"), None, 1),
+        ("generate_placeholder_poster[large_logo_cold]",
+         render(TYPICAL_PROMPT, fixtures["logo_large_png"], "top-right"), logo_cache.clear, 1),
+    ]
+    for name in ("logo_small", "logo_large_png", "logo_large_jpeg"):
+        cases.append((f"add_logo_to_image[{name}_warm]", add_logo(fixtures[name]), None, 50))
+        cases.append((f"add_logo_to_image[{name}_cold]", add_logo(fixtures[name]), logo_cache.clear, 1))
+
+    for label, prompt in (("short", SHORT_PROMPT), ("typical", TYPICAL_PROMPT), ("long", LONG_PROMPT)):
+        cases.append((f"wrap_text[{label}]", lambda prompt=prompt: imagen._wrap_text(prompt, 50), None, 1000))
+        cases.append((f"determine_style[{label}]", lambda prompt=prompt: imagen._determine_style(prompt), None, 1000))
+
+    cases += [
+        ("parse_response[structured]", lambda: gemini._parse_response(STRUCTURED_REPLY), None, 1000),
+        ("parse_response[freeform]", lambda: gemini._parse_response(FREEFORM_REPLY), None, 1000),
+        ("extract_keywords_from_text[typical]", lambda: gemini._extract_keywords_from_text(TYPICAL_PROMPT), None, 1000),
+        ("extract_keywords_from_text[long]", lambda: gemini._extract_keywords_from_text(FREEFORM_REPLY), None, 1000),
+    ]
+    return cases
+
+
+def run_case(fn, setup, number, repeat, warmup):
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1_000_000)
+
+    ordered = sorted(samples)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_us": round(ordered[0], 3),
+        "median_us": round(statistics.median(ordered), 3),
+        "p95_us": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+        "stdev_us": round(statistics.stdev(ordered), 3) if len(ordered) > 1 else 0.0,
+    }
+
+
+def environment(imagen):
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "pillow": PIL.__version__,
+        "numpy": np.__version__,
+        "renderer_version": imagen.renderer_version,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table and return the names of regressed cases"""
+    regressions = []
+    print(f"\n{'case':<52} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<52} {'-':>12} {current['median_us']:>12.1f} {'new':>8}")
+            continue
+        change = (current["median_us"] - previous["median_us"]) / previous["median_us"] * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<52} {previous['median_us']:>12.1f} {current['median_us']:>12.1f} {change:>+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--filter', default="", help="only run cases whose name contains this")
+    parser.add_argument('--output', type=Path, default=None, help=f"write results here (default {DEFAULT_OUTPUT} unless comparing)")
+    parser.add_argument('--compare', type=Path, default=None, help="baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=10.0, help="regression threshold in percent of the median")
+    args = parser.parse_args()
+
+    imagen = ImagenService()
+    gemini = GeminiService()
+    fixtures = build_fixtures()
+    loop = asyncio.new_event_loop()
+
+    results = {}
+    print(f"{'case':<52} {'median us':>12} {'min us':>12} {'p95 us':>12}")
+    for name, fn, setup, number in build_cases(imagen, gemini, fixtures, loop):
+        if args.filter not in name:
+            continue
+        results[name] = run_case(fn, setup, number, args.repeat, args.warmup)
+        stats = results[name]
+        print(f"{name:<52} {stats['median_us']:>12.1f} {stats['min_us']:>12.1f} {stats['p95_us']:>12.1f}")
+    loop.close()
+
+    report = {"environment": environment(imagen), "threshold_percent": args.threshold, "results": results}
+
+    output = args.output or (None if args.compare else DEFAULT_OUTPUT)
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nWrote {output}")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions above {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
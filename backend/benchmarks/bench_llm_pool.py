@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Connection reuse of the pooled LLM client against the fake LLM server.
+
+  fresh  - a new HTTP client per request (what building a new LlmChat per
+           call amounts to at the connection level)
+  pooled - LlmClientPool with the http transport and keep-alive
+
+Plain HTTP on localhost hides TLS handshakes, so real-world savings are
+larger than the numbers reported here.
+
+Usage: python benchmarks/bench_llm_pool.py [--requests 200] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+from benchmarks.fake_llm_server import FakeLlmServer
+from services.llm_client import LlmClientPool
+from services.gemini_service import SYSTEM_MESSAGE
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def make_pool(base_url: str, concurrency: int) -> LlmClientPool:
+    return LlmClientPool(
+        api_key="bench", provider="gemini", model="gemini-2.0-flash",
+        system_message=SYSTEM_MESSAGE, max_tokens=300,
+        transport="http", max_concurrency=concurrency, base_url=base_url
+    )
+
+
+async def run_mode(mode: str, base_url: str, requests: int, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url) as control:
+        await control.post("/stats/reset")
+
+    pooled = make_pool(base_url, concurrency)
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with gate:
+            started = time.perf_counter()
+            if mode == "fresh":
+                pool = make_pool(base_url, 1)
+                await pool.complete(f"Enhance this poster concept: poster {i}", "bench")
+                await pool.aclose()
+            else:
+                await pooled.complete(f"Enhance this poster concept: poster {i}", "bench")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    await pooled.aclose()
+
+    async with httpx.AsyncClient(base_url=base_url) as control:
+        server_stats = (await control.get("/stats")).json()
+
+    return {
+        "mode": mode,
+        "requests": requests,
+        "wall_s": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "connections": server_stats["connections"],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='simulated model latency')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    with FakeLlmServer(args.port, args.latency_ms) as server:
+        print(f"{'mode':<7} {'requests':>8} {'wall s':>7} {'rps':>7} {'p50 ms':>8} {'p99 ms':>8} {'conns':>6}")
+        for mode in ("fresh", "pooled"):
+            result = await run_mode(mode, server.base_url, args.requests, args.concurrency)
+            print(
+                f"{result['mode']:<7} {result['requests']:>8} {result['wall_s']:>7} {result['rps']:>7} "
+                f"{result['p50_ms']:>8} {result['p99_ms']:>8} {result['connections']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
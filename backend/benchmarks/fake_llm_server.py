@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini REST API, for benchmarks and load tests.
+
+Serves POST /v1beta/models/{model}:generateContent with a poster
+enhancement that names the user's prompt, after a configurable delay (:streamGenerateContent?alt=sse sends
+it word by word, spreading the delay over the chunks), and GET /stats with
+the number of requests and distinct client connections it has seen (which
+shows whether clients reuse keep-alive connections).
+
+Replies differ per prompt, like a real model's, so distinct prompts render
+distinct posters instead of all hitting one render cache entry.
+
+Usage: python benchmarks/fake_llm_server.py [--port 8765] [--latency-ms 50]
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+REPLY_TEMPLATE = (
+    "A vintage-inspired poster for {prompt} featuring bold Art Deco typography with a gold and deep blue color scheme. "
+    "Silhouettes of musicians and flowing musical notes sweep across the composition, framed by elegant "
+    "borders on a subtly textured 1920s background.\n"
+    "Keywords: vintage, art deco, bold typography, gold, deep blue, musicians, elegant borders, textured"
+)
+
+
+def reply_for(body: dict) -> str:
+    """The enhancement for the last user message of a generateContent request"""
+    text = ""
+    for content in body.get("contents", []):
+        if content.get("role", "user") == "user":
+            text = "".join(part.get("text", "") for part in content.get("parts", []))
+    # One line, and never a "Keywords:" line of its own
+    prompt = " ".join(text.split())[:200] or "an untitled event"
+    return REPLY_TEMPLATE.format(prompt=prompt)
+
+
+def create_app(latency_ms: float = 50.0, reply: str = None) -> FastAPI:
+    """The fake API; a fixed reply answers every prompt the same (every render after the first is then cached)"""
+    app = FastAPI(title="Fake LLM")
+    stats = {"requests": 0, "connections": set()}
+
+    async def stream_reply(reply: str):
+        chunks = re.findall(r"\S+\s*", reply)
+        for chunk in chunks:
+            await asyncio.sleep(latency_ms / 1000 / len(chunks))
+            payload = {"candidates": [{"content": {"role": "model", "parts": [{"text": chunk}]}}]}
+            yield f"data: {json.dumps(payload)}\r\n\r\n"
+
+    @app.post("/v1beta/models/{model_action}")
+    async def generate_content(model_action: str, request: Request):
+        stats["requests"] += 1
+        stats["connections"].add((request.client.host, request.client.port))
+        body = await request.json()
+        text = reply if reply is not None else reply_for(body)
+        if model_action.endswith(":streamGenerateContent"):
+            return StreamingResponse(stream_reply(text), media_type="text/event-stream")
+        await asyncio.sleep(latency_ms / 1000)
+        return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return {"requests": stats["requests"], "connections": len(stats["connections"])}
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats["requests"] = 0
+        stats["connections"] = set()
+        return {"reset": True}
+
+    return app
+
+
+class FakeLlmServer:
+    """Runs the fake LLM app with uvicorn on a background thread"""
+
+    def __init__(self, port: int = 8765, latency_ms: float = 50.0):
+        self.port = port
+        self.base_url = f"http://127.0.0.1:{port}"
+        config = uvicorn.Config(create_app(latency_ms), host="127.0.0.1", port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
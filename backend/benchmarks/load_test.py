@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test of the poster flow scripted by backend_test.py and
+debug_flow.py: enhance -> generate -> fetch poster -> fetch image ->
+history -> delete.
+
+N virtual users each run the flow in a loop under their own session for
+--duration seconds. --rate caps the total request rate across all users
+(requests are spaced evenly); without it every user goes as fast as the
+backend answers. An iteration stops at its first failed step.
+
+By default the backend is started locally in a child process:
+  - the LLM is the fake Gemini server (benchmarks/fake_llm_server.py) over
+    the http transport, with --llm-latency-ms per call
+  - MongoDB is MONGO_URL if set, otherwise an in-memory mongomock-motor
+    database (pip install mongomock-motor)
+  - blobs go to a temporary directory
+  - renders use the default process pool (RENDER_EXECUTOR=thread to compare)
+Pass --url to load an already running backend instead (set ADMIN_TOKEN to
+include its cache counters in the report).
+
+The report (stdout summary, JSON with --output) has throughput and
+p50/p95/p99 latency per endpoint, status code counts, and the backend's
+cache and admission counters at the end of the run.
+
+Usage:
+  python benchmarks/load_test.py --users 16 --duration 30 --output load.json
+  python benchmarks/load_test.py --users 32 --rate 100 --bypass-cache
+  python benchmarks/load_test.py --url http://localhost:8001 --users 8
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx
+
+USER_PROMPTS = [
+    "jazz night at the riverside club",
+    "charity 5k run for the children's hospital",
+    "tech conference on applied machine learning",
+    "farmers market every saturday morning",
+    "minimalist gallery opening for a photography exhibition",
+    "retro arcade tournament with prizes",
+]
+
+# Steps of one iteration, in order; the report keys endpoints by these names
+STEPS = ("enhance_prompt", "generate", "get_poster", "get_image", "history", "delete_poster")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Pacer:
+    """Spaces requests evenly to reach a total rate; rate 0 means unpaced"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.perf_counter()
+        slot = max(self._next, now)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class LoadRecorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.iterations = 0
+        self.failed_iterations = 0
+
+    def record(self, step: str, status, seconds: float):
+        self.latencies[step].append(seconds * 1000)
+        self.statuses[step][str(status)] += 1
+
+    def endpoint_report(self, elapsed: float) -> dict:
+        report = {}
+        for step in STEPS:
+            latencies = self.latencies.get(step, [])
+            if not latencies:
+                continue
+            statuses = self.statuses[step]
+            ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+            report[step] = {
+                "requests": len(latencies),
+                "ok": ok,
+                "errors": len(latencies) - ok,
+                "status_codes": dict(statuses),
+                "throughput_rps": round(len(latencies) / elapsed, 2),
+                "mean_ms": round(sum(latencies) / len(latencies), 2),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(max(latencies), 2),
+            }
+        return report
+
+
+async def timed_request(client, recorder, pacer, step, method, url, **kwargs):
+    """Send one request and record it; returns the response, or None on a transport error"""
+    await pacer.wait()
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        await response.aread()
+    except httpx.HTTPError as e:
+        recorder.record(step, type(e).__name__, time.perf_counter() - started)
+        return None
+    recorder.record(step, response.status_code, time.perf_counter() - started)
+    return response
+
+
+async def run_flow(client, recorder, pacer, session_id, user_prompt, options) -> bool:
+    """One enhance -> generate -> fetch -> history -> delete iteration; False at the first failure"""
+    def ok(response):
+        return response is not None and response.is_success
+
+    response = await timed_request(
+        client, recorder, pacer, "enhance_prompt", "POST", "/api/poster/enhance-prompt",
+        json={"user_prompt": user_prompt, "session_id": session_id, "bypass_cache": options.bypass_cache}
+    )
+    if not ok(response):
+        return False
+    enhanced = response.json()
+
+    response = await timed_request(
+        client, recorder, pacer, "generate", "POST", "/api/poster/generate",
+        params={"image": options.image},
+        json={
+            "enhanced_prompt": enhanced["enhanced_prompt"],
+            "keywords": enhanced["keywords"],
+            "user_prompt": user_prompt,
+            "session_id": session_id,
+            "bypass_cache": options.bypass_cache
+        }
+    )
+    if not ok(response):
+        return False
+    poster_id = response.json()["id"]
+
+    steps = (
+        ("get_poster", "GET", f"/api/poster/{poster_id}"),
+        ("get_image", "GET", f"/api/poster/{poster_id}/image"),
+        ("history", "GET", f"/api/poster/history/{session_id}"),
+        ("delete_poster", "DELETE", f"/api/poster/{poster_id}"),
+    )
+    for step, method, url in steps:
+        if not ok(await timed_request(client, recorder, pacer, step, method, url)):
+            return False
+    return True
+
+
+async def virtual_user(index, client, recorder, pacer, deadline, options):
+    session_id = f"load-{index}-{uuid.uuid4()}"
+    iteration = 0
+    while time.perf_counter() < deadline:
+        base = USER_PROMPTS[(index + iteration) % len(USER_PROMPTS)]
+        # Distinct prompts so the prompt cache does not answer every enhance
+        user_prompt = f"{base} #{index}-{iteration}" if options.unique_prompts else base
+        success = await run_flow(client, recorder, pacer, session_id, user_prompt, options)
+        recorder.iterations += 1
+        if not success:
+            recorder.failed_iterations += 1
+        iteration += 1
+
+
+async def fetch_server_stats(client) -> dict:
+    """The backend's own counters after the run, best effort (cache counters need ADMIN_TOKEN)"""
+    stats = {}
+    headers = {"X-Admin-Token": os.environ.get('ADMIN_TOKEN', '')}
+    for name, url in (("caches", "/api/poster/cache/stats"), ("admission", "/api/admission/stats")):
+        try:
+            response = await client.get(url, headers=headers)
+            if response.is_success:
+                stats[name] = response.json()
+        except httpx.HTTPError:
+            pass
+    return stats
+
+
+async def wait_until_ready(base_url: str, timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get("/api/")).is_success:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Backend at {base_url} did not become ready within {timeout:g}s")
+
+
+async def run_load(base_url: str, options) -> dict:
+    await wait_until_ready(base_url)
+
+    recorder = LoadRecorder()
+    pacer = Pacer(options.rate)
+    limits = httpx.Limits(max_connections=options.users, max_keepalive_connections=options.users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=options.timeout) as client:
+        started = time.perf_counter()
+        deadline = started + options.duration
+        await asyncio.gather(*(
+            virtual_user(index, client, recorder, pacer, deadline, options)
+            for index in range(options.users)
+        ))
+        elapsed = time.perf_counter() - started
+        server_stats = await fetch_server_stats(client)
+
+    requests = sum(len(latencies) for latencies in recorder.latencies.values())
+    errors = sum(
+        count for statuses in recorder.statuses.values()
+        for status, count in statuses.items() if not status.startswith("2")
+    )
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {
+            "target": base_url if options.url else "local",
+            "users": options.users,
+            "duration_s": options.duration,
+            "target_rate_rps": options.rate or None,
+            "image": options.image,
+            "bypass_cache": options.bypass_cache,
+            "unique_prompts": options.unique_prompts,
+            "llm_latency_ms": None if options.url else options.llm_latency_ms,
+            "render_executor": None if options.url else os.environ.get('RENDER_EXECUTOR', 'process'),
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "totals": {
+            "elapsed_s": round(elapsed, 3),
+            "requests": requests,
+            "errors": errors,
+            "throughput_rps": round(requests / elapsed, 2),
+            "iterations": recorder.iterations,
+            "failed_iterations": recorder.failed_iterations,
+            "iterations_per_s": round(recorder.iterations / elapsed, 2),
+        },
+        "endpoints": recorder.endpoint_report(elapsed),
+        "server": server_stats,
+    }
+
+
+def serve(port: int, llm_url: str):
+    """Child process: the backend with the fake LLM and, without MONGO_URL, an in-memory MongoDB"""
+    os.environ['LLM_TRANSPORT'] = 'http'
+    os.environ['GEMINI_API_BASE'] = llm_url
+
+    import uvicorn
+
+    if not os.environ.get('MONGO_URL'):
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("Set MONGO_URL or install mongomock-motor for the in-memory MongoDB stand-in")
+
+        # Never contacted: database.py and server.py build lazy clients from it
+        os.environ['MONGO_URL'] = 'mongodb://127.0.0.1:1'
+        import database
+        database.client = AsyncMongoMockClient()
+        database.db = database.client[os.environ.get('DB_NAME', 'kala_ai')]
+        import server
+        server.db = database.db
+    else:
+        import server
+
+    # The backend logs every outgoing LLM request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    uvicorn.run(server.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_local_backend(options):
+    """Start the fake LLM and the backend; returns (base url, fake LLM server, backend process, blob dir)"""
+    from benchmarks.fake_llm_server import FakeLlmServer
+
+    llm = FakeLlmServer(free_port(), options.llm_latency_ms).__enter__()
+    port = free_port()
+    blob_dir = tempfile.TemporaryDirectory(prefix="kala-load-blobs-")
+    env = {**os.environ, "BLOB_STORE_PATH": blob_dir.name}
+    backend = subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--serve", str(port), "--llm-url", llm.base_url],
+        cwd=str(BACKEND_DIR),
+        env=env
+    )
+    return f"http://127.0.0.1:{port}", llm, backend, blob_dir
+
+
+def print_summary(report: dict):
+    totals = report["totals"]
+    print(
+        f"{totals['requests']} requests in {totals['elapsed_s']}s "
+        f"({totals['throughput_rps']} req/s, {totals['errors']} errors, "
+        f"{totals['iterations']} iterations, {totals['failed_iterations']} failed)"
+    )
+    print(f"{'endpoint':<16} {'requests':>8} {'errors':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in report["endpoints"].items():
+        print(
+            f"{name:<16} {stats['requests']:>8} {stats['errors']:>7} {stats['throughput_rps']:>8} "
+            f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=8, help="concurrent virtual users")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds to start new iterations for")
+    parser.add_argument('--rate', type=float, default=0.0, help="total requests per second across users (0: unpaced)")
+    parser.add_argument('--image', choices=("inline", "url"), default="inline", help="image mode of /generate")
+    parser.add_argument('--bypass-cache', action='store_true', help="send bypass_cache so every call does the full work")
+    parser.add_argument('--no-unique-prompts', dest='unique_prompts', action='store_false',
+                        help="reuse a handful of prompts so the prompt cache answers most enhances")
+    parser.add_argument('--timeout', type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument('--llm-latency-ms', type=float, default=300.0, help="fake LLM latency per call")
+    parser.add_argument('--url', default=None, help="load an already running backend instead of starting one")
+    parser.add_argument('--output', type=Path, default=None, help="write the JSON report here")
+    parser.add_argument('--serve', type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--llm-url', default=None, help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.serve is not None:
+        serve(options.serve, options.llm_url)
+        return
+
+    if options.url:
+        report = asyncio.run(run_load(options.url.rstrip("/"), options))
+    else:
+        # Lets the report read the local backend's admin-only cache counters
+        os.environ.setdefault('ADMIN_TOKEN', uuid.uuid4().hex)
+        base_url, llm, backend, blob_dir = start_local_backend(options)
+        try:
+            report = asyncio.run(run_load(base_url, options))
+        finally:
+            backend.terminate()
+            backend.wait(timeout=10)
+            llm.__exit__(None, None, None)
+            blob_dir.cleanup()
+
+    print_summary(report)
+    if options.output is not None:
+        options.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nWrote {options.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 
+from services.metrics import mongo_command_listener
+
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_command_listener])
 db = client[os.environ.get('DB_NAME', 'kala_ai')]
 
 def get_database():
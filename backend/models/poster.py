@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 import uuid
 
@@ -10,11 +10,25 @@ class LogoData(BaseModel):
     base64: str   # base64 encoded image
     position: Optional[str] = None
 
+class Logo(BaseModel):
+    id: str  # content hash of the image, also its blob store reference
+    name: Optional[str] = None
+    content_type: str
+    size: int  # bytes
+    width: int
+    height: int
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
 class PosterRequest(BaseModel):
     user_prompt: str
     session_id: str
     logo: Optional[LogoData] = None
+    logo_id: Optional[str] = None
     logo_position: Optional[str] = None
+    format: Optional[str] = None  # 'png', 'webp' or 'jpeg'; negotiated from Accept when unset
+    quality: Optional[int] = None  # 1-100, lossy WebP and JPEG
+    lossless: bool = False  # WebP only
+    compress_level: Optional[int] = None  # 0-9, PNG only
 
 class EnhancedPrompt(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -24,14 +38,26 @@ class EnhancedPrompt(BaseModel):
     session_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class ImageRendition(BaseModel):
+    image_ref: str
+    image_size: int
+    image_format: str
+    width: int
+    height: int
+
 class GeneratedPoster(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_prompt: str
     enhanced_prompt: str
     keywords: List[str]
-    logo: Optional[LogoData] = None
+    logo: Optional[LogoData] = None  # legacy inline copy of the logo; new posters use logo_id
+    logo_id: Optional[str] = None  # id in the logos collection
     logo_position: Optional[str] = None
-    poster_image: str  # base64 encoded image
+    poster_image: Optional[str] = None  # legacy inline base64 image; new posters use image_ref
+    image_ref: Optional[str] = None  # content hash in the blob store
+    image_size: Optional[int] = None  # bytes
+    image_format: Optional[str] = None  # 'png', 'webp', ...
+    renditions: Dict[str, ImageRendition] = Field(default_factory=dict)  # keyed by '<size>_<format>'
     style: str
     dimensions: str
     session_id: str
@@ -50,4 +76,20 @@ class PosterHistory(BaseModel):
     posters: List[GeneratedPoster]
     messages: List[ChatMessage]
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class GenerationJob(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    session_id: Optional[str] = None
+    status: str = "queued"  # 'queued', 'running', 'done', 'failed'
+    params: Dict[str, Any]  # the generate request
+    result: Optional[Dict[str, Any]] = None  # set when done, e.g. poster_id
+    error: Optional[str] = None  # set when failed, or the last temporary error of a retried job
+    attempts: int = 0  # times a worker has claimed the job
+    retry_at: Optional[datetime] = None  # a retried job is not claimed before this
+    owner: Optional[str] = None  # queue running the job, while it is running
+    lease_expires_at: Optional[datetime] = None  # another queue may take the job over after this
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,28 @@
+from fastapi import HTTPException
+
+from services.admission import admission_gates, AdmissionGate, AdmissionRejectedError
+
+
+async def acquire_or_429(gate: AdmissionGate) -> float:
+    """Acquire a slot on gate, turning a rejection into 429 Too Many Requests"""
+    try:
+        return await gate.acquire()
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+def admission(name: str):
+    """
+    Route dependency that holds a slot of the named gate while the handler runs:
+    @router.post("/generate", dependencies=[Depends(admission("generate"))])
+    """
+    gate = admission_gates[name]
+
+    async def hold_slot():
+        acquired = await acquire_or_429(gate)
+        try:
+            yield
+        finally:
+            gate.release(acquired)
+
+    return hold_slot
@@ -0,0 +1,81 @@
+import re
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+# Images are content-addressed, so a given URL never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison and may list several tags or '*'"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def _parse_range(header: str, length: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header into an inclusive (start, end) pair.
+    Returns None for headers we serve in full (malformed or multi-range) and
+    raises ValueError when the range cannot be satisfied.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+
+    if not start:
+        # Suffix range: the last N bytes
+        suffix = int(end)
+        if suffix == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, length - suffix), length - 1
+
+    start = int(start)
+    end = int(end) if end else length - 1
+    if start >= length or end < start:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, length - 1)
+
+
+def image_response(request: Request, data: bytes, media_type: str, etag: str,
+                   extra_headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Raw image bytes with a strong ETag and immutable caching, plus extra_headers
+    (e.g. Vary) on every status. Handles If-None-Match (304) and single byte
+    ranges (206/416).
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        **(extra_headers or {}),
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, len(data))
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{len(data)}"
+            return Response(status_code=416, headers=headers)
+
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+            return Response(content=data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+    return Response(content=data, media_type=media_type, headers=headers)
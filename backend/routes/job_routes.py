@@ -0,0 +1,142 @@
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+import os
+import asyncio
+
+from services.poster_pipeline import poster_pipeline, InvalidPosterRequestError
+from services.job_queue import JobQueue, JobQueueFullError, TERMINAL_STATUSES
+from services.render_executor import RenderQueueFullError
+from services.admission import AdmissionRejectedError
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# Poster generation jobs, processed by GENERATION_WORKERS background workers;
+# jobs that hit an overloaded render executor or admission gate are retried
+generation_queue = JobQueue(
+    "generation_jobs",
+    poster_pipeline.run_job,
+    retry_on=(RenderQueueFullError, AdmissionRejectedError)
+)
+
+# How often a WebSocket re-reads the job, to catch updates made by another process
+JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', 5))
+
+def _job_view(job: dict) -> dict:
+    """Public form of a job document; params (which may hold a whole logo) stay private"""
+    view = {
+        "id": job["id"],
+        "status": job["status"],
+        "session_id": job.get("session_id"),
+        "attempts": job.get("attempts", 0),
+        "created_at": job.get("created_at"),
+        "updated_at": job.get("updated_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at")
+    }
+    if job.get("result") is not None:
+        view["result"] = job["result"]
+    if job.get("error") is not None:
+        view["error"] = job["error"]
+    return jsonable_encoder(view)
+
+def _with_poster_urls(view: dict, request) -> dict:
+    poster_id = (view.get("result") or {}).get("poster_id")
+    if poster_id:
+        view["result"]["poster_url"] = request.app.url_path_for("get_poster", poster_id=poster_id)
+        view["result"]["poster_image_url"] = request.app.url_path_for("get_poster_image", poster_id=poster_id)
+    return view
+
+@router.post("", status_code=202)
+async def submit_generation_job(request: dict, http_request: Request):
+    """
+    Queue a poster generation. Takes the same body as POST /poster/generate and
+    returns the job id at once; follow the job with GET /jobs/{job_id} or the
+    WebSocket at /jobs/{job_id}/ws.
+    """
+    try:
+        poster_pipeline.validate(request)
+        # Reject a bad format, quality or compress_level now, not when the job runs
+        poster_pipeline.encoding(request)
+
+        job = await generation_queue.submit(request, request.get("session_id"))
+
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": http_request.app.url_path_for("get_job", job_id=job["id"]),
+            "websocket_url": http_request.app.url_path_for("job_updates", job_id=job["id"])
+        }
+
+    except InvalidPosterRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        print(f"Error in submit_generation_job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stats")
+async def get_job_stats():
+    """
+    Queue depth, running jobs and counters of the generation workers
+    """
+    return generation_queue.stats()
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, http_request: Request):
+    """
+    Get a generation job's status, and its poster once it is done
+    """
+    try:
+        job = await generation_queue.get(job_id)
+
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        return _with_poster_urls(_job_view(job), http_request)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in get_job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.websocket("/{job_id}/ws")
+async def job_updates(websocket: WebSocket, job_id: str):
+    """
+    Send the job's state on connect and after every change, then close once
+    the job is done or failed
+    """
+    await websocket.accept()
+    # Subscribe before reading so no change can slip in between
+    updates = generation_queue.subscribe(job_id)
+    try:
+        job = await generation_queue.get(job_id)
+        if not job:
+            await websocket.send_json({"error": "Job not found"})
+            await websocket.close(code=4404)
+            return
+
+        last_sent = None
+        while True:
+            view = _with_poster_urls(_job_view(job), websocket)
+            if view != last_sent:
+                await websocket.send_json(view)
+                last_sent = view
+            if job["status"] in TERMINAL_STATUSES:
+                break
+
+            try:
+                job = await asyncio.wait_for(updates.get(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                job = await generation_queue.get(job_id) or job
+
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"Error in job_updates: {str(e)}")
+        await websocket.close(code=1011)
+    finally:
+        generation_queue.unsubscribe(job_id, updates)
@@ -0,0 +1,123 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartParser
+
+from services.logo_store import logo_store, InvalidLogoError, LOGO_MAX_BYTES
+from services.blob_store import get_blob_store
+from routes.image_response import image_response, etag_matches
+
+router = APIRouter(prefix="/logos", tags=["logos"])
+
+# Room for the multipart boundaries and part headers around the logo itself
+LOGO_UPLOAD_OVERHEAD_BYTES = 64 * 1024
+
+LOGO_UPLOAD_MAX_BYTES = LOGO_MAX_BYTES + LOGO_UPLOAD_OVERHEAD_BYTES
+
+def _upload_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Logo exceeds {LOGO_MAX_BYTES} bytes")
+
+async def _bounded_body(http_request: Request):
+    """The request body, aborting once it grows past LOGO_UPLOAD_MAX_BYTES"""
+    received = 0
+    async for chunk in http_request.stream():
+        received += len(chunk)
+        if received > LOGO_UPLOAD_MAX_BYTES:
+            raise _upload_too_large()
+        yield chunk
+
+@router.post("", status_code=201)
+async def upload_logo(http_request: Request, response: Response):
+    """
+    Upload a logo once and reference it by logo_id in /poster/generate.
+    Takes a multipart form with the image in its "file" field.
+    Logos are stored by content hash, so uploading the same file again returns
+    the existing logo (with status 200 instead of 201).
+    """
+    # The form is parsed here rather than through File(...): FastAPI would
+    # spool the whole body before the handler runs, whatever its size
+    content_length = http_request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > LOGO_UPLOAD_MAX_BYTES:
+        raise _upload_too_large()
+
+    try:
+        form = await MultiPartParser(http_request.headers, _bounded_body(http_request), max_fields=10).parse()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid upload: {str(e)}")
+
+    try:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=400, detail="Missing logo file")
+
+        data = await file.read()
+        await form.close()
+        logo, existed = await logo_store.put(data, file.filename)
+        
+        if existed:
+            response.status_code = 200
+        
+        return {
+            "logo_id": logo["id"],
+            "name": logo.get("name"),
+            "content_type": logo["content_type"],
+            "size": logo["size"],
+            "width": logo["width"],
+            "height": logo["height"],
+            "deduplicated": existed
+        }
+        
+    except HTTPException:
+        raise
+    except InvalidLogoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error in upload_logo: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{logo_id}")
+async def get_logo(logo_id: str):
+    """
+    Get a logo's metadata
+    """
+    try:
+        logo = await logo_store.get(logo_id)
+        
+        if not logo:
+            raise HTTPException(status_code=404, detail="Logo not found")
+        
+        return logo
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in get_logo: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{logo_id}/image")
+async def get_logo_image(logo_id: str, http_request: Request):
+    """
+    Get the logo image; it never changes for a given id, so it is cached immutably
+    """
+    try:
+        logo = await logo_store.get(logo_id)
+        
+        if not logo:
+            raise HTTPException(status_code=404, detail="Logo not found")
+        
+        etag = f'"{logo_id}"'
+        if etag_matches(http_request.headers.get("if-none-match"), etag):
+            return image_response(http_request, b"", logo["content_type"], etag)
+        
+        data = await get_blob_store().get(logo_id)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Logo image not found")
+        
+        return image_response(http_request, data, logo["content_type"], etag)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in get_logo_image: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,113 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services.metrics import registry, HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+from services.render_executor import render_executor
+from services.prompt_cache import prompt_cache
+from services.poster_pipeline import poster_pipeline
+from services.admission import admission_gates
+from routes.poster_routes import gemini_service
+from routes.job_routes import generation_queue
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsMiddleware:
+    """
+    Counts and times every HTTP request by method, route template and status.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware so streaming
+    responses pass through untouched; the latency runs until the last body
+    chunk is sent. Routes are labelled by their template (/api/jobs/{job_id})
+    so ids do not create a series per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router fills in scope["route"] once a route matched
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status))
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=method, route=route)
+
+
+def _cache_stats():
+    """Per-process caches in the API worker plus render worker caches summed across workers"""
+    return {
+        **render_executor.worker_stats.totals(),
+        "prompt": prompt_cache.stats(),
+        "render": poster_pipeline.render_cache.stats()
+    }
+
+
+def _per_cache(field):
+    def collect():
+        return [({"cache": name}, stats[field]) for name, stats in _cache_stats().items() if field in stats]
+    return collect
+
+
+def _per_gate(*fields):
+    def collect():
+        return [({"gate": name}, sum(gate.stats()[field] for field in fields)) for name, gate in admission_gates.items()]
+    return collect
+
+
+registry.counter_callback("kala_cache_hits_total", "Cache hits by cache", _per_cache("hits"))
+registry.counter_callback("kala_cache_misses_total", "Cache misses by cache", _per_cache("misses"))
+registry.gauge("kala_cache_hit_ratio", "Cache hits over lookups by cache", _per_cache("hit_ratio"))
+registry.gauge("kala_cache_bytes", "Bytes held by size-bounded caches", _per_cache("bytes"))
+registry.gauge(
+    "kala_render_executor_pending",
+    "Renders submitted to the render executor and not yet finished",
+    lambda: [({}, render_executor.pending)]
+)
+registry.gauge(
+    "kala_render_executor_max_pending",
+    "Render executor queue depth before renders are rejected",
+    lambda: [({}, render_executor.max_pending)]
+)
+registry.gauge("kala_admission_active", "Requests holding an admission slot by gate", _per_gate("active"))
+registry.gauge("kala_admission_waiting", "Requests queued for an admission slot by gate", _per_gate("waiting"))
+registry.counter_callback(
+    "kala_admission_rejected_total",
+    "Requests turned away with 429 by gate, when full or after waiting too long",
+    _per_gate("rejected", "timed_out")
+)
+registry.gauge(
+    "kala_generation_jobs",
+    "Generation jobs queued or running in this process",
+    lambda: [({"status": status}, generation_queue.stats()[status]) for status in ("queued", "running")]
+)
+registry.gauge(
+    "kala_llm_requests_in_flight",
+    "LLM calls currently holding a client slot",
+    lambda: [({}, gemini_service.client_pool.stats()["in_use"])]
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint; everything is read at scrape time, nothing is precomputed"""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
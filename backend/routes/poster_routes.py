@@ -1,24 +1,139 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from typing import List, Optional
 from datetime import datetime
+import json
 import uuid
+from pymongo.errors import BulkWriteError
 
 from models.poster import (
     PosterRequest, EnhancedPrompt, GeneratedPoster, 
-    ChatMessage, LogoData
+    ChatMessage
 )
 from services.gemini_service import GeminiService
-from services.imagen_service import ImagenService
+from services.poster_pipeline import poster_pipeline, InvalidPosterRequestError, PosterGenerationError
+from services.image_codec import to_data_uri, negotiate_format
+from services.blob_store import get_blob_store, content_hash
+from services.render_executor import render_executor, RenderQueueFullError
+from services.renditions import rendition_service, rendition_key, SIZES, FORMATS
+from services.prompt_cache import prompt_cache
+from services.pagination import encode_cursor, keyset_query, InvalidCursorError, KEYSET_SORT
 from database import get_database
+from services.admission import admission_gates
+from routes.image_response import image_response, etag_matches
+from routes.admission import admission, acquire_or_429
+from routes.profile_routes import maybe_profile, check_admin
 
 router = APIRouter(prefix="/poster", tags=["poster"])
 
 # Initialize services
 gemini_service = GeminiService()
-imagen_service = ImagenService()
+imagen_service = poster_pipeline.imagen_service
 
-@router.post("/enhance-prompt")
-async def enhance_prompt(request: dict):
+# Most prompts accepted by one /enhance-prompt/batch request
+MAX_ENHANCE_BATCH_SIZE = 100
+
+# How JSON endpoints return the poster image: inline base64 or a URL to /{poster_id}/image
+IMAGE_MODES = ("inline", "url")
+
+# History paging
+MAX_POSTER_PAGE_SIZE = 100
+MAX_MESSAGE_PAGE_SIZE = 200
+# Left out of history rows unless requested through fields
+HISTORY_HEAVY_FIELDS = ("poster_image", "logo")
+# Always projected so cursors and image URLs can be built
+HISTORY_REQUIRED_FIELDS = {"id", "created_at", "image_ref", "image_format", "renditions"}
+# Names accepted in history's fields parameter
+HISTORY_FIELDS = set(GeneratedPoster.model_fields)
+
+def _check_image_options(image: str = "inline", size: str = "full", image_format: Optional[str] = None):
+    if image not in IMAGE_MODES:
+        raise HTTPException(status_code=400, detail=f"image must be one of: {', '.join(IMAGE_MODES)}")
+    if size not in SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of: {', '.join(SIZES)}")
+    if image_format is not None and image_format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(FORMATS)}")
+
+def _poster_image_url(http_request: Request, poster_id: str, size: str = "full", image_format: Optional[str] = None) -> str:
+    url = http_request.app.url_path_for("get_poster_image", poster_id=poster_id)
+    params = []
+    if size != "full":
+        params.append(f"size={size}")
+    if image_format:
+        params.append(f"format={image_format}")
+    return f"{url}?{'&'.join(params)}" if params else url
+
+async def _attach_poster_image(poster: dict, image: str, http_request: Request, size: str = "full", image_format: Optional[str] = None):
+    """Apply the requested image mode and rendition to a poster document"""
+    if image == "url":
+        poster.pop("poster_image", None)
+        poster["poster_image_url"] = _poster_image_url(http_request, poster["id"], size, image_format)
+        return
+    
+    if poster.get("poster_image") and size == "full" and image_format is None:
+        # Legacy poster that still carries its image inline
+        return
+    
+    rendition = await rendition_service.get_image(poster, size, image_format)
+    if rendition is not None:
+        image_bytes, rendition_format, _ = rendition
+        poster["poster_image"] = to_data_uri(image_bytes, rendition_format)
+
+def _enhancement_records(user_prompt: str, session_id: str, result: dict):
+    """EnhancedPrompt plus the user and AI ChatMessages for one enhancement"""
+    enhanced_prompt = EnhancedPrompt(
+        original_prompt=user_prompt,
+        enhanced_prompt=result["enhanced_prompt"],
+        keywords=result["keywords"],
+        session_id=session_id
+    )
+    
+    user_message = ChatMessage(
+        session_id=session_id,
+        message_type="user",
+        content=user_prompt
+    )
+    
+    ai_message = ChatMessage(
+        session_id=session_id,
+        message_type="ai",
+        content=result["enhanced_prompt"],
+        keywords=result["keywords"]
+    )
+    
+    return enhanced_prompt, [user_message, ai_message]
+
+async def _save_enhancement(user_prompt: str, session_id: str, result: dict):
+    """Persist an enhancement and its chat messages"""
+    enhanced_prompt, messages = _enhancement_records(user_prompt, session_id, result)
+    
+    db = get_database()
+    await db.enhanced_prompts.insert_one(enhanced_prompt.dict())
+    await db.chat_messages.insert_many([message.dict() for message in messages])
+
+async def _insert_batch(collection, documents: List[dict], owners: List[int]) -> dict:
+    """
+    insert_many without stopping at the first error. Returns {owner: error} for
+    the documents that were not written; owners[i] is the owner of documents[i].
+    """
+    try:
+        await collection.insert_many(documents, ordered=False)
+        return {}
+    except BulkWriteError as e:
+        print(f"Error saving enhance_prompt_batch results: {str(e)}")
+        # The other documents of an unordered insert were written
+        return {owners[error["index"]]: error.get("errmsg", "write error") for error in e.details.get("writeErrors", [])}
+    except Exception as e:
+        print(f"Error saving enhance_prompt_batch results: {str(e)}")
+        return {owner: str(e) for owner in owners}
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/enhance-prompt", dependencies=[Depends(admission("enhance_prompt"))])
+async def enhance_prompt(request: dict, http_request: Request, http_response: Response):
     """
     Enhance a user's poster prompt using Gemini AI
     """
@@ -29,40 +144,16 @@ async def enhance_prompt(request: dict):
         if not user_prompt:
             raise HTTPException(status_code=400, detail="user_prompt is required")
         
-        # Enhance prompt using Gemini
-        result = await gemini_service.enhance_prompt(user_prompt, session_id)
+        # Enhance prompt using Gemini; bypass_cache forces a fresh LLM call
+        use_cache = not request.get("bypass_cache", False)
+        async with maybe_profile(http_request, http_response, "enhance_prompt"):
+            result = await gemini_service.enhance_prompt(user_prompt, session_id, use_cache)
         
         if not result.get("success"):
             raise HTTPException(status_code=500, detail="Failed to enhance prompt")
         
-        # Create enhanced prompt object
-        enhanced_prompt = EnhancedPrompt(
-            original_prompt=user_prompt,
-            enhanced_prompt=result["enhanced_prompt"],
-            keywords=result["keywords"],
-            session_id=session_id
-        )
-        
-        # Save to database
-        db = get_database()
-        await db.enhanced_prompts.insert_one(enhanced_prompt.dict())
-        
-        # Save chat message
-        user_message = ChatMessage(
-            session_id=session_id,
-            message_type="user",
-            content=user_prompt
-        )
-        
-        ai_message = ChatMessage(
-            session_id=session_id,
-            message_type="ai",
-            content=result["enhanced_prompt"],
-            keywords=result["keywords"]
-        )
-        
-        await db.chat_messages.insert_one(user_message.dict())
-        await db.chat_messages.insert_one(ai_message.dict())
+        # Save the enhanced prompt and chat messages
+        await _save_enhancement(user_prompt, session_id, result)
         
         return {
             "enhanced_prompt": result["enhanced_prompt"],
@@ -70,105 +161,372 @@ async def enhance_prompt(request: dict):
             "session_id": session_id
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in enhance_prompt: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/generate")
-async def generate_poster(request: dict):
+@router.post("/enhance-prompt/batch", dependencies=[Depends(admission("enhance_batch"))])
+async def enhance_prompt_batch(request: dict):
     """
-    Generate a poster using Imagen 4
+    Enhance several poster prompts in one request.
+    
+    prompts is a list of strings or {"user_prompt", "session_id"} objects; items
+    without their own session_id use the request's session_id. Prompts run
+    concurrently up to ENHANCE_BATCH_CONCURRENCY and every record is written
+    with one insert_many per collection. Each item reports its own result or
+    error, in input order.
     """
     try:
-        enhanced_prompt = request.get("enhanced_prompt")
-        session_id = request.get("session_id")
-        user_prompt = request.get("user_prompt", "")
-        keywords = request.get("keywords", [])
-        logo_data = request.get("logo")
-        logo_position = request.get("logo_position")
-        
-        if not enhanced_prompt:
-            raise HTTPException(status_code=400, detail="enhanced_prompt is required")
-        
-        if not session_id:
-            raise HTTPException(status_code=400, detail="session_id is required")
-        
-        # Generate poster using Imagen 4
-        result = await imagen_service.generate_poster(
-            enhanced_prompt, 
-            logo_data, 
-            logo_position
-        )
+        prompts = request.get("prompts")
+        default_session_id = request.get("session_id", str(uuid.uuid4()))
         
-        if not result.get("success"):
-            raise HTTPException(status_code=500, detail="Failed to generate poster")
-        
-        # Create poster object
-        poster = GeneratedPoster(
-            user_prompt=user_prompt,
-            enhanced_prompt=enhanced_prompt,
-            keywords=keywords,
-            logo=LogoData(**logo_data) if logo_data else None,
-            logo_position=logo_position,
-            poster_image=result["image_base64"],
-            style=result["style"],
-            dimensions=result["dimensions"],
-            session_id=session_id
+        if not isinstance(prompts, list) or not prompts:
+            raise HTTPException(status_code=400, detail="prompts must be a non-empty list")
+        if len(prompts) > MAX_ENHANCE_BATCH_SIZE:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_ENHANCE_BATCH_SIZE} prompts per batch")
+        
+        results: List[Optional[dict]] = [None] * len(prompts)
+        pending = []
+        for index, item in enumerate(prompts):
+            if isinstance(item, dict):
+                user_prompt = item.get("user_prompt")
+                session_id = item.get("session_id") or default_session_id
+            else:
+                user_prompt, session_id = item, default_session_id
+            
+            if not isinstance(user_prompt, str) or not user_prompt.strip():
+                results[index] = {"index": index, "error": "user_prompt is required"}
+            else:
+                pending.append((index, user_prompt, session_id))
+        
+        use_cache = not request.get("bypass_cache", False)
+        outcomes = await gemini_service.enhance_prompts(
+            [(user_prompt, session_id) for _, user_prompt, session_id in pending], use_cache
         )
         
-        # Save to database
-        db = get_database()
-        await db.generated_posters.insert_one(poster.dict())
+        enhanced_prompts = []
+        chat_messages = []
+        # Result index of each document, to map insert errors back to items
+        enhanced_prompt_owners = []
+        chat_message_owners = []
+        for (index, user_prompt, session_id), outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                results[index] = {"index": index, "user_prompt": user_prompt, "error": str(outcome)}
+                continue
+            if not outcome.get("success"):
+                results[index] = {"index": index, "user_prompt": user_prompt, "error": "Failed to enhance prompt"}
+                continue
+            
+            enhanced_prompt, messages = _enhancement_records(user_prompt, session_id, outcome)
+            enhanced_prompts.append(enhanced_prompt.dict())
+            enhanced_prompt_owners.append(index)
+            chat_messages.extend(message.dict() for message in messages)
+            chat_message_owners.extend(index for _ in messages)
+            results[index] = {
+                "index": index,
+                "user_prompt": user_prompt,
+                "enhanced_prompt": outcome["enhanced_prompt"],
+                "keywords": outcome["keywords"],
+                "session_id": session_id
+            }
+        
+        if enhanced_prompts:
+            db = get_database()
+            save_errors = {
+                **await _insert_batch(db.chat_messages, chat_messages, chat_message_owners),
+                **await _insert_batch(db.enhanced_prompts, enhanced_prompts, enhanced_prompt_owners)
+            }
+            # The enhancements are still returned, flagged as not saved
+            for index, error in save_errors.items():
+                results[index]["error"] = f"Failed to save: {error}"
         
+        failed = sum(1 for result in results if "error" in result)
         return {
+            "results": results,
+            "succeeded": len(results) - failed,
+            "failed": failed
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in enhance_prompt_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/enhance-prompt/stream")
+async def enhance_prompt_stream(request: dict):
+    """
+    Stream a prompt enhancement as Server-Sent Events.
+    
+    Sends "token" events with pieces of the enhanced prompt as the model writes
+    them, then one "keywords" event with the final prompt, keywords and session
+    id once the records are saved. Failures after the stream has started are
+    reported as an "error" event.
+    """
+    user_prompt = request.get("user_prompt")
+    session_id = request.get("session_id", str(uuid.uuid4()))
+    
+    if not user_prompt:
+        raise HTTPException(status_code=400, detail="user_prompt is required")
+    
+    use_cache = not request.get("bypass_cache", False)
+    
+    # Held until the stream ends, so it cannot go through a route dependency
+    gate = admission_gates["enhance_prompt"]
+    acquired = await acquire_or_429(gate)
+    released = False
+    
+    def release_slot():
+        nonlocal released
+        if not released:
+            released = True
+            gate.release(acquired)
+    
+    async def events():
+        try:
+            result = None
+            async for event in gemini_service.enhance_prompt_stream(user_prompt, session_id, use_cache):
+                if event["type"] == "token":
+                    yield _sse_event("token", {"text": event["text"]})
+                else:
+                    result = event
+            
+            if not result or not result.get("success"):
+                yield _sse_event("error", {"detail": "Failed to enhance prompt"})
+                return
+            
+            # Saved only once the whole reply is known
+            await _save_enhancement(user_prompt, session_id, result)
+            
+            yield _sse_event("keywords", {
+                "enhanced_prompt": result["enhanced_prompt"],
+                "keywords": result["keywords"],
+                "session_id": session_id
+            })
+        
+        except Exception as e:
+            print(f"Error in enhance_prompt_stream: {str(e)}")
+            yield _sse_event("error", {"detail": str(e)})
+        finally:
+            release_slot()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also releases the slot if the stream never started
+        background=BackgroundTask(release_slot)
+    )
+
+@router.post("/generate", dependencies=[Depends(admission("generate"))])
+async def generate_poster(request: dict, http_request: Request, http_response: Response, image: str = "inline"):
+    """
+    Generate a poster using Imagen 4.
+    The image is encoded as format (png, webp, jpeg) with quality, lossless or
+    compress_level from the body, or in the best format the Accept header names.
+    """
+    try:
+        _check_image_options(image)
+        
+        # An explicit format wins; otherwise the best image type named in Accept, else the default
+        if not request.get("format"):
+            negotiated = negotiate_format(http_request.headers.get("accept"))
+            if negotiated:
+                request = {**request, "format": negotiated}
+        
+        # Render, store the image and save the poster document
+        async with maybe_profile(http_request, http_response, "generate_poster"):
+            poster, image_bytes = await poster_pipeline.generate(request)
+        
+        # The URL is always included so clients can fetch renditions (e.g. size=thumb) later
+        response = {
             "id": poster.id,
-            "poster_image": result["image_base64"],
-            "style": result["style"],
-            "dimensions": result["dimensions"],
-            "created_at": poster.created_at.isoformat()
+            "style": poster.style,
+            "dimensions": poster.dimensions,
+            "created_at": poster.created_at.isoformat(),
+            "poster_image_url": _poster_image_url(http_request, poster.id)
         }
+        if image != "url":
+            if image_bytes is None:
+                # Served from the render cache, so the image is only in the blob store
+                image_bytes = await get_blob_store().get(poster.image_ref)
+            response["poster_image"] = to_data_uri(image_bytes, poster.image_format)
+        
+        return response
         
+    except HTTPException:
+        raise
+    except InvalidPosterRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PosterGenerationError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except RenderQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         print(f"Error in generate_poster: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/history/{session_id}")
-async def get_poster_history(session_id: str):
+async def get_poster_history(session_id: str, http_request: Request, image: str = "url",
+                             size: str = "full", format: Optional[str] = None,
+                             poster_limit: int = 20, message_limit: int = 50,
+                             poster_cursor: Optional[str] = None, message_cursor: Optional[str] = None,
+                             fields: Optional[str] = None):
     """
-    Get poster generation history for a session
+    Get poster generation history for a session, newest first.
+    
+    Posters and messages are paged separately with opaque cursors
+    (next_poster_cursor / next_message_cursor). poster_image and logo are left
+    out unless named in fields (GeneratedPoster field names); every poster
+    carries poster_image_url instead.
+    
+    Rows are encoded and streamed as they come off the cursors. The first row
+    of each page is read before the response starts, so a failing query is
+    still a 500; if reading or preparing a later row fails, the body ends with
+    an "error" member instead.
     """
     try:
-        db = get_database()
+        _check_image_options(image, size, format)
+        if not 0 <= poster_limit <= MAX_POSTER_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"poster_limit must be between 0 and {MAX_POSTER_PAGE_SIZE}")
+        if not 0 <= message_limit <= MAX_MESSAGE_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"message_limit must be between 0 and {MAX_MESSAGE_PAGE_SIZE}")
         
-        # Get generated posters
-        posters_cursor = db.generated_posters.find({"session_id": session_id})
-        posters = []
-        async for poster in posters_cursor:
-            poster['_id'] = str(poster['_id'])
-            posters.append(poster)
+        poster_query = keyset_query({"session_id": session_id}, poster_cursor)
+        message_query = keyset_query({"session_id": session_id}, message_cursor)
         
-        # Get chat messages
-        messages_cursor = db.chat_messages.find({"session_id": session_id})
-        messages = []
-        async for message in messages_cursor:
-            message['_id'] = str(message['_id'])
-            messages.append(message)
+        requested = {field.strip() for field in fields.split(",") if field.strip()} if fields else set()
+        unknown = requested - HISTORY_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
         
-        return {
-            "posters": posters,
-            "messages": messages
-        }
+    except HTTPException:
+        raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if "poster_image" in requested:
+        image = "inline"
+    if requested:
+        # Explicit projection; the keyset and image fields are always needed
+        poster_projection = {field: 1 for field in requested | HISTORY_REQUIRED_FIELDS}
+        poster_projection["_id"] = 0
+    else:
+        heavy_fields = [field for field in HISTORY_HEAVY_FIELDS if not (image == "inline" and field == "poster_image")]
+        poster_projection = {"_id": 0, **{field: 0 for field in heavy_fields}}
+    
+    async def open_page(collection, query, projection, limit):
+        """
+        Cursor over a page plus one extra row, which only tells us whether
+        another page exists, and the page's first document (None when empty)
+        """
+        if limit == 0:
+            return None, None
+        
+        documents = collection.find(query, projection).sort(KEYSET_SORT).limit(limit + 1)
+        try:
+            return await documents.__anext__(), documents
+        except StopAsyncIteration:
+            return None, None
+    
+    try:
+        # The first row of each page is read now, so a failing query is still a 500
+        db = get_database()
+        first_poster, poster_documents = await open_page(db.generated_posters, poster_query, poster_projection, poster_limit)
+        first_message, message_documents = await open_page(db.chat_messages, message_query, {"_id": 0}, message_limit)
         
     except Exception as e:
         print(f"Error in get_poster_history: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    next_cursors = {}
+    
+    async def stream_rows(name, document, documents, limit, prepare=None):
+        """Yield JSON-encoded rows as they come off the cursor; the extra row sets next_cursors[name]"""
+        count = 0
+        previous = None
+        while document is not None:
+            if count == limit:
+                next_cursors[name] = encode_cursor(previous)
+                return
+            if prepare is not None:
+                await prepare(document)
+            yield ("," if count else "") + json.dumps(jsonable_encoder(document))
+            previous = document
+            count += 1
+            try:
+                document = await documents.__anext__()
+            except StopAsyncIteration:
+                document = None
+    
+    async def prepare_poster(poster: dict):
+        await _attach_poster_image(poster, image, http_request, size, format)
+        poster.setdefault("poster_image_url", _poster_image_url(http_request, poster["id"], size, format))
+    
+    async def body():
+        try:
+            yield '{"posters": ['
+            async for row in stream_rows("posters", first_poster, poster_documents, poster_limit, prepare_poster):
+                yield row
+            yield f'], "next_poster_cursor": {json.dumps(next_cursors.get("posters"))}, "messages": ['
+            
+            async for row in stream_rows("messages", first_message, message_documents, message_limit):
+                yield row
+            yield f'], "next_message_cursor": {json.dumps(next_cursors.get("messages"))}}}'
+        except Exception as e:
+            # Headers are already sent: close the open array and report the failure in the
+            # body, so the client gets valid JSON with an "error" member instead of a cut-off page
+            print(f"Error in get_poster_history: {str(e)}")
+            yield f'], "error": {json.dumps(str(e))}}}'
+    
+    return StreamingResponse(body(), media_type="application/json")
+
+@router.get("/cache/stats", dependencies=[Depends(check_admin)])
+async def get_cache_stats():
+    """
+    Cache hit/miss counters; render caches are summed across render workers.
+    Requires the admin token.
+    """
+    return {
+        "render_executor": render_executor.stats(),
+        "caches": {
+            **render_executor.worker_stats.totals(),
+            "prompt": prompt_cache.stats(),
+            "render": poster_pipeline.render_cache.stats()
+        },
+        "single_flight": {
+            "enhance_prompt": gemini_service.enhance_flight.stats(),
+            "generate_poster": imagen_service.render_flight.stats()
+        }
+    }
+
+@router.delete("/cache/renders", dependencies=[Depends(check_admin)])
+async def invalidate_render_cache():
+    """
+    Forget every cached render, e.g. after a renderer change that did not bump
+    RENDERER_VERSION. Takes effect in every worker within
+    RENDER_CACHE_GENERATION_CHECK_SECONDS. Stored posters keep their images.
+    Requires the admin token.
+    """
+    try:
+        removed = await poster_pipeline.render_cache.invalidate()
+        return {"invalidated": removed}
+        
+    except Exception as e:
+        print(f"Error in invalidate_render_cache: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{poster_id}")
-async def get_poster(poster_id: str):
+async def get_poster(poster_id: str, http_request: Request, image: str = "inline",
+                     size: str = "full", format: Optional[str] = None):
     """
     Get a specific poster by ID
     """
     try:
+        _check_image_options(image, size, format)
         db = get_database()
         poster = await db.generated_posters.find_one({"id": poster_id})
         
@@ -176,16 +534,68 @@ async def get_poster(poster_id: str):
             raise HTTPException(status_code=404, detail="Poster not found")
         
         poster['_id'] = str(poster['_id'])
+        await _attach_poster_image(poster, image, http_request, size, format)
         return poster
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_poster: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{poster_id}/image")
+async def get_poster_image(poster_id: str, http_request: Request, size: str = "full", format: Optional[str] = None):
+    """
+    Get the raw poster image with ETag, immutable caching and byte-range support.
+    Without a format, the best image type named in Accept is served (else the
+    poster's own format), with Vary: Accept.
+    Smaller sizes and other formats are rendered on first request and then kept.
+    """
+    try:
+        _check_image_options(size=size, image_format=format)
+        # The response only depends on Accept when no format was asked for
+        vary = {} if format else {"Vary": "Accept"}
+        format = format or negotiate_format(http_request.headers.get("accept"))
+        db = get_database()
+        poster = await db.generated_posters.find_one(
+            {"id": poster_id},
+            {"_id": 0, "id": 1, "image_ref": 1, "image_format": 1, "poster_image": 1, "renditions": 1}
+        )
+        
+        if not poster:
+            raise HTTPException(status_code=404, detail="Poster not found")
+        
+        # Answer revalidation of stored images without touching the blob store
+        image_format = format or poster.get("image_format") or "png"
+        if size == "full" and image_format == (poster.get("image_format") or "png"):
+            known_ref = poster.get("image_ref")
+        else:
+            known_ref = (poster.get("renditions") or {}).get(rendition_key(size, image_format), {}).get("image_ref")
+        if known_ref and etag_matches(http_request.headers.get("if-none-match"), f'"{known_ref}"'):
+            return image_response(http_request, b"", f"image/{image_format}", f'"{known_ref}"', vary)
+        
+        rendition = await rendition_service.get_image(poster, size, format)
+        if rendition is None:
+            raise HTTPException(status_code=404, detail="Poster image not found")
+        
+        image_bytes, image_format, image_ref = rendition
+        # Legacy inline images have no stored hash yet
+        etag = f'"{image_ref or content_hash(image_bytes)}"'
+        
+        return image_response(http_request, image_bytes, f"image/{image_format}", etag, vary)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in get_poster_image: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{poster_id}")
 async def delete_poster(poster_id: str):
     """
-    Delete a poster by ID
+    Delete a poster by ID.
+    Its image blobs may be shared with other posters and cached renders, so
+    they stay in the blob store until scripts/gc_blobs.py finds them unreferenced.
     """
     try:
         db = get_database()
@@ -0,0 +1,76 @@
+import os
+import hmac
+from contextlib import nullcontext
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
+
+from services.profiler import sampling_profiler, call_profiler, ProfilerBusyError
+
+router = APIRouter(prefix="/admin/profile", tags=["admin"])
+
+# Profiling is only reachable with this token in X-Admin-Token; unset disables it
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+# Set on /poster/generate or /poster/enhance-prompt (with the admin token) to profile that call
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+def check_admin(http_request: Request):
+    """Reject requests without the configured ADMIN_TOKEN"""
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+
+    supplied = http_request.headers.get(ADMIN_TOKEN_HEADER, "")
+    if not hmac.compare_digest(supplied.encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def maybe_profile(http_request: Request, http_response: Response, target: str):
+    """
+    Context manager for a route's service call: a deterministic profile when the
+    request carries X-Profile and a valid admin token, otherwise a no-op. The
+    profile id is returned in X-Profile-Id; fetch the report from
+    GET /admin/profile/calls/{id}.
+    """
+    if not http_request.headers.get(PROFILE_HEADER):
+        return nullcontext()
+
+    check_admin(http_request)
+    if call_profiler.busy:
+        raise HTTPException(status_code=409, detail="Another call is already being profiled")
+
+    profile_id = call_profiler.new_id()
+    http_response.headers[PROFILE_ID_HEADER] = profile_id
+    return call_profiler.profile(target, profile_id)
+
+
+@router.post("/sample", dependencies=[Depends(check_admin)], response_class=PlainTextResponse)
+async def sample_profile(seconds: float = 10.0, interval_ms: float = 5.0):
+    """
+    Sample every thread's stack for the given time and return collapsed stacks
+    ("frame;frame;frame count" per line) for flamegraph.pl or speedscope.
+    The request is held open while sampling.
+    """
+    try:
+        collapsed, samples = await sampling_profiler.profile(seconds, interval_ms / 1000)
+        return PlainTextResponse(collapsed, headers={"X-Profile-Samples": str(samples)})
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/calls", dependencies=[Depends(check_admin)])
+async def list_call_profiles():
+    """Recent deterministic call profiles, newest first"""
+    return {"profiles": call_profiler.recent()}
+
+@router.get("/calls/{profile_id}", dependencies=[Depends(check_admin)], response_class=PlainTextResponse)
+async def get_call_profile(profile_id: str):
+    """A call profile as text: one pstats listing per section (event loop, render worker)"""
+    profile = call_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    header = f"# {profile['target']} {profile['id']} {profile['duration_seconds']}s\n"
+    body = "".join(f"\n## {name}\n{report}" for name, report in profile["sections"].items())
+    return PlainTextResponse(header + body)
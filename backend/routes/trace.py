@@ -0,0 +1,104 @@
+import re
+import json
+import time
+from urllib.parse import parse_qsl
+
+from services.trace_recorder import TraceRecorder, CREATES, TRACED_HEADERS
+
+# JSON request bodies up to this size are reduced to their shape; larger ones only count bytes
+TRACE_MAX_BODY_BYTES = 8 * 1024 * 1024
+# Operational endpoints that would only add noise to a traffic trace
+UNTRACED_PREFIXES = ("/api/metrics", "/api/admin")
+
+# The created id is near the start of the response, so only a prefix is searched
+CREATED_ID_PATTERN = re.compile(rb'"(id|job_id|logo_id)"\s*:\s*"([^"]+)"')
+CREATED_ID_PREFIX_BYTES = 512
+
+
+class TraceMiddleware:
+    """
+    Records the shape of each HTTP request with a TraceRecorder. Only added
+    when TRACE_RECORD_PATH is set, so there is no cost otherwise.
+
+    Bodies are passed through untouched: the request body is copied while it
+    is read (JSON only, for its shape) and the response is only counted,
+    apart from a short prefix of creating responses for the new id.
+    """
+
+    def __init__(self, app, recorder: TraceRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(UNTRACED_PREFIXES) or not self.recorder.sampled():
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        is_json = headers.get(b"content-type", b"").startswith(b"application/json")
+        request_chunks = []
+        request_bytes = 0
+        response_prefix = b""
+        response_bytes = 0
+        status = 500
+
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                request_bytes += len(chunk)
+                if is_json and request_bytes <= TRACE_MAX_BODY_BYTES:
+                    request_chunks.append(chunk)
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status, response_prefix, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                if len(response_prefix) < CREATED_ID_PREFIX_BYTES:
+                    response_prefix += chunk[:CREATED_ID_PREFIX_BYTES - len(response_prefix)]
+                response_bytes += len(chunk)
+            await send(message)
+
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                self._record(scope, headers, route, started, duration, status, request_chunks, request_bytes,
+                             response_prefix, response_bytes)
+
+    def _record(self, scope, headers, route, started, duration, status, request_chunks, request_bytes,
+                response_prefix, response_bytes):
+        try:
+            body = None
+            if request_chunks and request_bytes <= TRACE_MAX_BODY_BYTES:
+                body = json.loads(b"".join(request_chunks))
+
+            created = None
+            if route in CREATES and 200 <= status < 300:
+                match = CREATED_ID_PATTERN.search(response_prefix)
+                if match and match.group(1).decode() == CREATES[route][0]:
+                    created = match.group(2).decode()
+
+            self.recorder.record(
+                started, duration, scope["method"], route, status,
+                path_params=scope.get("path_params") or {},
+                query=dict(parse_qsl(scope.get("query_string", b"").decode())),
+                request_bytes=request_bytes,
+                response_bytes=response_bytes,
+                body=body,
+                created=created,
+                headers={
+                    name: headers[name.encode()].decode("latin-1")
+                    for name in TRACED_HEADERS if name.encode() in headers
+                }
+            )
+        except Exception as e:
+            print(f"Error recording request trace: {str(e)}")
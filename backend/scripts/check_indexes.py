@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Create the application's indexes and verify that every known query shape
+uses one. Exits non-zero when a query shape still needs a collection scan
+or an in-memory sort, so it can gate CI against a real Mongo.
+
+Usage: python scripts/check_indexes.py [--check-only]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from database import get_database
+from services.indexes import ensure_indexes, find_unindexed_queries
+
+
+async def run(check_only: bool) -> int:
+    db = get_database()
+
+    if not check_only:
+        created = await ensure_indexes(db)
+        print(f"✅ Indexes in place: {', '.join(created)}")
+
+    problems = await find_unindexed_queries(db)
+    for problem in problems:
+        print(f"❌ {problem['collection']} {problem['filter']} sort={problem['sort']}: {', '.join(problem['stages'])}")
+
+    if not problems:
+        print("✅ Every query shape is served by an index")
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check-only', action='store_true', help='only explain queries, do not create indexes')
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.check_only)))
+
+
+if __name__ == "__main__":
+    main()
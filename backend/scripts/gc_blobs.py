@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Delete blobs that nothing refers to any more.
+
+Blobs are content addressed and shared: one image can back several posters,
+cached renders and logos, so deleting a poster leaves its blobs in place.
+This command collects every image_ref in generated_posters (including
+renditions), the render cache and generation job results, plus every logo
+id, and deletes the blobs in the configured store (BLOB_STORE=local|gridfs)
+that none of them name.
+
+Only blobs stored more than --grace-hours ago are deleted, so an image that
+was just written and whose poster document is not saved yet is kept. Storing
+an existing blob again resets its age.
+
+Usage: python scripts/gc_blobs.py [--grace-hours 24] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from database import get_database
+from services.blob_store import get_blob_store
+from services.logo_store import LOGOS_COLLECTION
+from services.render_cache import RENDER_CACHE_COLLECTION
+
+# Collections whose documents may hold image_ref fields at any depth
+REFERENCING_COLLECTIONS = ("generated_posters", RENDER_CACHE_COLLECTION, "generation_jobs")
+
+
+def collect_refs(value, refs: set):
+    """Add every image_ref found in a document to refs"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == "image_ref" and isinstance(item, str):
+                refs.add(item)
+            else:
+                collect_refs(item, refs)
+    elif isinstance(value, list):
+        for item in value:
+            collect_refs(item, refs)
+
+
+async def referenced_blobs(db) -> set:
+    refs = set()
+    for collection in REFERENCING_COLLECTIONS:
+        async for document in db[collection].find({}, {"_id": 0}):
+            collect_refs(document, refs)
+    # A logo's id is the key of its blob
+    async for logo in db[LOGOS_COLLECTION].find({}, {"_id": 0, "id": 1}):
+        refs.add(logo["id"])
+    return refs
+
+
+async def gc(grace_hours: float, dry_run: bool) -> dict:
+    db = get_database()
+    blob_store = get_blob_store()
+    cutoff = datetime.utcnow() - timedelta(hours=grace_hours)
+    counts = {"referenced": 0, "checked": 0, "deleted": 0, "failed": 0}
+
+    # Candidates are listed before references are collected, so a blob stored
+    # and referenced in between is never a candidate
+    candidates = [key async for key in blob_store.keys(older_than=cutoff)]
+    refs = await referenced_blobs(db)
+    counts["referenced"] = len(refs)
+
+    for key in candidates:
+        counts["checked"] += 1
+        if key in refs:
+            continue
+        try:
+            if not dry_run:
+                # Re-checks the age: the blob may have been stored again meanwhile
+                await blob_store.delete(key, older_than=cutoff)
+            counts["deleted"] += 1
+        except Exception as e:
+            print(f"❌ Blob {key}: {str(e)}")
+            counts["failed"] += 1
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grace-hours', type=float, default=24.0, help='keep blobs stored more recently than this')
+    parser.add_argument('--dry-run', action='store_true', help='report what would be deleted without deleting')
+    args = parser.parse_args()
+
+    counts = asyncio.run(gc(args.grace_hours, args.dry_run))
+    print(f"✅ Done: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Move inline poster images out of generated_posters documents into the blob store.
+
+Each document with a base64 data URI in poster_image gets its bytes written to
+the configured blob store (BLOB_STORE=local|gridfs) and is updated to hold only
+image_ref, image_size and image_format. Documents are processed in _id order in
+batches, so the command can be stopped and re-run safely.
+
+Usage: python scripts/migrate_inline_images.py [--batch-size 100] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from pymongo import UpdateOne
+
+from database import get_database
+from services.blob_store import get_blob_store
+from services.image_codec import from_data_uri
+
+INLINE_IMAGE_QUERY = {"poster_image": {"$type": "string"}, "image_ref": None}
+
+
+async def migrate(batch_size: int, dry_run: bool) -> dict:
+    db = get_database()
+    blob_store = get_blob_store()
+    counts = {"migrated": 0, "failed": 0, "bytes_moved": 0}
+    last_id = None
+
+    while True:
+        query = dict(INLINE_IMAGE_QUERY)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+
+        batch = await db.generated_posters.find(
+            query, {"_id": 1, "id": 1, "poster_image": 1}
+        ).sort("_id", 1).limit(batch_size).to_list(batch_size)
+
+        if not batch:
+            break
+
+        updates = []
+        for poster in batch:
+            try:
+                image_bytes, image_format = from_data_uri(poster["poster_image"])
+                image_ref = await blob_store.put(image_bytes) if not dry_run else None
+            except Exception as e:
+                print(f"❌ Poster {poster.get('id')}: {str(e)}")
+                counts["failed"] += 1
+                continue
+
+            updates.append(UpdateOne(
+                {"_id": poster["_id"]},
+                {
+                    "$set": {
+                        "image_ref": image_ref,
+                        "image_size": len(image_bytes),
+                        "image_format": image_format
+                    },
+                    "$unset": {"poster_image": ""}
+                }
+            ))
+            counts["migrated"] += 1
+            counts["bytes_moved"] += len(poster["poster_image"])
+
+        if updates and not dry_run:
+            await db.generated_posters.bulk_write(updates, ordered=False)
+
+        last_id = batch[-1]["_id"]
+        print(f"🔄 Processed batch ending at {last_id}: {counts}")
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--dry-run', action='store_true', help='report what would move without writing')
+    args = parser.parse_args()
+
+    counts = asyncio.run(migrate(args.batch_size, args.dry_run))
+    print(f"✅ Done: {counts}")
+
+
+if __name__ == "__main__":
+    main()
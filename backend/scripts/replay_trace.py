@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Replay a request trace recorded with TRACE_RECORD_PATH against a backend.
+
+Requests are sent at their recorded offsets divided by --speed (1 = real
+time, 10 = ten times faster, 0 = as fast as --concurrency allows). Content
+is synthesized from the recorded shapes: strings of the recorded length
+(identical strings in the trace replay as identical text), inline and
+uploaded logos as images of about the recorded size.
+
+Ids are mapped as the replay goes: a session token becomes a replay session
+id, and posters, jobs and logos created by the replay stand in for the ones
+the trace refers to. A request for an id the replay never created (made
+before recording started, or whose creating request failed) is skipped and
+counted as unresolved. Pagination cursors are not replayed; those requests
+fetch the first page. Requests on the same poster, job, logo or session
+keep their recorded order even when the backend is slower than recorded.
+
+Recorded Range, Accept and Accept-Encoding headers are sent again as they
+were. A recorded If-None-Match is sent with the ETag the replay last got
+for the same path and query (so revalidations can still be answered with 304), or
+with a validator that matches nothing when there is none.
+
+The report compares replayed and recorded latency per route.
+
+Usage:
+  python scripts/replay_trace.py trace.jsonl [--url http://localhost:8001] [--speed 1] [--output replay.json]
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import httpx
+import numpy as np
+from PIL import Image
+
+from services.trace_recorder import CREATES
+
+WORDS = (
+    "poster bold vintage modern elegant festival jazz night gold blue typography gradient "
+    "music concert market river summer charity run community design vibrant minimalist"
+).split()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def load_trace(path: Path):
+    """Request lines sorted by time; header lines written at recorder start are skipped"""
+    lines = []
+    with open(path) as trace:
+        for raw in trace:
+            if raw.strip():
+                line = json.loads(raw)
+                if "trace" not in line:
+                    lines.append(line)
+    return sorted(lines, key=lambda line: line["ts"])
+
+
+def filler_text(length: int, digest: str = "") -> str:
+    """Text of the given length; the same digest always gives the same text"""
+    rng = random.Random(f"{digest}:{length}")
+    text = ""
+    while len(text) < length:
+        text += rng.choice(WORDS) + " "
+    return text[:length]
+
+
+def synthetic_png(approx_bytes: int) -> bytes:
+    """A noise PNG (barely compressible) of roughly the requested size"""
+    side = max(8, int((max(approx_bytes, 256) / 4) ** 0.5))
+    pixels = np.random.default_rng(side).integers(0, 256, size=(side, side, 4), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "RGBA").save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def chain_key(line):
+    """
+    Requests on one resource (the first id in the path, else the session in
+    the body) were sequential when recorded and are replayed in order
+    """
+    for shape in (line.get("path") or {}).values():
+        if isinstance(shape, dict) and "$id" in shape:
+            return shape["$id"]
+    body = line.get("body")
+    session = body.get("session_id") if isinstance(body, dict) else None
+    if isinstance(session, dict) and "$id" in session:
+        return session["$id"]
+    return None
+
+
+class UnresolvedIdError(Exception):
+    """Raised when a request refers to an id the replay did not create"""
+
+
+class Replayer:
+    def __init__(self, client: httpx.AsyncClient, speed: float, concurrency: int, dependency_timeout: float):
+        self.client = client
+        self.speed = speed
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.dependency_timeout = dependency_timeout
+        self.ids = {}
+        self.id_events = defaultdict(asyncio.Event)
+        self.creating = set()
+        self.png_cache = {}
+        self.etags = {}
+        self.latencies = defaultdict(list)
+        self.recorded_latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.status_mismatches = Counter()
+        self.unresolved = Counter()
+        self.lag = []
+        self._chain_tails = {}
+
+    async def resolve(self, token: str) -> str:
+        kind, _, value = token.partition(":")
+        if kind == "session_id":
+            return f"replay-{value}"
+        if token not in self.ids:
+            if token not in self.creating:
+                raise UnresolvedIdError(token)
+            # Created by an earlier request that is still running
+            try:
+                await asyncio.wait_for(self.id_events[token].wait(), self.dependency_timeout)
+            except asyncio.TimeoutError:
+                raise UnresolvedIdError(token)
+            if token not in self.ids:
+                raise UnresolvedIdError(token)
+        return self.ids[token]
+
+    def png(self, approx_bytes: int) -> bytes:
+        # Sizes are bucketed to 4 KB so repeated logos reuse one image
+        bucket = approx_bytes // 4096
+        if bucket not in self.png_cache:
+            self.png_cache[bucket] = synthetic_png(bucket * 4096)
+        return self.png_cache[bucket]
+
+    async def build(self, value, key=None):
+        """Turn a recorded shape back into a JSON value"""
+        if isinstance(value, list):
+            return [await self.build(item, key) for item in value]
+        if isinstance(value, dict):
+            if "$id" in value:
+                return await self.resolve(value["$id"])
+            if "$str" in value:
+                if key == "base64":
+                    # Inline logo: base64 is 4/3 of the image size
+                    return base64.b64encode(self.png(value["$str"] * 3 // 4)).decode()
+                return filler_text(value["$str"], value.get("$h", ""))
+            built = {}
+            for k, v in value.items():
+                if isinstance(v, dict) and "$cursor" in v:
+                    continue
+                built[k] = await self.build(v, k)
+            return built
+        return value
+
+    def headers(self, line, resource) -> dict:
+        """The recorded request headers, with a replayable If-None-Match"""
+        headers = {}
+        for name, shape in (line.get("headers") or {}).items():
+            if name == "if-none-match":
+                headers[name] = self.etags.get(resource, '"replay-no-etag"')
+            else:
+                headers[name] = shape
+        return headers
+
+    async def send(self, line):
+        route = line["route"]
+        path = route
+        for name, shape in (line.get("path") or {}).items():
+            path = path.replace("{" + name + "}", str(await self.build(shape, name)))
+        query = await self.build(line.get("query") or {})
+        # ETags differ per rendition, so the query is part of the resource
+        resource = (path, tuple(sorted(query.items())))
+        headers = self.headers(line, resource)
+
+        if line["method"] == "POST" and route == "/api/logos":
+            files = {"file": ("logo.png", self.png(line["request_bytes"]), "image/png")}
+            response = await self.client.post(path, params=query, files=files, headers=headers)
+        elif "body" in line:
+            body = await self.build(line["body"])
+            response = await self.client.request(line["method"], path, params=query, json=body, headers=headers)
+        else:
+            response = await self.client.request(line["method"], path, params=query, headers=headers)
+
+        if line["method"] == "GET" and "etag" in response.headers:
+            self.etags[resource] = response.headers["etag"]
+        return response
+
+    def record_created(self, line, response):
+        token = line["created"]["$id"]
+        try:
+            if response is not None and response.is_success:
+                field = CREATES[line["route"]][0]
+                self.ids[token] = response.json()[field]
+        except (ValueError, KeyError):
+            pass
+        self.id_events[token].set()
+
+    async def replay_line(self, line, due: float, previous=None):
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if previous is not None:
+            # Keep the recorded order within a chain, e.g. fetch before delete of one poster
+            await asyncio.wait([previous])
+
+        route = f"{line['method']} {line['route']}"
+        async with self.semaphore:
+            self.lag.append(max(0.0, time.perf_counter() - due) * 1000)
+            started = time.perf_counter()
+            response = None
+            try:
+                response = await self.send(line)
+                status = str(response.status_code)
+            except UnresolvedIdError:
+                self.unresolved[route] += 1
+                return
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            finally:
+                if "created" in line:
+                    self.record_created(line, response)
+
+            self.latencies[route].append((time.perf_counter() - started) * 1000)
+            self.recorded_latencies[route].append(line["duration_ms"])
+            self.statuses[route][status] += 1
+            if status != str(line["status"]):
+                self.status_mismatches[route] += 1
+
+    async def run(self, lines):
+        for line in lines:
+            if "created" in line:
+                self.creating.add(line["created"]["$id"])
+
+        first = lines[0]["ts"] if lines else 0.0
+        start = time.perf_counter()
+        tasks = []
+        for line in lines:
+            offset = (line["ts"] - first) / self.speed if self.speed > 0 else 0.0
+            key = chain_key(line)
+            task = asyncio.create_task(self.replay_line(line, start + offset, self._chain_tails.get(key)))
+            if key is not None:
+                self._chain_tails[key] = task
+            tasks.append(task)
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float, lines) -> dict:
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.unresolved)):
+            latencies = self.latencies.get(route, [])
+            recorded = self.recorded_latencies.get(route, [])
+            routes[route] = {
+                "requests": len(latencies),
+                "unresolved": self.unresolved.get(route, 0),
+                "status_codes": dict(self.statuses.get(route, {})),
+                "status_mismatches": self.status_mismatches.get(route, 0),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "recorded_p50_ms": round(percentile(recorded, 50), 2),
+                "recorded_p95_ms": round(percentile(recorded, 95), 2),
+                "recorded_p99_ms": round(percentile(recorded, 99), 2),
+            }
+
+        sent = sum(len(latencies) for latencies in self.latencies.values())
+        span = lines[-1]["ts"] - lines[0]["ts"] if lines else 0.0
+        return {
+            "trace_requests": len(lines),
+            "trace_span_s": round(span, 3),
+            "speed": self.speed,
+            "elapsed_s": round(elapsed, 3),
+            "sent": sent,
+            "unresolved": sum(self.unresolved.values()),
+            "throughput_rps": round(sent / elapsed, 2) if elapsed else 0.0,
+            # How far behind schedule requests went out: high values mean the client or backend could not keep up
+            "schedule_lag_p95_ms": round(percentile(self.lag, 95), 2),
+            "routes": routes,
+        }
+
+
+def print_report(report: dict):
+    print(
+        f"Replayed {report['sent']} of {report['trace_requests']} requests in {report['elapsed_s']}s "
+        f"(trace span {report['trace_span_s']}s at {report['speed']:g}x, {report['unresolved']} unresolved, "
+        f"schedule lag p95 {report['schedule_lag_p95_ms']} ms)"
+    )
+    print(f"{'route':<40} {'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rec p50':>9} {'rec p95':>9} {'status≠':>8}")
+    for route, stats in report["routes"].items():
+        print(
+            f"{route:<40} {stats['requests']:>8} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9} "
+            f"{stats['recorded_p50_ms']:>9} {stats['recorded_p95_ms']:>9} {stats['status_mismatches']:>8}"
+        )
+
+
+async def run(args) -> dict:
+    lines = load_trace(args.trace)
+    if args.limit:
+        lines = lines[:args.limit]
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url.rstrip("/"), limits=limits, timeout=args.timeout) as client:
+        replayer = Replayer(client, args.speed, args.concurrency, args.dependency_timeout)
+        elapsed = await replayer.run(lines)
+    return replayer.report(elapsed, lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('trace', type=Path)
+    parser.add_argument('--url', default="http://localhost:8001")
+    parser.add_argument('--speed', type=float, default=1.0, help="time compression factor; 0 sends as fast as possible")
+    parser.add_argument('--concurrency', type=int, default=64, help="maximum requests in flight")
+    parser.add_argument('--limit', type=int, default=0, help="replay only the first N requests")
+    parser.add_argument('--timeout', type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument('--dependency-timeout', type=float, default=60.0,
+                        help="how long a request waits for the request creating the id it uses")
+    parser.add_argument('--output', type=Path, default=None, help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -11,14 +11,26 @@ import uuid
 from datetime import datetime
 
 # Import our routes
-from routes.poster_routes import router as poster_router
+from routes.poster_routes import router as poster_router, gemini_service
+from services.poster_pipeline import poster_pipeline
+from routes.job_routes import router as job_router, generation_queue
+from routes.logo_routes import router as logo_router
+from routes.metrics import router as metrics_router, MetricsMiddleware
+from routes.profile_routes import router as profile_router, check_admin
+from routes.trace import TraceMiddleware
+from services.trace_recorder import TraceRecorder
+from services.render_executor import render_executor
+from services.font_registry import font_registry
+from services.indexes import ensure_indexes
+from services.admission import admission_gates
+from services.metrics import mongo_command_listener
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_command_listener])
 db = client[os.environ.get('DB_NAME', 'kala_ai')]
 
 # Create the main app without a prefix
@@ -41,6 +53,19 @@ class StatusCheckCreate(BaseModel):
 async def root():
     return {"message": "Kala.ai API is running!"}
 
+@api_router.get("/health/ready")
+async def readiness():
+    fonts = font_registry.status()
+    return {
+        "ready": fonts["ready"],
+        "fonts": fonts,
+        "render_executor": render_executor.stats()
+    }
+
+@api_router.get("/admission/stats", dependencies=[Depends(check_admin)])
+async def admission_stats():
+    return {name: gate.stats() for name, gate in admission_gates.items()}
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
@@ -55,6 +80,10 @@ async def get_status_checks():
 
 # Include the poster routes in the api router
 api_router.include_router(poster_router)
+api_router.include_router(job_router)
+api_router.include_router(logo_router)
+api_router.include_router(metrics_router)
+api_router.include_router(profile_router)
 
 # Include the main api router
 app.include_router(api_router)
@@ -67,6 +96,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request shape recording for replay (TRACE_RECORD_PATH)
+trace_recorder = TraceRecorder.from_env()
+if trace_recorder is not None:
+    app.add_middleware(TraceMiddleware, recorder=trace_recorder)
+
+# Outermost, so the timing covers CORS handling and the full response body
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -74,6 +111,51 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def load_fonts():
+    font_registry.warm()
+
+@app.on_event("startup")
+async def create_indexes():
+    try:
+        await ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Could not ensure MongoDB indexes: {str(e)}")
+
+@app.on_event("startup")
+async def purge_stale_renders():
+    try:
+        removed = await poster_pipeline.render_cache.purge_stale()
+        if removed:
+            logger.info(f"Purged {removed} cached renders from older renderer versions")
+    except Exception as e:
+        logger.error(f"Could not purge the render cache: {str(e)}")
+
+@app.on_event("startup")
+async def start_generation_queue():
+    try:
+        await generation_queue.start()
+    except Exception as e:
+        logger.error(f"Could not start the generation job queue: {str(e)}")
+
+# Registered before the database client closes so interrupted jobs can be requeued
+@app.on_event("shutdown")
+async def stop_generation_queue():
+    await generation_queue.stop()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+@app.on_event("shutdown")
+async def shutdown_render_executor():
+    render_executor.shutdown()
+
+@app.on_event("shutdown")
+async def shutdown_llm_client():
+    await gemini_service.client_pool.aclose()
+
+@app.on_event("shutdown")
+async def close_trace_recorder():
+    if trace_recorder is not None:
+        trace_recorder.close()
\ No newline at end of file
@@ -0,0 +1,127 @@
+import os
+import math
+import time
+import asyncio
+from typing import Any, Dict
+
+from services.metrics import registry
+
+ADMISSION_WAIT_SECONDS = registry.histogram(
+    "kala_admission_wait_seconds",
+    "Time admitted requests waited for a slot, by gate",
+    ("gate",)
+)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a gate is saturated; retry_after is a hint in whole seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded wait queue for one expensive endpoint.
+
+    Up to max_concurrency requests run at once. Up to max_queue more wait for
+    a slot, each for at most max_wait_seconds. Anything beyond that is rejected
+    at once so overload turns into fast 429s instead of unbounded in-flight
+    work. Retry-After is estimated from the recent time requests hold a slot.
+    """
+
+    # Weight of the newest sample in the moving average of hold times
+    HOLD_TIME_SMOOTHING = 0.2
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, max_wait_seconds: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._active = 0
+        self._waiting = 0
+        self._hold_time = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @classmethod
+    def from_env(cls, name: str, max_concurrency: int, max_queue: int, max_wait_seconds: float) -> "AdmissionGate":
+        """Defaults overridable with ADMISSION_<NAME>_CONCURRENCY, _QUEUE and _WAIT_SECONDS"""
+        prefix = f"ADMISSION_{name.upper()}"
+        return cls(
+            name,
+            int(os.environ.get(f"{prefix}_CONCURRENCY", max_concurrency)),
+            int(os.environ.get(f"{prefix}_QUEUE", max_queue)),
+            float(os.environ.get(f"{prefix}_WAIT_SECONDS", max_wait_seconds))
+        )
+
+    def retry_after(self) -> int:
+        # Roughly how long until the current queue drains
+        estimate = self._hold_time * (self._waiting / self.max_concurrency + 1)
+        return max(1, math.ceil(estimate))
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the acquire time to pass to release()"""
+        # Counted by the gate itself: the semaphore only looks taken once a waiter has run
+        if self._active + self._waiting >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejectedError(
+                f"{self.name} is at capacity ({self._active} running, {self._waiting} waiting)",
+                self.retry_after()
+            )
+
+        start = time.monotonic()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise AdmissionRejectedError(
+                f"{self.name} did not free a slot within {self.max_wait_seconds:g}s",
+                self.retry_after()
+            )
+        finally:
+            self._waiting -= 1
+
+        acquired = time.monotonic()
+        waited = acquired - start
+        ADMISSION_WAIT_SECONDS.observe(waited, gate=self.name)
+        self.admitted += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self._active += 1
+        return acquired
+
+    def release(self, acquired: float):
+        held = time.monotonic() - acquired
+        self._hold_time += self.HOLD_TIME_SMOOTHING * (held - self._hold_time)
+        self._active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait_seconds,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_seconds_avg": round(self.wait_seconds_total / self.admitted, 4) if self.admitted else 0.0,
+            "wait_seconds_max": round(self.wait_seconds_max, 4),
+            "hold_seconds_avg": round(self._hold_time, 4)
+        }
+
+
+# One gate per expensive endpoint
+admission_gates: Dict[str, AdmissionGate] = {
+    "generate": AdmissionGate.from_env("generate", max_concurrency=8, max_queue=16, max_wait_seconds=10),
+    "enhance_prompt": AdmissionGate.from_env("enhance_prompt", max_concurrency=16, max_queue=64, max_wait_seconds=15),
+    "enhance_batch": AdmissionGate.from_env("enhance_batch", max_concurrency=2, max_queue=4, max_wait_seconds=30),
+}
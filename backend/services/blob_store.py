@@ -0,0 +1,183 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+from database import get_database
+
+
+def content_hash(data: bytes) -> str:
+    """Content address of a blob"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _timestamp(when: datetime) -> float:
+    """POSIX timestamp of a naive UTC datetime"""
+    return (when - datetime(1970, 1, 1)).total_seconds()
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed storage for rendered images.
+    Blobs are keyed by the SHA-256 of their bytes, so storing the same image
+    twice keeps a single copy. A blob can back several posters, cached renders
+    and logos, so deleting a poster leaves its blobs in place; unreferenced
+    blobs are removed by scripts/gc_blobs.py.
+    """
+
+    @abstractmethod
+    async def put(self, data: bytes) -> str:
+        """Store data, returning its key"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """The blob's bytes, or None if it is not stored"""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Whether a blob is stored under key"""
+
+    @abstractmethod
+    async def delete(self, key: str, older_than: Optional[datetime] = None):
+        """Remove a blob (only if stored before older_than, when given); missing keys are ignored"""
+
+    @abstractmethod
+    def keys(self, older_than: datetime) -> AsyncIterator[str]:
+        """
+        Keys of blobs stored before older_than (UTC). Putting a blob that is
+        already stored counts as storing it again.
+        """
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under root, sharded by the first two bytes of the hash"""
+
+    def __init__(self, root: str = None):
+        self.root = Path(root or os.environ.get('BLOB_STORE_PATH', Path(__file__).parent.parent / 'blobs'))
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        if path.exists():
+            # Refresh the mtime so gc_blobs.py sees the blob as recently stored
+            path.touch()
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    async def put(self, data: bytes) -> str:
+        key = content_hash(data)
+        await asyncio.to_thread(self._write, key, data)
+        return key
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).exists)
+
+    def _delete(self, key: str, older_than: Optional[datetime]):
+        path = self._path(key)
+        try:
+            if older_than is None or path.stat().st_mtime < _timestamp(older_than):
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+    async def delete(self, key: str, older_than: Optional[datetime] = None):
+        await asyncio.to_thread(self._delete, key, older_than)
+
+    def _list(self, older_than: datetime) -> List[str]:
+        cutoff = _timestamp(older_than)
+        keys = []
+        for path in self.root.glob('*/*/*'):
+            # Skip temp files of writes in progress
+            if not path.name.startswith('.tmp-') and path.stat().st_mtime < cutoff:
+                keys.append(path.name)
+        return keys
+
+    async def keys(self, older_than: datetime) -> AsyncIterator[str]:
+        for key in await asyncio.to_thread(self._list, older_than):
+            yield key
+
+
+class GridFSBlobStore(BlobStore):
+    """Blobs in a GridFS bucket, using the content hash as the file name"""
+
+    def __init__(self, db=None, bucket_name: str = None):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+        self.db = db if db is not None else get_database()
+        self.bucket_name = bucket_name or os.environ.get('BLOB_STORE_BUCKET', 'poster_blobs')
+        self.bucket = AsyncIOMotorGridFSBucket(self.db, bucket_name=self.bucket_name)
+        self.files = self.db[f"{self.bucket_name}.files"]
+
+    async def put(self, data: bytes) -> str:
+        key = content_hash(data)
+        if await self.exists(key):
+            # Mark the blob as recently stored for gc_blobs.py
+            await self.files.update_many({"filename": key}, {"$set": {"uploadDate": datetime.utcnow()}})
+        else:
+            await self.bucket.upload_from_stream(key, data)
+        return key
+
+    async def get(self, key: str) -> Optional[bytes]:
+        from gridfs.errors import NoFile
+
+        try:
+            stream = await self.bucket.open_download_stream_by_name(key)
+        except NoFile:
+            return None
+        return await stream.read()
+
+    async def exists(self, key: str) -> bool:
+        return await self.files.find_one({"filename": key}, {"_id": 1}) is not None
+
+    async def delete(self, key: str, older_than: Optional[datetime] = None):
+        query = {"filename": key}
+        if older_than is not None:
+            query["uploadDate"] = {"$lt": older_than}
+        async for file in self.files.find(query, {"_id": 1}):
+            await self.bucket.delete(file["_id"])
+
+    async def keys(self, older_than: datetime) -> AsyncIterator[str]:
+        async for file in self.files.find({"uploadDate": {"$lt": older_than}}, {"_id": 0, "filename": 1}):
+            yield file["filename"]
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Blob store selected by BLOB_STORE (local or gridfs)"""
+    global _blob_store
+    if _blob_store is None:
+        backend = os.environ.get('BLOB_STORE', 'local').lower()
+        if backend == 'gridfs':
+            _blob_store = GridFSBlobStore()
+        elif backend == 'local':
+            _blob_store = LocalBlobStore()
+        else:
+            raise ValueError(f"Unknown blob store backend: {backend}")
+    return _blob_store
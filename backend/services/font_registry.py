@@ -0,0 +1,127 @@
+import os
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import ImageFont
+
+FONT_DIR = os.environ.get('FONT_DIR', '/usr/share/fonts/truetype/dejavu')
+
+# Family -> weight -> font file (relative to FONT_DIR unless absolute)
+DEFAULT_FONT_FAMILIES = {
+    "sans": {"regular": "DejaVuSans.ttf", "bold": "DejaVuSans-Bold.ttf"},
+    "serif": {"regular": "DejaVuSerif.ttf", "bold": "DejaVuSerif-Bold.ttf"},
+    "mono": {"regular": "DejaVuSansMono.ttf", "bold": "DejaVuSansMono-Bold.ttf"},
+}
+
+
+def _families_from_env() -> Dict[str, Dict[str, str]]:
+    """
+    DEFAULT_FONT_FAMILIES with FONT_FAMILIES (JSON, same shape) merged over it,
+    e.g. FONT_FAMILIES='{"serif": {"bold": "/opt/fonts/Lora-Bold.ttf"}}'
+    """
+    families = {family: dict(weights) for family, weights in DEFAULT_FONT_FAMILIES.items()}
+    raw = os.environ.get('FONT_FAMILIES')
+    if not raw:
+        return families
+    try:
+        overrides = json.loads(raw)
+        for family, weights in overrides.items():
+            families.setdefault(family, {}).update({weight: str(path) for weight, path in weights.items()})
+    except (ValueError, AttributeError) as e:
+        print(f"Error parsing FONT_FAMILIES, using the default fonts: {str(e)}")
+    return families
+
+
+FONT_FAMILIES = _families_from_env()
+
+# Sizes the poster layout uses; loaded up front by warm()
+PRELOAD_SIZES = tuple(int(size) for size in os.environ.get('FONT_PRELOAD_SIZES', '20,40').split(',') if size.strip())
+
+DEFAULT_FAMILY = os.environ.get('FONT_DEFAULT_FAMILY', 'sans')
+
+
+class FontRegistry:
+    """
+    Loads every configured font face once and hands out the shared instances.
+
+    A face that cannot be loaded falls back to the default family and then to
+    Pillow's built-in font; either way it is reported by status() instead of
+    being swallowed silently.
+    """
+
+    def __init__(self, font_dir: str = None, families: Dict[str, Dict[str, str]] = None, sizes: Tuple[int, ...] = None):
+        self.font_dir = font_dir or FONT_DIR
+        self.families = families or FONT_FAMILIES
+        self.sizes = sizes or PRELOAD_SIZES
+        self._fonts: Dict[Tuple[str, str, int], Any] = {}
+        self._missing: Dict[str, str] = {}
+        # Reentrant: a face that fails to load falls back through get() for the default family
+        self._lock = threading.RLock()
+
+    def _path(self, family: str, weight: str) -> Optional[str]:
+        filename = self.families.get(family, {}).get(weight)
+        if filename is None:
+            return None
+        return filename if os.path.isabs(filename) else os.path.join(self.font_dir, filename)
+
+    def _load(self, family: str, weight: str, size: int):
+        path = self._path(family, weight)
+        if path is not None:
+            try:
+                return ImageFont.truetype(path, size)
+            except OSError as e:
+                if path not in self._missing:
+                    print(f"Font {family}/{weight} could not be loaded from {path}: {str(e)}")
+                self._missing[path] = str(e)
+
+        if family != DEFAULT_FAMILY:
+            return self.get(DEFAULT_FAMILY, weight, size)
+
+        return ImageFont.load_default()
+
+    def get(self, family: str = DEFAULT_FAMILY, weight: str = "regular", size: int = 20):
+        """Return the shared font for (family, weight, size), loading it on first use"""
+        key = (family, weight, size)
+        font = self._fonts.get(key)
+        if font is None:
+            with self._lock:
+                font = self._fonts.get(key)
+                if font is None:
+                    font = self._load(family, weight, size)
+                    self._fonts[key] = font
+        return font
+
+    def warm(self):
+        """Load every configured family, weight and preload size"""
+        for family, weights in self.families.items():
+            for weight in weights:
+                for size in self.sizes:
+                    self.get(family, weight, size)
+
+    def status(self) -> Dict[str, Any]:
+        """Which configured font files resolved, for the readiness endpoint"""
+        fonts = {}
+        for family, weights in self.families.items():
+            for weight in weights:
+                path = self._path(family, weight)
+                fonts[f"{family}/{weight}"] = {
+                    "path": path,
+                    "resolved": os.path.isfile(path) and path not in self._missing,
+                }
+
+        return {
+            "font_dir": self.font_dir,
+            "fonts": fonts,
+            "loaded": len(self._fonts),
+            "ready": all(font["resolved"] for font in fonts.values())
+        }
+
+
+# Shared by every renderer in this process
+font_registry = FontRegistry()
+
+
+def warm_fonts():
+    """Render worker initializer: load fonts before the first job arrives"""
+    font_registry.warm()
@@ -1,24 +1,14 @@
 import os
 import asyncio
-from typing import List, Dict
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+import hashlib
+from typing import AsyncIterator, List, Dict, Sequence, Tuple, Union
+from services.llm_client import LlmClientPool
+from services.response_parser import IncrementalResponseParser, parse_response, extract_keywords_from_text
+from services.prompt_cache import prompt_cache, prompt_cache_key
+from services.single_flight import SingleFlight
+from services.metrics import timed
 
-class GeminiService:
-    def __init__(self):
-        self.api_key = os.environ.get('GEMINI_API_KEY', 'placeholder-key')
-        self.model = "gemini-2.0-flash"
-        self.provider = "gemini"
-        
-    async def enhance_prompt(self, user_prompt: str, session_id: str) -> Dict[str, any]:
-        """
-        Enhance a user's poster description into a detailed, visually-oriented prompt
-        """
-        try:
-            # Create a new chat instance for this request
-            chat = LlmChat(
-                api_key=self.api_key,
-                session_id=session_id,
-                system_message="""You are a professional poster design expert. Your task is to enhance user's brief poster descriptions into detailed, visually-oriented prompts suitable for AI image generation.
+SYSTEM_MESSAGE = """You are a professional poster design expert. Your task is to enhance user's brief poster descriptions into detailed, visually-oriented prompts suitable for AI image generation.
 
 RULES:
 1. Transform brief concepts into rich, detailed descriptions
@@ -34,18 +24,65 @@ User: "jazz concert poster"
 Enhanced: "A vintage-inspired jazz concert poster featuring bold Art Deco typography with gold and deep blue color scheme. Include silhouettes of jazz musicians playing saxophone and trumpet, with musical notes flowing dynamically across the composition. The background should have a subtle textured pattern reminiscent of 1920s aesthetic, with elegant borders and sophisticated layout perfect for a classy jazz venue."
 
 After the enhanced prompt, extract 8-10 key visual keywords separated by commas."""
-            ).with_model(self.provider, self.model).with_max_tokens(300)
-            
-            # Create user message
-            user_message = UserMessage(
-                text=f"Enhance this poster concept: {user_prompt}"
+
+# Part of the enhancement cache key, so editing the system message invalidates cached results
+SYSTEM_MESSAGE_VERSION = hashlib.sha256(SYSTEM_MESSAGE.encode()).hexdigest()[:12]
+
+class GeminiService:
+    def __init__(self):
+        self.api_key = os.environ.get('GEMINI_API_KEY', 'placeholder-key')
+        self.model = "gemini-2.0-flash"
+        self.provider = "gemini"
+        # One long-lived client for every request
+        self.client_pool = LlmClientPool(
+            api_key=self.api_key,
+            provider=self.provider,
+            model=self.model,
+            system_message=SYSTEM_MESSAGE,
+            max_tokens=300
+        )
+        # Identical prompts in flight at the same time share one LLM call
+        self.enhance_flight = SingleFlight("enhance_prompt")
+        # How many prompts of one batch are enhanced at the same time
+        self.batch_concurrency = int(os.environ.get('ENHANCE_BATCH_CONCURRENCY', 8))
+        
+    async def enhance_prompt(self, user_prompt: str, session_id: str, use_cache: bool = True) -> Dict[str, any]:
+        """
+        Enhance a user's poster description into a detailed, visually-oriented prompt.
+        Results are cached by normalized prompt, model and system message version;
+        use_cache=False skips the lookup but still refreshes the cache.
+        """
+        cache_key = prompt_cache_key(user_prompt, self.model, SYSTEM_MESSAGE_VERSION)
+        if use_cache:
+            cached = await prompt_cache.get(cache_key)
+            if cached is not None:
+                return {**cached, "success": True}
+        else:
+            prompt_cache.record_bypass()
+        
+        result = await self.enhance_flight.do(
+            cache_key, lambda: self._enhance_uncached(user_prompt, session_id, cache_key)
+        )
+        # Every caller gets its own copy of the shared result
+        return dict(result)
+    
+    async def _enhance_uncached(self, user_prompt: str, session_id: str, cache_key: str) -> Dict[str, any]:
+        """Call the LLM and store a successful result in the prompt cache"""
+        try:
+            # Get response from Gemini through the shared client
+            response = await self.client_pool.complete(
+                f"Enhance this poster concept: {user_prompt}", session_id
             )
             
-            # Get response from Gemini
-            response = await chat.send_message(user_message)
-            
             # Parse response to extract enhanced prompt and keywords
-            enhanced_prompt, keywords = self._parse_response(response)
+            with timed("parse_response"):
+                enhanced_prompt, keywords = self._parse_response(response)
+            
+            # Only real model output is cached, never the fallback text
+            await prompt_cache.set(cache_key, {
+                "enhanced_prompt": enhanced_prompt,
+                "keywords": keywords
+            })
             
             return {
                 "enhanced_prompt": enhanced_prompt,
@@ -58,61 +95,76 @@ After the enhanced prompt, extract 8-10 key visual keywords separated by commas.
             # Fallback to mock data for now
             return self._fallback_enhancement(user_prompt)
     
-    def _parse_response(self, response: str) -> tuple[str, List[str]]:
-        """Parse Gemini response to extract enhanced prompt and keywords"""
+    async def enhance_prompts(self, items: Sequence[Tuple[str, str]], use_cache: bool = True) -> List[Union[Dict[str, any], Exception]]:
+        """
+        Enhance (user_prompt, session_id) pairs with at most batch_concurrency
+        running at once. Results keep the input order; an item that raised is
+        returned as its exception so one failure does not sink the batch.
+        """
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def enhance_one(user_prompt: str, session_id: str) -> Dict[str, any]:
+            async with semaphore:
+                return await self.enhance_prompt(user_prompt, session_id, use_cache)
+        
+        return await asyncio.gather(
+            *(enhance_one(user_prompt, session_id) for user_prompt, session_id in items),
+            return_exceptions=True
+        )
+    
+    async def enhance_prompt_stream(self, user_prompt: str, session_id: str, use_cache: bool = True) -> AsyncIterator[Dict[str, any]]:
+        """
+        Streaming variant of enhance_prompt. Yields {"type": "token", "text": ...}
+        events while the model writes, then one {"type": "result", ...} event
+        with the parsed prompt and keywords.
+        """
+        cache_key = prompt_cache_key(user_prompt, self.model, SYSTEM_MESSAGE_VERSION)
+        if use_cache:
+            cached = await prompt_cache.get(cache_key)
+            if cached is not None:
+                yield {"type": "token", "text": cached["enhanced_prompt"]}
+                yield {"type": "result", **cached, "success": True}
+                return
+        else:
+            prompt_cache.record_bypass()
+        
+        parser = IncrementalResponseParser(self._parse_response)
+        streamed = False
         try:
-            # Split response into prompt and keywords
-            lines = response.strip().split('\n')
-            
-            # Find the enhanced prompt (usually the main content)
-            enhanced_prompt = ""
-            keywords_line = ""
+            async for chunk in self.client_pool.stream(
+                f"Enhance this poster concept: {user_prompt}", session_id
+            ):
+                text = parser.feed(chunk)
+                if text:
+                    streamed = True
+                    yield {"type": "token", "text": text}
             
-            for line in lines:
-                if line.strip() and not line.lower().startswith('keywords'):
-                    enhanced_prompt += line.strip() + " "
-                elif line.lower().startswith('keywords') or ',' in line:
-                    keywords_line = line
-                    break
-            
-            # Clean up enhanced prompt
-            enhanced_prompt = enhanced_prompt.strip()
-            
-            # Extract keywords
-            keywords = []
-            if keywords_line:
-                # Remove "Keywords:" prefix and split by comma
-                keywords_text = keywords_line.replace("Keywords:", "").replace("keywords:", "").strip()
-                keywords = [k.strip() for k in keywords_text.split(',') if k.strip()]
-            
-            # If no keywords found, extract from the enhanced prompt
-            if not keywords:
-                keywords = self._extract_keywords_from_text(enhanced_prompt)
-            
-            return enhanced_prompt, keywords[:10]  # Limit to 10 keywords
+            enhanced_prompt, keywords = parser.finish()
+            await prompt_cache.set(cache_key, {
+                "enhanced_prompt": enhanced_prompt,
+                "keywords": keywords
+            })
+            result = {"enhanced_prompt": enhanced_prompt, "keywords": keywords, "success": True}
             
         except Exception as e:
-            print(f"Error parsing response: {str(e)}")
-            return response, []
+            print(f"Error streaming prompt enhancement: {str(e)}")
+            if streamed:
+                # Keep what the client has already seen rather than switching texts
+                enhanced_prompt, keywords = parser.finish()
+                result = {"enhanced_prompt": enhanced_prompt, "keywords": keywords, "success": True}
+            else:
+                result = self._fallback_enhancement(user_prompt)
+                yield {"type": "token", "text": result["enhanced_prompt"]}
+        
+        yield {"type": "result", **result}
+    
+    def _parse_response(self, response: str) -> tuple[str, List[str]]:
+        """Parse Gemini response to extract enhanced prompt and keywords"""
+        return parse_response(response)
     
     def _extract_keywords_from_text(self, text: str) -> List[str]:
         """Extract keywords from text using simple word frequency"""
-        # Simple keyword extraction - can be improved with NLP
-        common_design_words = [
-            'vintage', 'modern', 'minimalist', 'bold', 'elegant', 'creative',
-            'dynamic', 'professional', 'artistic', 'colorful', 'typography',
-            'geometric', 'abstract', 'retro', 'contemporary', 'sleek',
-            'vibrant', 'dramatic', 'subtle', 'sophisticated'
-        ]
-        
-        text_lower = text.lower()
-        found_keywords = []
-        
-        for word in common_design_words:
-            if word in text_lower:
-                found_keywords.append(word)
-        
-        return found_keywords[:8]
+        return extract_keywords_from_text(text)
     
     def _fallback_enhancement(self, user_prompt: str) -> Dict[str, any]:
         """Fallback enhancement when API fails"""
@@ -0,0 +1,166 @@
+import os
+import time
+import base64
+import io
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+from PIL import Image
+
+from services.metrics import timed
+
+WEBP_QUALITY = int(os.environ.get('WEBP_QUALITY', 85))
+JPEG_QUALITY = int(os.environ.get('JPEG_QUALITY', 85))
+# zlib level for PNG: 0 (fastest, largest) to 9 (slowest, smallest); Pillow's default is 6
+PNG_COMPRESS_LEVEL = int(os.environ.get('PNG_COMPRESS_LEVEL', 6))
+
+OUTPUT_FORMATS = ("png", "webp", "jpeg")
+# Format of new posters unless the request or its Accept header asks for another
+DEFAULT_OUTPUT_FORMAT = os.environ.get('POSTER_FORMAT', 'png')
+# Tie-break when an Accept header rates several formats equally
+ACCEPT_PREFERENCE = ("webp", "png", "jpeg")
+
+# Spellings of lossless accepted from query strings and form fields
+LOSSLESS_VALUES = {"true": True, "1": True, "false": False, "0": False}
+
+
+class ImageEncoding(NamedTuple):
+    """
+    How an image is encoded. quality applies to lossy WebP and JPEG (1-100),
+    lossless to WebP and compress_level to PNG (0-9); None means the default.
+    """
+    format: str = "png"
+    quality: Optional[int] = None
+    lossless: bool = False
+    compress_level: Optional[int] = None
+
+    def resolved(self) -> "ImageEncoding":
+        """The same encoding with defaults filled in and inapplicable settings dropped"""
+        if self.format == "png":
+            level = PNG_COMPRESS_LEVEL if self.compress_level is None else self.compress_level
+            return ImageEncoding("png", compress_level=level)
+        if self.format == "webp" and self.lossless:
+            return ImageEncoding("webp", lossless=True)
+        default_quality = WEBP_QUALITY if self.format == "webp" else JPEG_QUALITY
+        return ImageEncoding(self.format, quality=default_quality if self.quality is None else self.quality)
+
+    @property
+    def label(self) -> str:
+        """Format name for metrics, telling lossless WebP apart"""
+        return "webp_lossless" if self.format == "webp" and self.lossless else self.format
+
+
+def parse_encoding(options: Dict[str, Any]) -> ImageEncoding:
+    """
+    Read format, quality, lossless and compress_level from a request. Settings
+    that do not apply to the chosen format are ignored, so a client can send
+    one set of options and let the Accept header pick the format.
+    Raises ValueError for unknown formats, out-of-range settings and a
+    lossless that is not a boolean (or "true"/"false"/"1"/"0").
+    """
+    image_format = (options.get("format") or DEFAULT_OUTPUT_FORMAT).lower()
+    if image_format == "jpg":
+        image_format = "jpeg"
+    if image_format not in OUTPUT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(OUTPUT_FORMATS)}")
+
+    quality = options.get("quality")
+    if quality is not None and (not isinstance(quality, int) or isinstance(quality, bool) or not 1 <= quality <= 100):
+        raise ValueError("quality must be an integer between 1 and 100")
+
+    compress_level = options.get("compress_level")
+    if compress_level is not None and (not isinstance(compress_level, int) or isinstance(compress_level, bool) or not 0 <= compress_level <= 9):
+        raise ValueError("compress_level must be an integer between 0 and 9")
+
+    lossless = options.get("lossless")
+    if isinstance(lossless, str):
+        lossless = LOSSLESS_VALUES.get(lossless.strip().lower(), lossless)
+    if lossless is None:
+        lossless = False
+    if not isinstance(lossless, bool):
+        raise ValueError("lossless must be true or false")
+
+    return ImageEncoding(image_format, quality, lossless, compress_level).resolved()
+
+
+def negotiate_format(accept: Optional[str]) -> Optional[str]:
+    """
+    The output format an Accept header prefers among those named explicitly
+    (image/webp, image/png, image/jpeg), or None to use the default.
+    Wildcards such as */* and image/* express no preference.
+    """
+    if not accept:
+        return None
+
+    ratings = {}
+    for entry in accept.split(","):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        if not media_type.lower().startswith("image/"):
+            continue
+        image_format = media_type[len("image/"):].lower()
+        if image_format not in OUTPUT_FORMATS:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ratings[image_format] = q
+
+    candidates = [image_format for image_format in ACCEPT_PREFERENCE if ratings.get(image_format, 0) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda image_format: ratings[image_format])
+
+
+def to_data_uri(image_bytes: bytes, image_format: str = "png") -> str:
+    """Inline image bytes as a base64 data URI"""
+    with timed("base64_encode"):
+        return f"data:image/{image_format};base64,{base64.b64encode(image_bytes).decode()}"
+
+
+def from_data_uri(data_uri: str) -> tuple[bytes, str]:
+    """Decode a base64 data URI into (bytes, format)"""
+    header, _, payload = data_uri.partition(',')
+    if not payload:
+        return base64.b64decode(header), "png"
+    image_format = header.split('/')[1].split(';')[0] if '/' in header else "png"
+    return base64.b64decode(payload), image_format
+
+
+def encode_image(image: Image.Image, encoding: Union[str, ImageEncoding] = "png",
+                 log: Optional[List[Dict[str, Any]]] = None) -> bytes:
+    """
+    Encode a Pillow image as PNG, WebP or JPEG. With log, appends the encode
+    time and output size, so render workers can hand them back for metrics
+    (see metrics.record_encodes).
+    """
+    if isinstance(encoding, str):
+        encoding = ImageEncoding(encoding)
+    encoding = encoding.resolved()
+
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    if encoding.format == "webp":
+        if encoding.lossless:
+            image.save(buffer, format='WEBP', lossless=True)
+        else:
+            image.save(buffer, format='WEBP', quality=encoding.quality)
+    elif encoding.format == "jpeg":
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buffer, format='JPEG', quality=encoding.quality, optimize=False)
+    else:
+        image.save(buffer, format='PNG', compress_level=encoding.compress_level)
+    data = buffer.getvalue()
+
+    if log is not None:
+        log.append({
+            "format": encoding.label,
+            "dimensions": f"{image.width}x{image.height}",
+            "seconds": time.perf_counter() - start,
+            "bytes": len(data)
+        })
+    return data
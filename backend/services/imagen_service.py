@@ -1,24 +1,96 @@
 import os
-import base64
+import json
+import hashlib
 from typing import Optional, Dict
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import io
 import requests
 
+from services.render_executor import render_executor, worker_snapshot, RenderQueueFullError
+from services.background_engine import linear_gradient, blend_panel, to_image
+from services.layer_cache import layer_cache, logo_cache
+from services.font_registry import font_registry, DEFAULT_FAMILY
+from services.image_codec import encode_image, ImageEncoding
+from services.renditions import render_eager_renditions
+from services.single_flight import SingleFlight
+from services.logo_store import LogoImage
+from services.metrics import timed, record_stage_timings, record_encodes, StageTimer
+from services.profiler import call_profiler, run_profiled
+
+# Bump whenever a change to the renderer changes its output; cached renders
+# from other versions are then ignored and purged at startup
+RENDERER_VERSION = "2"
+
+# Purple to cyan
+DEFAULT_PALETTE = ((0.0, (147, 51, 234)), (1.0, (64, 224, 208)))
+
+# Logos are pasted as LOGO_SIZE x LOGO_SIZE RGBA bitmaps
+LOGO_SIZE = 80
+LOGO_MODE = "RGBA"
+
+# Font family used for each style unless the prompt asks for one
+STYLE_FONT_FAMILIES = {
+    "Vintage Retro": "serif",
+    "Art Deco Elegant": "serif",
+    "Modern Contemporary": "sans",
+    "Minimalist Clean": "sans",
+    "Creative Modern": "sans",
+}
+
 class ImagenService:
     def __init__(self):
         self.service_account_key = os.environ.get('GOOGLE_CLOUD_SERVICE_ACCOUNT_KEY', 'placeholder-key')
         self.project_id = os.environ.get('GOOGLE_CLOUD_PROJECT_ID', 'placeholder-project')
         self.region = "us-central1"
-        
-    async def generate_poster(self, enhanced_prompt: str, logo_data: Optional[dict] = None, logo_position: Optional[str] = None) -> Dict[str, any]:
+        # Placeholder and real Imagen renders of the same inputs differ
+        backend = "placeholder" if self.service_account_key == 'placeholder-key' else "imagen"
+        self.renderer_version = f"{backend}-{RENDERER_VERSION}"
+        # Identical render requests in flight at the same time share one render
+        self.render_flight = SingleFlight("generate_poster")
+
+    def __getstate__(self):
+        # Render methods are pickled into worker processes along with the service;
+        # the in-flight render tasks stay in the parent
+        state = self.__dict__.copy()
+        state.pop("render_flight", None)
+        return state
+
+    def render_input_key(self, enhanced_prompt: str, logo: Optional[LogoImage] = None, logo_position: Optional[str] = None,
+                         encoding: ImageEncoding = ImageEncoding()) -> str:
+        """Canonical hash of everything that determines the rendered poster"""
+        # A logo's id is already the hash of its bytes
+        logo_hash = logo.id if logo and logo_position else None
+        canonical = json.dumps(
+            {
+                "renderer": self.renderer_version,
+                "prompt": enhanced_prompt,
+                "logo": logo_hash,
+                "position": logo_position if logo_hash else None,
+                "encoding": encoding.resolved()._asdict()
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+    
+    async def generate_poster(self, enhanced_prompt: str, logo: Optional[LogoImage] = None, logo_position: Optional[str] = None,
+                              encoding: ImageEncoding = ImageEncoding()) -> Dict[str, any]:
         """
         Generate a poster using Imagen 4 API
         """
+        key = self.render_input_key(enhanced_prompt, logo, logo_position, encoding)
+        result = await self.render_flight.do(
+            key, lambda: self._generate_poster_uncached(enhanced_prompt, logo, logo_position, encoding)
+        )
+        # Every caller gets its own copy of the shared result
+        return dict(result)
+    
+    async def _generate_poster_uncached(self, enhanced_prompt: str, logo: Optional[LogoImage] = None, logo_position: Optional[str] = None,
+                                        encoding: ImageEncoding = ImageEncoding()) -> Dict[str, any]:
+        """Render one poster"""
         try:
             # For now, use placeholder images until real API keys are provided
             if self.service_account_key == 'placeholder-key':
-                return await self._generate_placeholder_poster(enhanced_prompt, logo_data, logo_position)
+                return await self._generate_placeholder_poster(enhanced_prompt, logo, logo_position, encoding)
             
             # TODO: Implement real Imagen 4 API call
             # This would include:
@@ -27,57 +99,70 @@ class ImagenService:
             # 3. Processing the response
             # 4. Adding logo overlay if provided
             
-            return await self._generate_placeholder_poster(enhanced_prompt, logo_data, logo_position)
+            return await self._generate_placeholder_poster(enhanced_prompt, logo, logo_position, encoding)
             
+        except RenderQueueFullError:
+            raise
         except Exception as e:
             print(f"Error generating poster: {str(e)}")
-            return await self._generate_placeholder_poster(enhanced_prompt, logo_data, logo_position)
+            return await self._generate_placeholder_poster(enhanced_prompt, logo, logo_position, encoding)
+    
+    async def _generate_placeholder_poster(self, enhanced_prompt: str, logo: Optional[LogoImage] = None, logo_position: Optional[str] = None,
+                                           encoding: ImageEncoding = ImageEncoding()) -> Dict[str, any]:
+        """
+        Generate a placeholder poster for testing.
+        The Pillow work runs on the render executor so it never blocks the event loop.
+        """
+        # Includes the wait for a free render worker
+        with timed("render"):
+            if call_profiler.active():
+                # Profiled request: profile the render inside the worker as well
+                result, report = await render_executor.run(
+                    run_profiled, self._render_placeholder_poster, enhanced_prompt, logo, logo_position, encoding
+                )
+                call_profiler.add_section("render_worker", report)
+            else:
+                result = await render_executor.run(
+                    self._render_placeholder_poster, enhanced_prompt, logo, logo_position, encoding
+                )
+        render_executor.worker_stats.record(result.pop("worker_stats", None))
+        record_stage_timings(result.pop("timings", None))
+        record_encodes(result.pop("encodes", None))
+        return result
     
-    async def _generate_placeholder_poster(self, enhanced_prompt: str, logo_data: Optional[dict] = None, logo_position: Optional[str] = None) -> Dict[str, any]:
+    def _render_placeholder_poster(self, enhanced_prompt: str, logo: Optional[LogoImage] = None, logo_position: Optional[str] = None,
+                                   encoding: ImageEncoding = ImageEncoding()) -> Dict[str, any]:
         """
-        Generate a placeholder poster for testing
+        Render the placeholder poster synchronously (runs inside a render worker)
         """
+        # Stage timings travel back with the result; a worker process has no /metrics of its own
+        timer = StageTimer()
         try:
             # Create a gradient background poster
             width, height = 800, 1200
-            image = Image.new('RGB', (width, height), color='white')
-            draw = ImageDraw.Draw(image)
-            
-            # Create gradient background
-            for y in range(height):
-                # Purple to cyan gradient
-                r = int(147 + (64 - 147) * y / height)  # 147 to 64
-                g = int(51 + (224 - 51) * y / height)   # 51 to 224
-                b = int(234 + (208 - 234) * y / height) # 234 to 208
-                draw.line([(0, y), (width, y)], fill=(r, g, b))
             
-            # Add some design elements
             # Central rectangle
             rect_width, rect_height = 600, 400
             rect_x = (width - rect_width) // 2
             rect_y = (height - rect_height) // 2
             
-            # Semi-transparent overlay
-            overlay = Image.new('RGBA', (width, height), (255, 255, 255, 0))
-            overlay_draw = ImageDraw.Draw(overlay)
-            overlay_draw.rectangle(
-                [rect_x, rect_y, rect_x + rect_width, rect_y + rect_height],
-                fill=(255, 255, 255, 180)
-            )
-            
-            # Composite the overlay
-            image = Image.alpha_composite(image.convert('RGBA'), overlay).convert('RGB')
+            # Gradient and semi-transparent panel only depend on size, palette and
+            # panel geometry, so the composed base comes from the layer cache.
+            # The panel spans rect_x..rect_x + rect_width inclusive, like the PIL
+            # rectangle it replaced, so it is one pixel wider and taller than the rect
+            panel = ((rect_x, rect_y, rect_width + 1, rect_height + 1), (255, 255, 255), 180)
+            with timer.stage("render_background"):
+                image = layer_cache.get(
+                    (width, height, DEFAULT_PALETTE, panel),
+                    lambda: self._build_base_layer(width, height, DEFAULT_PALETTE, panel)
+                )
             draw = ImageDraw.Draw(image)
             
-            # Add text (simplified - would need proper font handling)
-            try:
-                # Try to use a nice font if available
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 40)
-                small_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 20)
-            except:
-                # Fallback to default font
-                font = ImageFont.load_default()
-                small_font = ImageFont.load_default()
+            # Fonts are loaded once per worker by the font registry
+            style = self._determine_style(enhanced_prompt)
+            family = self._select_font_family(enhanced_prompt, style)
+            font = font_registry.get(family, "bold", 40)
+            small_font = font_registry.get(family, "regular", 20)
             
             # Add title
             title_text = "AI Generated Poster"
@@ -100,19 +185,26 @@ class ImagenService:
                 desc_y += 30
             
             # Add logo if provided
-            if logo_data and logo_position:
-                image = self._add_logo_to_image(image, logo_data, logo_position)
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            image.save(buffer, format='PNG')
-            img_base64 = base64.b64encode(buffer.getvalue()).decode()
+            if logo and logo_position:
+                with timer.stage("logo_composite"):
+                    image = self._add_logo_to_image(image, logo, logo_position)
             
+            # Encode; the caller stores the bytes and builds a data URI only when needed
+            encodes = []
+            with timer.stage("image_encode"):
+                image_bytes = encode_image(image, encoding, encodes)
+            with timer.stage("renditions_encode"):
+                renditions = render_eager_renditions(image, encoding, encodes)
             return {
-                "image_base64": f"data:image/png;base64,{img_base64}",
-                "style": self._determine_style(enhanced_prompt),
+                "image_bytes": image_bytes,
+                "image_format": encoding.format,
+                "renditions": renditions,
+                "style": style,
                 "dimensions": "800x1200",
-                "success": True
+                "success": True,
+                "worker_stats": worker_snapshot(layer=layer_cache, logo=logo_cache),
+                "timings": timer.timings,
+                "encodes": encodes
             }
             
         except Exception as e:
@@ -124,21 +216,32 @@ class ImagenService:
                 "success": False
             }
     
-    def _add_logo_to_image(self, image: Image.Image, logo_data: dict, position: str) -> Image.Image:
+    def _build_base_layer(self, width: int, height: int, palette, panel) -> Image.Image:
+        """Compose the gradient background with its translucent panel"""
+        box, color, alpha = panel
+        pixels = linear_gradient(width, height, palette)
+        blend_panel(pixels, box, color, alpha)
+        return to_image(pixels)
+    
+    def _prepare_logo(self, logo: LogoImage, size: int, mode: str) -> Image.Image:
+        """Decode a logo and convert and resize it for pasting"""
+        logo_image = Image.open(io.BytesIO(logo.data))
+        
+        # Convert to RGBA if needed
+        if logo_image.mode != mode:
+            logo_image = logo_image.convert(mode)
+        
+        return logo_image.resize((size, size), Image.Resampling.LANCZOS)
+    
+    def _add_logo_to_image(self, image: Image.Image, logo: LogoImage, position: str) -> Image.Image:
         """Add logo to the poster image at specified position"""
         try:
-            # Decode logo from base64
-            logo_base64 = logo_data['base64'].split(',')[1] if ',' in logo_data['base64'] else logo_data['base64']
-            logo_bytes = base64.b64decode(logo_base64)
-            logo_image = Image.open(io.BytesIO(logo_bytes))
-            
-            # Convert to RGBA if needed
-            if logo_image.mode != 'RGBA':
-                logo_image = logo_image.convert('RGBA')
-            
-            # Resize logo to reasonable size
-            logo_size = 80
-            logo_image = logo_image.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
+            # Brand logos repeat across renders, so the prepared bitmap is cached per worker
+            logo_size = LOGO_SIZE
+            logo_image = logo_cache.get(
+                (logo.id, logo_size, LOGO_MODE),
+                lambda: self._prepare_logo(logo, logo_size, LOGO_MODE)
+            )
             
             # Calculate position
             img_width, img_height = image.size
@@ -155,11 +258,10 @@ class ImagenService:
             
             logo_pos = positions.get(position, positions['top-right'])
             
-            # Create a new image with logo
-            result = image.copy()
-            result.paste(logo_image, logo_pos, logo_image)
+            # The poster is already this render's own copy of the base layer, so paste in place
+            image.paste(logo_image, logo_pos, logo_image)
             
-            return result
+            return image
             
         except Exception as e:
             print(f"Error adding logo: {str(e)}")
@@ -202,6 +304,19 @@ class ImagenService:
         else:
             return "Creative Modern"
     
+    def _select_font_family(self, prompt: str, style: str) -> str:
+        """Pick a font family from explicit typography hints in the prompt, else from the style"""
+        prompt_lower = prompt.lower()
+        
+        if 'monospace' in prompt_lower or 'typewriter' in prompt_lower:
+            return "mono"
+        elif 'sans-serif' in prompt_lower or 'sans serif' in prompt_lower:
+            return "sans"
+        elif 'serif' in prompt_lower:
+            return "serif"
+        else:
+            return STYLE_FONT_FAMILIES.get(style, DEFAULT_FAMILY)
+    
     def _get_fallback_image(self) -> str:
         """Get a fallback image URL"""
         return "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iNDAwIiBoZWlnaHQ9IjYwMCIgdmlld0JveD0iMCAwIDQwMCA2MDAiIGZpbGw9Im5vbmUiIHhtbG5zPSJodHRwOi8vd3d3LnczLm9yZy8yMDAwL3N2ZyI+CjxyZWN0IHdpZHRoPSI0MDAiIGhlaWdodD0iNjAwIiBmaWxsPSJsaW5lYXItZ3JhZGllbnQoNDVkZWcsICM5MzMzZWEsICMwZjE0MTkpIi8+Cjx0ZXh0IHg9IjIwMCIgeT0iMzAwIiB0ZXh0LWFuY2hvcj0ibWlkZGxlIiBmaWxsPSJ3aGl0ZSIgZm9udC1zaXplPSIyNCI+QUkgUG9zdGVyPC90ZXh0Pgo8L3N2Zz4K"
\ No newline at end of file
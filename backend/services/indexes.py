@@ -0,0 +1,135 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pymongo.errors import OperationFailure
+
+# Mongo error codes for an existing index with the same name/keys but other options
+INDEX_OPTIONS_CONFLICT = 85
+INDEX_KEY_SPECS_CONFLICT = 86
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    # TTL indexes are only created when this environment variable holds a number of seconds
+    ttl_env: Optional[str] = None
+    # Fixed TTL, e.g. 0 for documents that carry their own expires_at
+    expire_after_seconds: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        suffix = "_ttl" if self.ttl_env or self.expire_after_seconds is not None else ""
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys) + suffix
+
+    def ttl_seconds(self) -> Optional[int]:
+        if self.expire_after_seconds is not None:
+            return self.expire_after_seconds
+        if not self.ttl_env:
+            return None
+        value = os.environ.get(self.ttl_env)
+        return int(value) if value else None
+
+
+# Every index the application relies on
+INDEXES: List[IndexSpec] = [
+    IndexSpec("generated_posters", (("id", 1),), unique=True),
+    IndexSpec("generated_posters", (("session_id", 1), ("created_at", -1), ("id", -1))),
+    IndexSpec("chat_messages", (("id", 1),), unique=True),
+    IndexSpec("chat_messages", (("session_id", 1), ("created_at", -1), ("id", -1))),
+    IndexSpec("chat_messages", (("created_at", 1),), ttl_env="CHAT_MESSAGES_TTL_SECONDS"),
+    IndexSpec("enhanced_prompts", (("id", 1),), unique=True),
+    IndexSpec("enhanced_prompts", (("session_id", 1), ("created_at", -1))),
+    IndexSpec("enhanced_prompts", (("created_at", 1),), ttl_env="ENHANCED_PROMPTS_TTL_SECONDS"),
+    IndexSpec("prompt_cache", (("key", 1),), unique=True),
+    IndexSpec("prompt_cache", (("expires_at", 1),), expire_after_seconds=0),
+    IndexSpec("generation_jobs", (("id", 1),), unique=True),
+    IndexSpec("logos", (("id", 1),), unique=True),
+    IndexSpec("render_cache", (("key", 1),), unique=True),
+    IndexSpec("render_cache", (("last_used_at", 1),)),
+    IndexSpec("render_cache", (("renderer_version", 1),)),
+    IndexSpec("generation_jobs", (("status", 1), ("created_at", 1))),
+]
+
+# Representative query shapes issued by the routes: (collection, filter, sort)
+QUERY_SHAPES: List[Tuple[str, Dict[str, Any], Optional[Sequence[Tuple[str, int]]]]] = [
+    ("generated_posters", {"id": "x"}, None),
+    ("generated_posters", {"session_id": "x"}, [("created_at", -1), ("id", -1)]),
+    ("chat_messages", {"session_id": "x"}, [("created_at", -1), ("id", -1)]),
+    ("enhanced_prompts", {"session_id": "x"}, [("created_at", -1)]),
+    ("prompt_cache", {"key": "x", "expires_at": {"$gt": 0}}, None),
+    ("generation_jobs", {"id": "x"}, None),
+    ("logos", {"id": "x"}, None),
+    ("render_cache", {"key": "x", "renderer_version": "x", "generation": 0}, None),
+    ("render_cache", {}, [("last_used_at", 1)]),
+    ("generation_jobs", {"status": "queued", "retry_at": {"$not": {"$gt": 0}}}, [("created_at", 1)]),
+    ("generation_jobs", {"status": "running", "lease_expires_at": {"$not": {"$gte": 0}}}, [("created_at", 1)]),
+]
+
+
+async def ensure_indexes(db, specs: List[IndexSpec] = None) -> List[str]:
+    """
+    Create any missing index. Safe to run on every start: existing indexes
+    with the same definition are left alone, and a changed TTL is updated
+    in place with collMod.
+    """
+    created = []
+    for spec in specs or INDEXES:
+        ttl = spec.ttl_seconds()
+        if spec.ttl_env and ttl is None:
+            continue
+
+        options = {"name": spec.name, "unique": spec.unique}
+        if ttl is not None:
+            options["expireAfterSeconds"] = ttl
+
+        try:
+            created.append(await db[spec.collection].create_index(list(spec.keys), **options))
+        except OperationFailure as e:
+            if e.code in (INDEX_OPTIONS_CONFLICT, INDEX_KEY_SPECS_CONFLICT) and ttl is not None:
+                await db.command("collMod", spec.collection, index={"name": spec.name, "expireAfterSeconds": ttl})
+                created.append(spec.name)
+            else:
+                print(f"Error creating index {spec.collection}.{spec.name}: {str(e)}")
+
+    return created
+
+
+def _plan_stages(plan: Dict[str, Any]):
+    """Walk an explain() plan tree and yield every stage name"""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+async def find_unindexed_queries(db, shapes=None) -> List[Dict[str, Any]]:
+    """
+    Explain each query shape and report those whose winning plan scans the
+    whole collection or sorts in memory.
+    """
+    problems = []
+    for collection, query, sort in shapes or QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(list(sort))
+        explanation = await cursor.explain()
+        winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        stages = set(_plan_stages(winning_plan))
+
+        if "COLLSCAN" in stages or "SORT" in stages:
+            problems.append({
+                "collection": collection,
+                "filter": query,
+                "sort": sort,
+                "stages": sorted(stages)
+            })
+
+    return problems
@@ -0,0 +1,335 @@
+import os
+import uuid
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Type
+
+from pymongo import ReturnDocument
+
+from models.poster import GenerationJob
+from database import get_database
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED)
+TERMINAL_STATUSES = (JOB_DONE, JOB_FAILED)
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue already holds its maximum number of queued jobs"""
+
+
+class JobQueue:
+    """
+    Mongo-backed job queue worked by a fixed number of asyncio workers in
+    every process that starts it.
+
+    Every state change is written to the collection first, so the documents
+    are the source of truth: GET /jobs/{id} reads them, and any process's
+    workers can run a job submitted to any other. A worker claims the oldest
+    queued job with an atomic update that also records this queue as its
+    owner and sets a lease, renewed while the job runs. A running job whose
+    lease has expired was abandoned by a process that stopped or crashed and
+    is claimed again; results are only written by the current owner, so a
+    job taken over from a stalled process is not finished twice.
+
+    A job is claimed at most JOB_MAX_ATTEMPTS times: one whose lease expires
+    after its last attempt (e.g. its render keeps killing the worker process)
+    is failed instead of claimed again. A handler error listed in retry_on
+    (overload, such as a full render queue) puts the job back in the queue
+    until JOB_RETRY_BACKOFF_SECONDS * 2^(attempt - 1) has passed; any other
+    error fails the job. A worker that loses a job's lease cancels its
+    handler, so the job's new owner is the only one producing a result.
+
+    Workers wait for a local submit or poll the collection every
+    JOB_CLAIM_INTERVAL_SECONDS. Subscribers (the job WebSocket) get every
+    state change this process makes through an asyncio.Queue while they are
+    connected.
+    """
+
+    # Upper bound of the retry backoff
+    MAX_RETRY_BACKOFF_SECONDS = 300
+
+    def __init__(self, collection: str, handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 workers: Optional[int] = None, max_queued: Optional[int] = None,
+                 retry_on: Tuple[Type[Exception], ...] = ()):
+        self.collection = collection
+        # Called with a job's params; its return value becomes the job result
+        self.handler = handler
+        # Temporary handler errors after which the job is retried instead of failed
+        self.retry_on = retry_on
+        self.workers = workers or int(os.environ.get('GENERATION_WORKERS', 2))
+        self.max_queued = max_queued or int(os.environ.get('GENERATION_QUEUE_DEPTH', 100))
+        self.lease_seconds = float(os.environ.get('JOB_LEASE_SECONDS', 60))
+        self.claim_interval = float(os.environ.get('JOB_CLAIM_INTERVAL_SECONDS', 1))
+        self.max_attempts = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+        self.retry_backoff = float(os.environ.get('JOB_RETRY_BACKOFF_SECONDS', 2))
+        # Identifies this process's queue as the owner of the jobs it runs
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._running = 0
+        # Jobs waiting in the collection, as of the last submit or claim
+        self._queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.requeued = 0
+        self.retried = 0
+        self.abandoned = 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """Start the workers; they pick up queued jobs and jobs whose lease has expired"""
+        if self.started:
+            return
+
+        self._wakeup = asyncio.Event()
+        await self._count_queued()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running are set back to queued"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, params: Dict[str, Any], session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Persist a new queued job and wake a worker"""
+        if not self.started:
+            raise RuntimeError("Job queue is not running")
+        queued = await self._count_queued()
+        if queued >= self.max_queued:
+            raise JobQueueFullError(f"Job queue is full ({queued}/{self.max_queued} jobs queued)")
+
+        job = GenerationJob(params=params, session_id=session_id).dict()
+        db = get_database()
+        await db[self.collection].insert_one(job)
+        job.pop("_id", None)
+
+        self._queued += 1
+        self._wakeup.set()
+        self.submitted += 1
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = get_database()
+        return await db[self.collection].find_one({"id": job_id}, {"_id": 0})
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Queue that receives the job document after every state change"""
+        updates = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(updates)
+        return updates
+
+    def unsubscribe(self, job_id: str, updates: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(updates)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def _publish(self, job: Dict[str, Any]):
+        for updates in self._subscribers.get(job["id"], ()):
+            updates.put_nowait(job)
+
+    async def _update(self, job_id: Optional[str], query: Dict[str, Any], update: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update the job (or the oldest job matching query when job_id is None) and publish it"""
+        db = get_database()
+        update.setdefault("$set", {})["updated_at"] = datetime.utcnow()
+        if job_id is not None:
+            query = {"id": job_id, **query}
+        job = await db[self.collection].find_one_and_update(
+            query,
+            update,
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job is not None:
+            job.pop("_id", None)
+            self._publish(job)
+        return job
+
+    async def _count_queued(self) -> int:
+        db = get_database()
+        self._queued = await db[self.collection].count_documents({"status": JOB_QUEUED})
+        return self._queued
+
+    async def _fail_exhausted(self, expired: Dict[str, Any]):
+        """Fail expired jobs that have had all their attempts"""
+        while True:
+            job = await self._update(None, {**expired, "attempts": {"$gte": self.max_attempts}}, {"$set": {
+                "status": JOB_FAILED,
+                "owner": None,
+                "lease_expires_at": None,
+                "error": f"Job was abandoned by its worker {self.max_attempts} times",
+                "finished_at": datetime.utcnow()
+            }})
+            if job is None:
+                return
+            print(f"Job {job['id']} lease expired after its last attempt, failing it")
+            self.abandoned += 1
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        """Take the oldest due queued job, else the oldest job whose lease has expired"""
+        db = get_database()
+        now = datetime.utcnow()
+        claim = {
+            "$set": {
+                "status": JOB_RUNNING,
+                "owner": self.owner,
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                "started_at": now,
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        }
+        # Jobs left running before leases existed have none and count as expired
+        expired = {"status": JOB_RUNNING, "lease_expires_at": {"$not": {"$gte": now}}}
+        await self._fail_exhausted(expired)
+
+        # Retried jobs wait in the queue until their retry_at
+        queued = {"status": JOB_QUEUED, "retry_at": {"$not": {"$gt": now}}}
+        for query in (queued, expired):
+            job = await db[self.collection].find_one_and_update(
+                query, claim, sort=[("created_at", 1)], return_document=ReturnDocument.AFTER
+            )
+            if job is not None:
+                job.pop("_id", None)
+                if query is expired:
+                    print(f"Job {job['id']} lease expired, running it again (attempt {job['attempts']})")
+                    self.requeued += 1
+                else:
+                    self._queued = max(0, self._queued - 1)
+                self._publish(job)
+                return job
+        return None
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error claiming a job: {str(e)}")
+                job = None
+
+            if job is None:
+                # Nothing to do: wait for a local submit, or poll for jobs from other processes
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.claim_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error processing job {job['id']}: {str(e)}")
+
+    async def _renew_lease(self, job_id: str, handler: asyncio.Task):
+        """Extend the lease of a running job until cancelled; cancels handler if the lease is lost"""
+        db = get_database()
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                result = await db[self.collection].update_one(
+                    {"id": job_id, "status": JOB_RUNNING, "owner": self.owner},
+                    {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+                )
+            except Exception as e:
+                # Try again on the next beat; the lease is still good until it expires
+                print(f"Error renewing the lease on job {job_id}: {str(e)}")
+                continue
+            if result.matched_count == 0:
+                # Another worker owns the job now; stop before this run stores a second poster
+                print(f"Lost the lease on job {job_id}; cancelling it here")
+                handler.cancel()
+                return
+
+    async def _fail(self, job_id: str, owned: Dict[str, Any], released: Dict[str, Any], error: Exception):
+        print(f"Error in job {job_id}: {str(error)}")
+        finished = await self._update(job_id, owned, {"$set": {
+            **released,
+            "status": JOB_FAILED,
+            "error": str(error),
+            "finished_at": datetime.utcnow()
+        }})
+        if finished is not None:
+            self.failed += 1
+
+    async def _process(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        # Only the current owner may finish the job
+        owned = {"status": JOB_RUNNING, "owner": self.owner}
+        released = {"owner": None, "lease_expires_at": None}
+
+        self._running += 1
+        handler = asyncio.create_task(self.handler(job["params"]))
+        renewal = asyncio.create_task(self._renew_lease(job_id, handler))
+        try:
+            result = await handler
+        except asyncio.CancelledError:
+            if renewal.done() and handler.cancelled():
+                # Cancelled because the lease was lost; the new owner finishes the job
+                return
+            # Shutting down: hand the job back to any worker
+            await self._update(job_id, owned, {"$set": {"status": JOB_QUEUED, **released}})
+            raise
+        except self.retry_on as e:
+            attempts = job.get("attempts", 1)
+            if attempts >= self.max_attempts:
+                await self._fail(job_id, owned, released, e)
+                return
+            backoff = min(self.retry_backoff * 2 ** (attempts - 1), self.MAX_RETRY_BACKOFF_SECONDS)
+            print(f"Job {job_id} hit a temporary error, retrying in {backoff:g}s: {str(e)}")
+            retried = await self._update(job_id, owned, {"$set": {
+                **released,
+                "status": JOB_QUEUED,
+                "error": str(e),
+                "retry_at": datetime.utcnow() + timedelta(seconds=backoff)
+            }})
+            if retried is not None:
+                self.retried += 1
+                self._queued += 1
+        except Exception as e:
+            await self._fail(job_id, owned, released, e)
+        else:
+            finished = await self._update(job_id, owned, {"$set": {
+                **released,
+                "status": JOB_DONE,
+                "result": result,
+                "error": None,
+                "finished_at": datetime.utcnow()
+            }})
+            if finished is not None:
+                self.completed += 1
+        finally:
+            renewal.cancel()
+            self._running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self._queued,
+            "running": self._running,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "requeued": self.requeued,
+            "retried": self.retried,
+            "abandoned": self.abandoned
+        }
@@ -0,0 +1,87 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+from PIL import Image
+
+
+def image_nbytes(image: Image.Image) -> int:
+    """Approximate memory held by a decoded Pillow image"""
+    width, height = image.size
+    return width * height * len(image.getbands())
+
+
+class LayerCache:
+    """
+    LRU cache of precomposed, ready-to-draw base images.
+
+    Entries are evicted least-recently-used first once the decoded size of all
+    cached images exceeds max_bytes. Callers receive a copy, so drawing on the
+    returned image never touches the cached layer; caches whose images are
+    only read (e.g. pasted from) can pass copy=False to skip it.
+    """
+
+    def __init__(self, max_bytes: int = None, copy: bool = True):
+        self.max_bytes = max_bytes or int(os.environ.get('LAYER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        self.copy = copy
+        self._entries: "OrderedDict[Hashable, Image.Image]" = OrderedDict()
+        self._bytes = 0
+        # Thread render workers share one cache
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, factory: Callable[[], Image.Image]) -> Image.Image:
+        """Return a copy of the cached layer for key, building it with factory on a miss"""
+        with self._lock:
+            layer = self._entries.get(key)
+            if layer is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return layer.copy() if self.copy else layer
+            self.misses += 1
+
+        layer = factory()
+        self._store(key, layer)
+        return layer.copy() if self.copy else layer
+
+    def _store(self, key: Hashable, layer: Image.Image):
+        size = image_nbytes(layer)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = layer
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= image_nbytes(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes
+        }
+
+
+# Per-process caches; each render worker keeps its own set of base layers
+layer_cache = LayerCache()
+# Decoded, converted and resized logos keyed by (logo id, size, mode), pasted without copying
+logo_cache = LayerCache(
+    max_bytes=int(os.environ.get('LOGO_CACHE_MAX_BYTES', 16 * 1024 * 1024)),
+    copy=False
+)
@@ -0,0 +1,145 @@
+import os
+import json
+import asyncio
+from typing import AsyncIterator
+
+from services.metrics import timed
+
+GEMINI_API_BASE = os.environ.get('GEMINI_API_BASE', 'https://generativelanguage.googleapis.com')
+
+
+class LlmClientPool:
+    """
+    Long-lived LLM client shared by every request.
+
+    Configuration is built once and concurrency is bounded by
+    LLM_MAX_CONCURRENCY. Two transports are available (LLM_TRANSPORT):
+
+    - "emergent" (default): emergentintegrations' LlmChat. A chat object keeps
+      its own conversation history, so one is still created per call.
+    - "http": the Gemini REST API over a single httpx.AsyncClient whose
+      keep-alive connections (LLM_KEEPALIVE_SECONDS) are reused across
+      requests, avoiding connection and TLS setup on every enhancement.
+    """
+
+    def __init__(self, api_key: str, provider: str, model: str, system_message: str, max_tokens: int,
+                 transport: str = None, max_concurrency: int = None, keepalive: float = None, base_url: str = None):
+        self.api_key = api_key
+        self.provider = provider
+        self.model = model
+        self.system_message = system_message
+        self.max_tokens = max_tokens
+        self.transport = (transport or os.environ.get('LLM_TRANSPORT', 'emergent')).lower()
+        if self.transport not in ('emergent', 'http'):
+            raise ValueError(f"Unknown LLM transport: {self.transport}")
+        self.max_concurrency = max_concurrency or int(os.environ.get('LLM_MAX_CONCURRENCY', 16))
+        self.keepalive = keepalive if keepalive is not None else float(os.environ.get('LLM_KEEPALIVE_SECONDS', 30))
+        self.base_url = base_url or GEMINI_API_BASE
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._in_use = 0
+        self._http_client = None
+
+    def _get_http_client(self):
+        if self._http_client is None:
+            import httpx
+
+            self._http_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"x-goog-api-key": self.api_key},
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=self.keepalive
+                ),
+                timeout=httpx.Timeout(30.0, connect=5.0)
+            )
+        return self._http_client
+
+    def _request_body(self, user_text: str) -> dict:
+        return {
+            "systemInstruction": {"parts": [{"text": self.system_message}]},
+            "contents": [{"role": "user", "parts": [{"text": user_text}]}],
+            "generationConfig": {"maxOutputTokens": self.max_tokens}
+        }
+
+    async def _complete_http(self, user_text: str) -> str:
+        response = await self._get_http_client().post(
+            f"/v1beta/models/{self.model}:generateContent",
+            json=self._request_body(user_text)
+        )
+        response.raise_for_status()
+        candidates = response.json().get("candidates") or []
+        if not candidates:
+            raise ValueError("LLM response has no candidates")
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+    async def _complete_emergent(self, user_text: str, session_id: str) -> str:
+        # Imported here so the http transport does not need emergentintegrations
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=session_id,
+            system_message=self.system_message
+        ).with_model(self.provider, self.model).with_max_tokens(self.max_tokens)
+        return await chat.send_message(UserMessage(text=user_text))
+
+    async def complete(self, user_text: str, session_id: str) -> str:
+        """Send one user message and return the model's full reply"""
+        async with self._semaphore:
+            self._in_use += 1
+            try:
+                with timed("llm_call"):
+                    if self.transport == 'http':
+                        return await self._complete_http(user_text)
+                    return await self._complete_emergent(user_text, session_id)
+            finally:
+                self._in_use -= 1
+
+    async def _stream_http(self, user_text: str) -> AsyncIterator[str]:
+        async with self._get_http_client().stream(
+            "POST",
+            f"/v1beta/models/{self.model}:streamGenerateContent",
+            params={"alt": "sse"},
+            json=self._request_body(user_text)
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = json.loads(line[len("data:"):].strip())
+                for candidate in payload.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+
+    async def stream(self, user_text: str, session_id: str) -> AsyncIterator[str]:
+        """
+        Yield the model's reply in chunks as they arrive. The emergent transport
+        has no streaming API, so it yields the whole reply as one chunk.
+        """
+        async with self._semaphore:
+            self._in_use += 1
+            try:
+                with timed("llm_stream"):
+                    if self.transport == 'http':
+                        async for chunk in self._stream_http(user_text):
+                            yield chunk
+                    else:
+                        yield await self._complete_emergent(user_text, session_id)
+            finally:
+                self._in_use -= 1
+
+    def stats(self) -> dict:
+        return {
+            "transport": self.transport,
+            "max_concurrency": self.max_concurrency,
+            "keepalive_seconds": self.keepalive,
+            "in_use": self._in_use
+        }
+
+    async def aclose(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
@@ -0,0 +1,119 @@
+import io
+import os
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from PIL import Image, UnidentifiedImageError
+from pymongo.errors import DuplicateKeyError
+
+from models.poster import Logo
+from services.blob_store import get_blob_store, content_hash
+from services.image_codec import from_data_uri
+from database import get_database
+
+LOGOS_COLLECTION = "logos"
+
+# Uploads larger than this are rejected
+LOGO_MAX_BYTES = int(os.environ.get('LOGO_MAX_BYTES', 5 * 1024 * 1024))
+
+# Pillow formats accepted for logos
+LOGO_FORMATS = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp", "GIF": "image/gif"}
+
+
+class InvalidLogoError(ValueError):
+    """Raised for uploads that are empty, too large or not a supported image"""
+
+
+class LogoImage(NamedTuple):
+    """A logo as handed to the renderer: its id (content hash) and encoded bytes"""
+    id: str
+    data: bytes
+
+
+def inspect_logo(data: bytes) -> Tuple[str, int, int]:
+    """Validate logo bytes and return (content type, width, height)"""
+    if not data:
+        raise InvalidLogoError("Logo file is empty")
+    if len(data) > LOGO_MAX_BYTES:
+        raise InvalidLogoError(f"Logo is larger than {LOGO_MAX_BYTES} bytes")
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image_format, (width, height) = image.format, image.size
+            image.verify()
+    except Image.DecompressionBombError as e:
+        raise InvalidLogoError(f"Logo has too many pixels: {str(e)}")
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise InvalidLogoError(f"Logo is not a readable image: {str(e)}")
+
+    if image_format not in LOGO_FORMATS:
+        raise InvalidLogoError(f"Logo format must be one of: {', '.join(LOGO_FORMATS)}")
+
+    return LOGO_FORMATS[image_format], width, height
+
+
+class LogoStore:
+    """
+    Uploaded logos, stored once each.
+
+    The image bytes go to the blob store and a small Logo document goes to the
+    logos collection. Both are keyed by the content hash, which is also the
+    logo id, so uploading the same file again returns the existing logo.
+    """
+
+    def __init__(self, collection: str = LOGOS_COLLECTION):
+        self.collection = collection
+
+    async def put(self, data: bytes, name: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """Store a logo and return (logo document, whether it already existed)"""
+        logo_id = content_hash(data)
+        existing = await self.get(logo_id)
+        if existing is not None:
+            return existing, True
+
+        content_type, width, height = inspect_logo(data)
+        await get_blob_store().put(data)
+
+        logo = Logo(
+            id=logo_id,
+            name=name,
+            content_type=content_type,
+            size=len(data),
+            width=width,
+            height=height
+        ).dict()
+
+        db = get_database()
+        try:
+            await db[self.collection].insert_one(logo)
+        except DuplicateKeyError:
+            # Uploaded concurrently by another request
+            return await self.get(logo_id), True
+
+        logo.pop("_id", None)
+        return logo, False
+
+    async def put_inline(self, logo_data: Dict[str, Any]) -> LogoImage:
+        """Store a legacy inline LogoData (base64 or data URI) and return it ready to render"""
+        try:
+            data, _ = from_data_uri(logo_data.get("base64") or "")
+        except ValueError as e:
+            raise InvalidLogoError(f"Logo is not valid base64: {str(e)}")
+
+        logo, _ = await self.put(data, logo_data.get("name"))
+        return LogoImage(logo["id"], data)
+
+    async def get(self, logo_id: str) -> Optional[Dict[str, Any]]:
+        db = get_database()
+        return await db[self.collection].find_one({"id": logo_id}, {"_id": 0})
+
+    async def load(self, logo_id: str) -> Optional[LogoImage]:
+        """Bytes of a stored logo, or None if it does not exist"""
+        # Only ids from the logos collection, not any blob in the store
+        if await self.get(logo_id) is None:
+            return None
+        data = await get_blob_store().get(logo_id)
+        return LogoImage(logo_id, data) if data is not None else None
+
+
+# Shared store used by the routes and the poster pipeline
+logo_store = LogoStore()
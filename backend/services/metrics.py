@@ -0,0 +1,285 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+# Seconds; spans cache hits (sub-millisecond) to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A collected sample: (metric name, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base for metrics kept in process memory. Recording only touches a few
+    numbers under a lock; all formatting happens when /metrics is scraped.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Observations also come from pymongo's monitoring threads
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        for key, counts, total in series:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class CallbackMetric(Metric):
+    """
+    Metric whose samples are read from a callback at scrape time, for values
+    the services already keep (queue depths, cache counters)
+    """
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], Iterable[Tuple[Dict[str, Any], float]]],
+                 kind: str = "gauge"):
+        super().__init__(name, documentation)
+        self.collect = collect
+        self.kind = kind
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in self.collect():
+            yield self.name, {key: str(label) for key, label in labels.items()}, value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str,
+              collect: Callable[[], Iterable[Tuple[Dict[str, Any], float]]]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, collect))
+
+    def counter_callback(self, name: str, documentation: str,
+                         collect: Callable[[], Iterable[Tuple[Dict[str, Any], float]]]) -> CallbackMetric:
+        """A counter kept elsewhere, e.g. a cache's hit count"""
+        return self.register(CallbackMetric(name, documentation, collect, kind="counter"))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                print(f"Error collecting metric {metric.name}: {str(e)}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "kala_stage_duration_seconds",
+    "Time spent in each stage of the request path",
+    ("stage",)
+)
+
+MONGO_COMMAND_SECONDS = registry.histogram(
+    "kala_mongo_command_duration_seconds",
+    "MongoDB command round trips by command and collection",
+    ("command", "collection")
+)
+
+HTTP_REQUESTS = registry.counter(
+    "kala_http_requests_total",
+    "HTTP requests by method, route template and status",
+    ("method", "route", "status")
+)
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "kala_http_request_duration_seconds",
+    "HTTP request latency by method and route template, up to the end of the response body",
+    ("method", "route")
+)
+
+
+# Bytes; from small thumbnails to uncompressed full-size posters
+BYTE_BUCKETS = (4096, 16384, 65536, 131072, 262144, 524288, 1048576, 2097152, 4194304, 8388608)
+
+IMAGE_ENCODE_SECONDS = registry.histogram(
+    "kala_image_encode_seconds",
+    "Image encode time by output format and dimensions",
+    ("format", "dimensions")
+)
+
+IMAGE_ENCODED_BYTES = registry.histogram(
+    "kala_image_encoded_bytes",
+    "Encoded image size by output format and dimensions",
+    ("format", "dimensions"),
+    buckets=BYTE_BUCKETS
+)
+
+
+def timed(stage: str):
+    """Context manager recording a stage duration: with timed("parse_response"): ..."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def record_stage_timings(timings: Optional[Dict[str, float]]):
+    """Observe stage durations measured elsewhere, e.g. in a render worker process"""
+    for stage, seconds in (timings or {}).items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def record_encodes(encodes: Optional[List[Dict[str, Any]]]):
+    """Observe encode times and sizes logged by image_codec.encode_image, e.g. in a render worker"""
+    for encode in encodes or ():
+        labels = {"format": encode["format"], "dimensions": encode["dimensions"]}
+        IMAGE_ENCODE_SECONDS.observe(encode["seconds"], **labels)
+        IMAGE_ENCODED_BYTES.observe(encode["bytes"], **labels)
+
+
+class StageTimer:
+    """
+    Collects stage durations in code that cannot reach the parent's metrics
+    (render workers). The timings dict travels back with the result and is
+    passed to record_stage_timings.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Times every MongoDB command sent by a client it is registered on
+    (event_listeners=[mongo_command_listener]), so reads and writes are
+    measured without touching the code that issues them.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple[Any, int], str] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if isinstance(collection, str):
+            self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _finished(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_SECONDS.observe(
+            event.duration_micros / 1_000_000,
+            command=event.command_name,
+            collection=collection
+        )
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+
+mongo_command_listener = MongoCommandMetrics()
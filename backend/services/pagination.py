@@ -0,0 +1,41 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+# Newest first; id breaks ties between documents created in the same instant
+KEYSET_SORT = [("created_at", -1), ("id", -1)]
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(document: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just past document in KEYSET_SORT order"""
+    payload = {"t": document["created_at"].isoformat(), "id": document["id"]}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), str(payload["id"])
+    except Exception:
+        raise InvalidCursorError("Invalid pagination cursor")
+
+
+def keyset_query(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """Restrict query to documents after cursor in KEYSET_SORT order"""
+    if not cursor:
+        return query
+
+    created_at, last_id = decode_cursor(cursor)
+    return {
+        **query,
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": last_id}},
+        ]
+    }
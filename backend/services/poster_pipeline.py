@@ -0,0 +1,159 @@
+from typing import Any, Dict, Optional, Tuple
+
+from models.poster import GeneratedPoster
+from services.imagen_service import ImagenService
+from services.logo_store import logo_store, LogoImage, InvalidLogoError
+from services.blob_store import get_blob_store
+from services.renditions import rendition_service
+from services.render_cache import RenderCache
+from services.image_codec import ImageEncoding, parse_encoding
+from database import get_database
+
+
+class InvalidPosterRequestError(ValueError):
+    """Raised when a generate request is missing required fields"""
+
+
+class PosterGenerationError(Exception):
+    """Raised when the renderer reports a failed render"""
+
+
+class PosterPipeline:
+    """
+    The poster generation pipeline shared by POST /poster/generate and the
+    generation job workers: render, store the image and its renditions in the
+    blob store, and save the GeneratedPoster document.
+
+    Renders are deterministic in their inputs, so finished renders are kept in
+    a render cache and an identical request reuses the stored image instead
+    of rendering and encoding it again.
+    """
+
+    def __init__(self, imagen_service: ImagenService = None):
+        self.imagen_service = imagen_service or ImagenService()
+        self.render_cache = RenderCache(self.imagen_service.renderer_version)
+
+    def validate(self, request: Dict[str, Any]):
+        if not request.get("enhanced_prompt"):
+            raise InvalidPosterRequestError("enhanced_prompt is required")
+
+        if not request.get("session_id"):
+            raise InvalidPosterRequestError("session_id is required")
+
+    def encoding(self, request: Dict[str, Any]) -> ImageEncoding:
+        """Output format and quality from the request's format, quality, lossless and compress_level"""
+        try:
+            return parse_encoding(request)
+        except ValueError as e:
+            raise InvalidPosterRequestError(str(e))
+
+    async def resolve_logo(self, request: Dict[str, Any]) -> Optional[LogoImage]:
+        """
+        The logo for a generate request: an uploaded logo by logo_id, or a legacy
+        inline LogoData, which is stored in the logo store so posters only keep its id
+        """
+        logo_id = request.get("logo_id")
+        if logo_id:
+            logo = await logo_store.load(logo_id)
+            if logo is None:
+                raise InvalidPosterRequestError(f"Unknown logo_id: {logo_id}")
+            return logo
+
+        logo_data = request.get("logo")
+        if not logo_data:
+            return None
+
+        try:
+            return await logo_store.put_inline(logo_data)
+        except InvalidLogoError as e:
+            # Inline logos were always best effort: render without it
+            print(f"Error reading inline logo: {str(e)}")
+            return None
+
+    async def _render(self, enhanced_prompt: str, logo: Optional[LogoImage], logo_position: Optional[str],
+                      encoding: ImageEncoding) -> Tuple[Dict[str, Any], bytes]:
+        """Render a poster and store its image and renditions, returning the stored references and the image"""
+        result = await self.imagen_service.generate_poster(
+            enhanced_prompt,
+            logo,
+            logo_position,
+            encoding
+        )
+
+        if not result.get("success"):
+            raise PosterGenerationError("Failed to generate poster")
+
+        # Store the image once in the blob store; the document only keeps a reference
+        image_bytes = result["image_bytes"]
+        rendered = {
+            "image_ref": await get_blob_store().put(image_bytes),
+            "image_size": len(image_bytes),
+            "image_format": result["image_format"],
+            "renditions": await rendition_service.store(result.get("renditions", {})),
+            "style": result["style"],
+            "dimensions": result["dimensions"]
+        }
+        return rendered, image_bytes
+
+    async def generate(self, request: Dict[str, Any]) -> Tuple[GeneratedPoster, Optional[bytes]]:
+        """
+        Generate and save a poster, returning the document and the full-size image.
+        The image is None when the render came from the render cache; it is then
+        only in the blob store, under the poster's image_ref.
+        """
+        self.validate(request)
+        encoding = self.encoding(request)
+
+        enhanced_prompt = request["enhanced_prompt"]
+        logo = await self.resolve_logo(request)
+        logo_position = request.get("logo_position")
+
+        key = self.imagen_service.render_input_key(enhanced_prompt, logo, logo_position, encoding)
+        if request.get("bypass_cache", False):
+            self.render_cache.record_bypass()
+            rendered = None
+        else:
+            rendered = await self.render_cache.get(key)
+            if rendered is not None and not await get_blob_store().exists(rendered["image_ref"]):
+                # The image is gone from the blob store, so render it again
+                await self.render_cache.invalidate(key)
+                rendered = None
+
+        image_bytes = None
+        if rendered is None:
+            rendered, image_bytes = await self._render(enhanced_prompt, logo, logo_position, encoding)
+            await self.render_cache.set(key, rendered)
+
+        poster = GeneratedPoster(
+            user_prompt=request.get("user_prompt", ""),
+            enhanced_prompt=enhanced_prompt,
+            keywords=request.get("keywords", []),
+            logo_id=logo.id if logo else None,
+            logo_position=logo_position,
+            image_ref=rendered["image_ref"],
+            image_size=rendered["image_size"],
+            image_format=rendered["image_format"],
+            renditions=rendered["renditions"],
+            style=rendered["style"],
+            dimensions=rendered["dimensions"],
+            session_id=request["session_id"]
+        )
+
+        db = get_database()
+        await db.generated_posters.insert_one(poster.dict())
+
+        return poster, image_bytes
+
+    async def run_job(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Job queue handler: generate a poster and return what the job records as its result"""
+        poster, _ = await self.generate(params)
+        return {
+            "poster_id": poster.id,
+            "style": poster.style,
+            "dimensions": poster.dimensions,
+            "image_format": poster.image_format
+        }
+
+
+# Shared pipeline used by the routes and job workers
+poster_pipeline = PosterPipeline()
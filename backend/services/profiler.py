@@ -0,0 +1,197 @@
+import io
+import os
+import sys
+import time
+import uuid
+import pstats
+import asyncio
+import cProfile
+import threading
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Upper bound for one sampling run, whatever the caller asks for
+PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', 60))
+# Deterministic call profiles kept in memory for GET /admin/profile/calls
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 20))
+# Functions listed per section of a call profile, by cumulative time
+PROFILE_TOP_FUNCTIONS = int(os.environ.get('PROFILE_TOP_FUNCTIONS', 40))
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile of the same kind is already running"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame) -> str:
+    """A frame's stack, outermost first, joined by ';' as flamegraph tools expect"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for the whole process.
+
+    A background thread reads every thread's current stack with
+    sys._current_frames() at a fixed interval for a bounded time and counts
+    identical stacks. Nothing is hooked into the interpreter, so the running
+    server is barely slowed down while sampling and not at all otherwise: the
+    thread only exists for the duration of a profile.
+
+    Render workers in separate processes (RENDER_EXECUTOR=process) are not
+    visible; with the thread executor their stacks are included.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def _sample(self, seconds: float, interval: float) -> Tuple[Counter, int]:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stacks[f"{names.get(ident, ident)};{collapse_stack(frame)}"] += 1
+            samples += 1
+            time.sleep(interval)
+        return stacks, samples
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, seconds: float, interval: float = 0.005) -> Tuple[str, int]:
+        """
+        Sample for up to PROFILE_MAX_SECONDS and return (collapsed stacks, sample count).
+        Each line is "thread;outer;...;inner count", ready for flamegraph.pl or speedscope.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A sampling profile is already running")
+        try:
+            seconds = min(max(seconds, 0.0), PROFILE_MAX_SECONDS)
+            stacks, samples = await asyncio.to_thread(self._sample, seconds, max(interval, 0.001))
+        finally:
+            self._lock.release()
+
+        collapsed = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        return collapsed, samples
+
+
+def format_stats(profiler: cProfile.Profile, limit: int = None) -> str:
+    """The top functions of a cProfile run by cumulative time, as pstats prints them"""
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit or PROFILE_TOP_FUNCTIONS)
+    return stream.getvalue()
+
+
+def run_profiled(fn: Callable[..., Any], *args) -> Tuple[Any, str]:
+    """
+    Run fn(*args) under cProfile and return (result, report). Module level so
+    render workers can run it, including in another process.
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args)
+    return result, format_stats(profiler)
+
+
+# The call profile recording in the current request, if any
+_current_profile: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_profile", default=None)
+
+
+class CallProfiler:
+    """
+    Deterministic profiles of single service calls.
+
+    profile() runs cProfile on the event loop thread for the duration of one
+    call. cProfile sees everything that thread runs, so coroutines of other
+    requests interleaved with the call show up too. Work the call hands to the
+    render executor runs in another thread or process; the renderer checks
+    active() and profiles its own part there, which is added as a separate
+    section with add_section().
+
+    The profile hook is per thread, so only one call is profiled at a time.
+    """
+
+    def __init__(self, keep: int = None):
+        self.keep = keep or PROFILE_KEEP
+        self._lock = asyncio.Lock()
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def active(self) -> bool:
+        """Whether the current request is being profiled"""
+        return _current_profile.get() is not None
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def add_section(self, name: str, report: Optional[str]):
+        """Attach a report measured elsewhere (e.g. a render worker) to the current profile"""
+        profile = _current_profile.get()
+        if profile is not None and report:
+            profile["sections"][name] = report
+
+    def new_id(self) -> str:
+        return str(uuid.uuid4())
+
+    @asynccontextmanager
+    async def profile(self, target: str, profile_id: Optional[str] = None):
+        """Profile the enclosed call; the report is kept under the yielded profile's id"""
+        if self.busy:
+            raise ProfilerBusyError("Another call is already being profiled")
+
+        async with self._lock:
+            profile = {
+                "id": profile_id or self.new_id(),
+                "target": target,
+                "started_at": datetime.utcnow(),
+                "sections": {}
+            }
+            token = _current_profile.set(profile)
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                yield profile
+            finally:
+                profiler.disable()
+                _current_profile.reset(token)
+                profile["duration_seconds"] = round(time.perf_counter() - start, 6)
+                profile["sections"] = {"event_loop": format_stats(profiler), **profile["sections"]}
+                self._store(profile)
+
+    def _store(self, profile: Dict[str, Any]):
+        self._profiles[profile["id"]] = profile
+        while len(self._profiles) > self.keep:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return self._profiles.get(profile_id)
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """Stored profiles without their reports, newest first"""
+        return [
+            {key: value for key, value in profile.items() if key != "sections"}
+            for profile in reversed(self._profiles.values())
+        ]
+
+
+# Process-wide profilers used by the admin routes and the renderer
+sampling_profiler = SamplingProfiler()
+call_profiler = CallProfiler()
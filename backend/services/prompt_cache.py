@@ -0,0 +1,125 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from database import get_database
+
+PROMPT_CACHE_COLLECTION = "prompt_cache"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case- and whitespace-insensitive form of a prompt"""
+    return " ".join(prompt.lower().split())
+
+
+def prompt_cache_key(prompt: str, model: str, system_version: str) -> str:
+    raw = "\x1f".join((model, system_version, normalize_prompt(prompt)))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class PromptCache:
+    """
+    Two-tier cache of prompt enhancement results.
+
+    The first tier is a bounded in-process LRU with a TTL. The second is a Mongo
+    collection shared by every worker; its documents carry expires_at and are
+    removed by a TTL index. Failures of the shared tier are logged and treated
+    as misses so the cache can never fail a request.
+    """
+
+    def __init__(self, max_entries: int = None, ttl_seconds: int = None, collection: str = PROMPT_CACHE_COLLECTION):
+        self.max_entries = max_entries or int(os.environ.get('PROMPT_CACHE_SIZE', 1024))
+        self.ttl_seconds = ttl_seconds or int(os.environ.get('PROMPT_CACHE_TTL_SECONDS', 24 * 3600))
+        self.collection = collection
+        self._local: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Dict[str, Any], ttl_seconds: float):
+        self._local[key] = (time.monotonic() + ttl_seconds, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._get_local(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        try:
+            db = get_database()
+            document = await db[self.collection].find_one(
+                {"key": key, "expires_at": {"$gt": datetime.utcnow()}},
+                {"_id": 0, "value": 1, "expires_at": 1}
+            )
+        except Exception as e:
+            print(f"Error reading prompt cache: {str(e)}")
+            document = None
+
+        if document is None:
+            self.misses += 1
+            return None
+
+        self.shared_hits += 1
+        remaining = (document["expires_at"] - datetime.utcnow()).total_seconds()
+        self._set_local(key, document["value"], min(remaining, self.ttl_seconds))
+        return document["value"]
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        self._set_local(key, value, self.ttl_seconds)
+
+        try:
+            db = get_database()
+            now = datetime.utcnow()
+            await db[self.collection].update_one(
+                {"key": key},
+                {"$set": {
+                    "key": key,
+                    "value": value,
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=self.ttl_seconds)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Error writing prompt cache: {str(e)}")
+
+    def record_bypass(self):
+        self.bypassed += 1
+
+    def clear_local(self):
+        self._local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.shared_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "shared_hits": self.shared_hits,
+            "hits": hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "entries": len(self._local),
+            "max_entries": self.max_entries,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+
+prompt_cache = PromptCache()
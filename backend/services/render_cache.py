@@ -0,0 +1,204 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+
+from database import get_database
+
+RENDER_CACHE_COLLECTION = "render_cache"
+
+# Holds the cache generation shared by every worker, as {"_id": collection, "generation": n}
+RENDER_CACHE_META_COLLECTION = "render_cache_meta"
+
+# How often a worker re-reads the shared generation, i.e. how long another
+# worker's invalidation can take to clear this worker's in-process entries
+RENDER_CACHE_GENERATION_CHECK_SECONDS = float(os.environ.get('RENDER_CACHE_GENERATION_CHECK_SECONDS', 5))
+
+
+class RenderCache:
+    """
+    Cache of finished renders, keyed by the canonical hash of the render inputs
+    (ImagenService.render_input_key). Values only hold blob store references,
+    formats and sizes, never image bytes.
+
+    A bounded in-process LRU sits in front of a Mongo collection shared by every
+    worker. The collection is trimmed least-recently-used first once it holds
+    more than max_entries; last_used_at is refreshed on shared-tier hits.
+
+    Every entry records the renderer version that produced it. Lookups only
+    match the current version, and purge_stale() deletes the rest, so bumping
+    the renderer version invalidates old renders.
+
+    invalidate() bumps a generation counter kept in Mongo. Shared entries are
+    stamped with the generation they were written in and lookups only match the
+    current one, so a render that finishes after an invalidation cannot bring a
+    stale entry back. Each worker re-reads the generation at most every
+    RENDER_CACHE_GENERATION_CHECK_SECONDS and clears its in-process LRU when it
+    has moved, so an invalidation reaches every worker within that interval.
+    """
+
+    def __init__(self, renderer_version: str, max_local: int = None, max_entries: int = None,
+                 collection: str = RENDER_CACHE_COLLECTION):
+        self.renderer_version = renderer_version
+        self.max_local = max_local or int(os.environ.get('RENDER_CACHE_SIZE', 512))
+        self.max_entries = max_entries or int(os.environ.get('RENDER_CACHE_MAX_ENTRIES', 10000))
+        self.collection = collection
+        self._local: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation = 0
+        self._generation_checked_at = None
+
+    def _adopt_generation(self, generation: int):
+        if generation != self.generation:
+            self._local.clear()
+            self.generation = generation
+        self._generation_checked_at = time.monotonic()
+
+    async def _sync_generation(self, db):
+        """Pick up an invalidation made by any worker, at most every check interval"""
+        checked_at = self._generation_checked_at
+        if checked_at is not None and time.monotonic() - checked_at < RENDER_CACHE_GENERATION_CHECK_SECONDS:
+            return
+
+        meta = await db[RENDER_CACHE_META_COLLECTION].find_one({"_id": self.collection})
+        self._adopt_generation(meta["generation"] if meta else 0)
+
+    def _set_local(self, key: str, value: Dict[str, Any]):
+        self._local[key] = value
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        db = get_database()
+        try:
+            await self._sync_generation(db)
+        except Exception as e:
+            print(f"Error reading render cache generation: {str(e)}")
+
+        value = self._local.get(key)
+        if value is not None:
+            self._local.move_to_end(key)
+            self.memory_hits += 1
+            return value
+
+        try:
+            document = await db[self.collection].find_one_and_update(
+                {"key": key, "renderer_version": self.renderer_version, "generation": self.generation},
+                {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"hits": 1}}
+            )
+        except Exception as e:
+            print(f"Error reading render cache: {str(e)}")
+            document = None
+
+        if document is None:
+            self.misses += 1
+            return None
+
+        self.shared_hits += 1
+        self._set_local(key, document["value"])
+        return document["value"]
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        self._set_local(key, value)
+
+        try:
+            db = get_database()
+            now = datetime.utcnow()
+            # Stamped with the generation this worker knows; if another worker
+            # has invalidated since, lookups will not match the entry
+            await db[self.collection].update_one(
+                {"key": key},
+                {"$set": {
+                    "key": key,
+                    "renderer_version": self.renderer_version,
+                    "generation": self.generation,
+                    "value": value,
+                    "created_at": now,
+                    "last_used_at": now,
+                    "hits": 0
+                }},
+                upsert=True
+            )
+            await self._trim(db)
+        except Exception as e:
+            print(f"Error writing render cache: {str(e)}")
+
+    async def _trim(self, db):
+        """Evict the least recently used shared entries beyond max_entries"""
+        excess = await db[self.collection].estimated_document_count() - self.max_entries
+        if excess <= 0:
+            return
+
+        oldest = db[self.collection].find({}, {"_id": 0, "key": 1}).sort("last_used_at", 1).limit(excess)
+        keys = [document["key"] async for document in oldest]
+        result = await db[self.collection].delete_many({"key": {"$in": keys}})
+        self.evictions += result.deleted_count
+        for key in keys:
+            self._local.pop(key, None)
+
+    async def invalidate(self, key: Optional[str] = None) -> int:
+        """
+        Drop one entry, or every entry when key is None; returns the number of
+        shared entries removed. Dropping every entry bumps the shared generation,
+        so it also reaches the in-process entries of other workers; dropping one
+        only clears this worker's copy and the shared entry.
+        """
+        db = get_database()
+        if key is not None:
+            self._local.pop(key, None)
+            query = {"key": key}
+        else:
+            meta = await db[RENDER_CACHE_META_COLLECTION].find_one_and_update(
+                {"_id": self.collection},
+                {"$inc": {"generation": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            self._adopt_generation(meta["generation"])
+            query = {}
+
+        result = await db[self.collection].delete_many(query)
+        self.invalidations += result.deleted_count
+        return result.deleted_count
+
+    async def purge_stale(self) -> int:
+        """Delete entries rendered by any other renderer version or written before the last invalidation"""
+        db = get_database()
+        self._generation_checked_at = None
+        await self._sync_generation(db)
+        result = await db[self.collection].delete_many({"$or": [
+            {"renderer_version": {"$ne": self.renderer_version}},
+            {"generation": {"$ne": self.generation}}
+        ]})
+        self.invalidations += result.deleted_count
+        return result.deleted_count
+
+    def record_bypass(self):
+        self.bypassed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.shared_hits
+        lookups = hits + self.misses
+        return {
+            "renderer_version": self.renderer_version,
+            "generation": self.generation,
+            "memory_hits": self.memory_hits,
+            "shared_hits": self.shared_hits,
+            "hits": hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._local),
+            "max_entries": self.max_entries,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,132 @@
+import os
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from services.font_registry import warm_fonts
+
+
+class RenderQueueFullError(Exception):
+    """Raised when the render executor already holds its maximum number of jobs"""
+
+
+class WorkerStatsBoard:
+    """
+    Latest cache statistics reported by each render worker.
+
+    Worker-side caches live in the worker processes, so renders hand back a
+    snapshot (see worker_snapshot) and the parent keeps the newest one per pid.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[int, Dict[str, Dict[str, Any]]] = {}
+
+    def record(self, snapshot: Optional[Dict[str, Any]]):
+        if snapshot:
+            self._snapshots[snapshot["pid"]] = snapshot["caches"]
+
+    def totals(self) -> Dict[str, Dict[str, Any]]:
+        """Sum every cache's counters across workers and add a hit ratio"""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for caches in self._snapshots.values():
+            for name, stats in caches.items():
+                merged = totals.setdefault(name, {})
+                for field, value in stats.items():
+                    merged[field] = merged.get(field, 0) + value
+
+        for merged in totals.values():
+            lookups = merged.get("hits", 0) + merged.get("misses", 0)
+            merged["hit_ratio"] = round(merged.get("hits", 0) / lookups, 4) if lookups else 0.0
+            merged["workers"] = len(self._snapshots)
+
+        return totals
+
+
+def worker_snapshot(**caches) -> Dict[str, Any]:
+    """Stats of the given worker-side caches, tagged with this process id"""
+    return {
+        "pid": os.getpid(),
+        "caches": {name: cache.stats() for name, cache in caches.items()}
+    }
+
+
+class RenderExecutor:
+    """
+    Runs CPU-bound Pillow work off the event loop.
+
+    Uses a process pool by default (RENDER_EXECUTOR=process) or a thread pool
+    (RENDER_EXECUTOR=thread). The pool is created lazily on first use so that
+    importing this module never forks or spawns anything.
+    """
+
+    def __init__(self, kind: Optional[str] = None, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 initializer: Optional[Callable[[], None]] = warm_fonts):
+        self.kind = (kind or os.environ.get('RENDER_EXECUTOR', 'process')).lower()
+        if self.kind not in ('process', 'thread'):
+            raise ValueError(f"Unknown render executor kind: {self.kind}")
+        self.max_workers = max_workers or int(os.environ.get('RENDER_WORKERS', min(4, os.cpu_count() or 1)))
+        # Jobs that are running or waiting for a worker; anything beyond this is rejected
+        self.max_pending = max_pending or int(os.environ.get('RENDER_QUEUE_DEPTH', 32))
+        # Runs once in every worker before its first job (fonts, caches)
+        self.initializer = initializer
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.worker_stats = WorkerStatsBoard()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'thread':
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='render',
+                    initializer=self.initializer
+                )
+            else:
+                # spawn keeps workers free of the parent's event loop and Mongo client state
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=self.initializer
+                )
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool and await its result"""
+        if self._pending >= self.max_pending:
+            raise RenderQueueFullError(
+                f"Render queue is full ({self._pending}/{self.max_pending} jobs pending)"
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(fn, *args, **kwargs)
+            return await loop.run_in_executor(self._get_executor(), call)
+        finally:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Current executor configuration and queue depth"""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "started": self._executor is not None
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the pool; queued jobs that have not started are cancelled"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+# Shared executor used by every rendering service
+render_executor = RenderExecutor()
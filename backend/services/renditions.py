@@ -0,0 +1,135 @@
+import io
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from database import get_database
+from services.blob_store import get_blob_store
+from services.image_codec import encode_image, from_data_uri, ImageEncoding, OUTPUT_FORMATS
+from services.render_executor import render_executor
+from services.metrics import record_encodes
+
+# Bounding boxes for the smaller renditions; aspect ratio is preserved
+RENDITION_SIZES = {
+    "thumb": (200, 300),
+    "medium": (400, 600),
+}
+SIZES = ("full",) + tuple(RENDITION_SIZES)
+FORMATS = OUTPUT_FORMATS
+
+# Renditions produced together with the master image on /generate
+EAGER_RENDITIONS = tuple(
+    size for size in os.environ.get('POSTER_EAGER_RENDITIONS', 'thumb,medium').split(',') if size in RENDITION_SIZES
+)
+
+
+def rendition_key(size: str, image_format: str) -> str:
+    return f"{size}_{image_format}"
+
+
+def resize_image(image: Image.Image, size: str) -> Image.Image:
+    """Scale an image down to fit the rendition's bounding box"""
+    if size == "full":
+        return image
+    resized = image.copy()
+    resized.thumbnail(RENDITION_SIZES[size], Image.Resampling.LANCZOS)
+    return resized
+
+
+def render_rendition(master_bytes: bytes, size: str, image_format: str) -> Tuple[bytes, int, int, List[Dict[str, Any]]]:
+    """
+    Decode the master image and encode one rendition (runs inside a render
+    worker); returns the bytes, dimensions and the encode log
+    """
+    encodes = []
+    image = resize_image(Image.open(io.BytesIO(master_bytes)), size)
+    return encode_image(image, image_format, encodes), image.width, image.height, encodes
+
+
+def render_eager_renditions(image: Image.Image, encoding: ImageEncoding = ImageEncoding("png"),
+                            log: Optional[List[Dict[str, Any]]] = None) -> Dict[str, dict]:
+    """Encode the eager renditions from an already drawn poster image, in the poster's encoding"""
+    renditions = {}
+    for size in EAGER_RENDITIONS:
+        resized = resize_image(image, size)
+        renditions[rendition_key(size, encoding.format)] = {
+            "image_bytes": encode_image(resized, encoding, log),
+            "image_format": encoding.format,
+            "width": resized.width,
+            "height": resized.height,
+        }
+    return renditions
+
+
+class RenditionService:
+    """
+    Looks up, and on first request creates, smaller or re-encoded copies of a
+    poster. New renditions are stored in the blob store next to the master
+    image and recorded on the poster document, so older posters gain them too.
+    """
+
+    async def store(self, renditions: Dict[str, dict]) -> Dict[str, dict]:
+        """Write rendered renditions to the blob store, returning their document entries"""
+        stored = {}
+        for key, rendition in renditions.items():
+            image_bytes = rendition["image_bytes"]
+            stored[key] = {
+                "image_ref": await get_blob_store().put(image_bytes),
+                "image_size": len(image_bytes),
+                "image_format": rendition["image_format"],
+                "width": rendition["width"],
+                "height": rendition["height"],
+            }
+        return stored
+
+    async def _master_bytes(self, poster: dict) -> Optional[bytes]:
+        if poster.get("image_ref"):
+            return await get_blob_store().get(poster["image_ref"])
+        if poster.get("poster_image"):
+            return from_data_uri(poster["poster_image"])[0]
+        return None
+
+    async def get_image(self, poster: dict, size: str = "full", image_format: Optional[str] = None) -> Optional[Tuple[bytes, str, Optional[str]]]:
+        """
+        Return (image bytes, format, content hash) for the requested rendition.
+        The hash is None for legacy inline images that were never stored.
+        """
+        master_format = poster.get("image_format") or "png"
+        image_format = image_format or master_format
+
+        if size == "full" and image_format == master_format:
+            image_bytes = await self._master_bytes(poster)
+            return (image_bytes, master_format, poster.get("image_ref")) if image_bytes is not None else None
+
+        key = rendition_key(size, image_format)
+        existing = (poster.get("renditions") or {}).get(key)
+        if existing:
+            image_bytes = await get_blob_store().get(existing["image_ref"])
+            if image_bytes is not None:
+                return image_bytes, existing["image_format"], existing["image_ref"]
+
+        master_bytes = await self._master_bytes(poster)
+        if master_bytes is None:
+            return None
+
+        image_bytes, width, height, encodes = await render_executor.run(render_rendition, master_bytes, size, image_format)
+        record_encodes(encodes)
+        stored = await self.store({key: {
+            "image_bytes": image_bytes,
+            "image_format": image_format,
+            "width": width,
+            "height": height,
+        }})
+
+        db = get_database()
+        await db.generated_posters.update_one(
+            {"id": poster["id"]},
+            {"$set": {f"renditions.{key}": stored[key]}}
+        )
+        poster.setdefault("renditions", {})[key] = stored[key]
+
+        return image_bytes, image_format, stored[key]["image_ref"]
+
+
+rendition_service = RenditionService()
@@ -0,0 +1,130 @@
+"""
+Parsing of enhancement replies into (enhanced prompt, keywords), for whole
+replies and incrementally for streamed ones. Kept apart from the Gemini
+service so it can be used and tested without an LLM client.
+"""
+
+from typing import Callable, List, Tuple
+
+from services.metrics import timed
+
+
+def parse_response(response: str) -> Tuple[str, List[str]]:
+    """Parse Gemini response to extract enhanced prompt and keywords"""
+    try:
+        # Split response into prompt and keywords
+        lines = response.strip().split('\n')
+
+        # Find the enhanced prompt (usually the main content)
+        enhanced_prompt = ""
+        keywords_line = ""
+
+        for line in lines:
+            if line.strip() and not line.lower().startswith('keywords'):
+                enhanced_prompt += line.strip() + " "
+            elif line.lower().startswith('keywords') or ',' in line:
+                keywords_line = line
+                break
+
+        # Clean up enhanced prompt
+        enhanced_prompt = enhanced_prompt.strip()
+
+        # Extract keywords
+        keywords = []
+        if keywords_line:
+            # Remove "Keywords:" prefix and split by comma
+            keywords_text = keywords_line.replace("Keywords:", "").replace("keywords:", "").strip()
+            keywords = [k.strip() for k in keywords_text.split(',') if k.strip()]
+
+        # If no keywords found, extract from the enhanced prompt
+        if not keywords:
+            keywords = extract_keywords_from_text(enhanced_prompt)
+
+        return enhanced_prompt, keywords[:10]  # Limit to 10 keywords
+
+    except Exception as e:
+        print(f"Error parsing response: {str(e)}")
+        return response, []
+
+
+def extract_keywords_from_text(text: str) -> List[str]:
+    """Extract keywords from text using simple word frequency"""
+    # Simple keyword extraction - can be improved with NLP
+    common_design_words = [
+        'vintage', 'modern', 'minimalist', 'bold', 'elegant', 'creative',
+        'dynamic', 'professional', 'artistic', 'colorful', 'typography',
+        'geometric', 'abstract', 'retro', 'contemporary', 'sleek',
+        'vibrant', 'dramatic', 'subtle', 'sophisticated'
+    ]
+
+    text_lower = text.lower()
+    found_keywords = []
+
+    for word in common_design_words:
+        if word in text_lower:
+            found_keywords.append(word)
+
+    return found_keywords[:8]
+
+
+class IncrementalResponseParser:
+    """
+    Incremental version of parse_response for streamed replies.
+    
+    feed() returns the part of the enhanced prompt that is certain given the
+    text so far; a line is held back only while it could still turn out to be
+    the keywords line. finish() parses the complete reply with
+    parse_response, so the final result matches the non-streaming path.
+    """
+    
+    KEYWORDS_PREFIX = "keywords"
+    
+    def __init__(self, parse: Callable[[str], Tuple[str, List[str]]] = None):
+        self._parse = parse or parse_response
+        self._chunks = []
+        self._line = ""
+        self._emitted = 0
+        self._seen_content = False
+        self._done = False
+    
+    def _flush_line(self, complete: bool) -> str:
+        if self._done:
+            return ""
+        
+        # The whole reply is stripped before parsing, so only the first
+        # content line ignores its leading whitespace
+        line = self._line if self._seen_content else self._line.lstrip()
+        lower = line.lower()
+        if not complete and len(lower) < len(self.KEYWORDS_PREFIX) and self.KEYWORDS_PREFIX.startswith(lower):
+            return ""
+        if lower.startswith(self.KEYWORDS_PREFIX):
+            self._done = True
+            return ""
+        
+        stripped = line.strip()
+        if stripped:
+            self._seen_content = True
+        text = stripped[self._emitted:]
+        self._emitted = len(stripped)
+        if complete and stripped:
+            text += " "
+        return text
+    
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of model output and return newly certain prompt text"""
+        self._chunks.append(chunk)
+        out = []
+        parts = chunk.split('\n')
+        for index, part in enumerate(parts):
+            self._line += part
+            complete = index < len(parts) - 1
+            out.append(self._flush_line(complete))
+            if complete:
+                self._line = ""
+                self._emitted = 0
+        return "".join(out)
+    
+    def finish(self) -> Tuple[str, List[str]]:
+        """Parse the complete reply into (enhanced prompt, keywords)"""
+        with timed("parse_response"):
+            return self._parse("".join(self._chunks))
@@ -0,0 +1,140 @@
+import os
+import hmac
+import json
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+TRACE_VERSION = 1
+
+# Path params, body fields and query params holding ids; recorded as stable tokens
+ID_FIELDS = {"session_id", "poster_id", "job_id", "logo_id"}
+# Fields whose values are a small fixed vocabulary and are kept as they are
+KEEP_VALUES = {"logo_position", "image", "size", "format", "fields", "poster_limit", "message_limit", "content_type"}
+# Opaque pagination cursors; only their presence is recorded
+CURSOR_FIELDS = {"poster_cursor", "message_cursor", "cursor"}
+# Request headers that change the response (partial, negotiated or conditional); lower case
+TRACED_HEADERS = ("range", "accept", "accept-encoding", "if-none-match")
+# Longer header values are cut, so an unusual client cannot bloat every line
+HEADER_MAX_LENGTH = 200
+
+# Responses that create something, and the field holding its id: {route: (response field, id kind)}
+CREATES = {
+    "/api/poster/generate": ("id", "poster_id"),
+    "/api/jobs": ("job_id", "job_id"),
+    "/api/logos": ("logo_id", "logo_id"),
+}
+
+
+class TraceRecorder:
+    """
+    Writes the shape of every request to a JSONL trace for replay
+    (scripts/replay_trace.py), without any user content.
+
+    A line holds the wall-clock time, method, route template, status,
+    duration and request/response sizes. Ids (sessions, posters, jobs,
+    logos) are replaced by keyed hashes, so the same session keeps the same
+    token and history depth is preserved. JSON bodies are reduced to their
+    structure: strings become their length and a short keyed digest (so
+    repeated prompts stay repeated), except a few enum-like fields; numbers,
+    booleans and list lengths are kept. The Range, Accept and Accept-Encoding
+    headers are kept as sent; If-None-Match only records how many validators
+    it held, since ETags are derived from ids and content.
+
+    Tokens are keyed with TRACE_SALT, random per process when unset; set it
+    when several workers write to the same trace.
+    """
+
+    def __init__(self, path: str, salt: Optional[str] = None, sample_rate: float = 1.0):
+        self.path = path
+        self.salt = (salt or os.urandom(16).hex()).encode()
+        self.sample_rate = sample_rate
+        self.recorded = 0
+        self._sample_budget = 0.0
+        # Line buffered; each request is one short write, appended atomically
+        self._file = open(path, "a", buffering=1)
+        self._write({"trace": "kala", "version": TRACE_VERSION, "started_at": datetime.utcnow().isoformat(), "pid": os.getpid()})
+
+    @classmethod
+    def from_env(cls) -> Optional["TraceRecorder"]:
+        """A recorder when TRACE_RECORD_PATH is set, else None (and no middleware)"""
+        path = os.environ.get('TRACE_RECORD_PATH')
+        if not path:
+            return None
+        return cls(
+            path,
+            salt=os.environ.get('TRACE_SALT'),
+            sample_rate=float(os.environ.get('TRACE_SAMPLE_RATE', 1.0))
+        )
+
+    def sampled(self) -> bool:
+        """Deterministic sampling: every 1/sample_rate-th request"""
+        self._sample_budget += self.sample_rate
+        if self._sample_budget >= 1.0:
+            self._sample_budget -= 1.0
+            return True
+        return False
+
+    def _digest(self, value: str) -> str:
+        return hmac.new(self.salt, value.encode(), hashlib.sha256).hexdigest()
+
+    def token(self, kind: str, value: Any) -> str:
+        return f"{kind}:{self._digest(f'{kind}:{value}')[:16]}"
+
+    def shape(self, value: Any, key: Optional[str] = None) -> Any:
+        """Reduce a JSON value to its structure"""
+        if isinstance(value, dict):
+            return {k: self.shape(v, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.shape(item, key) for item in value]
+        if isinstance(value, str):
+            if key in ID_FIELDS:
+                return {"$id": self.token(key, value)}
+            if key in KEEP_VALUES:
+                return value
+            if key in CURSOR_FIELDS:
+                return {"$cursor": True}
+            # The short digest keeps repeats visible (cache hit rates) without the text
+            return {"$str": len(value), "$h": self._digest(value)[:8]}
+        return value
+
+    def header_shape(self, name: str, value: str) -> Any:
+        if name == "if-none-match":
+            return {"$etags": len([tag for tag in value.split(",") if tag.strip()])}
+        return value[:HEADER_MAX_LENGTH]
+
+    def record(self, started: float, duration: float, method: str, route: str, status: int,
+               path_params: Dict[str, Any], query: Dict[str, str], request_bytes: int,
+               response_bytes: int, body: Any = None, created: Optional[str] = None,
+               headers: Optional[Dict[str, str]] = None):
+        line = {
+            "ts": round(started, 6),
+            "method": method,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "request_bytes": request_bytes,
+            "response_bytes": response_bytes,
+        }
+        if path_params:
+            line["path"] = {key: self.shape(value, key) for key, value in path_params.items()}
+        if query:
+            line["query"] = {key: self.shape(value, key) for key, value in query.items()}
+        if headers:
+            line["headers"] = {name: self.header_shape(name, value) for name, value in headers.items()}
+        if body is not None:
+            line["body"] = self.shape(body)
+        if created is not None and route in CREATES:
+            kind = CREATES[route][1]
+            line["created"] = {"$id": self.token(kind, created)}
+        self._write(line)
+        self.recorded += 1
+
+    def _write(self, line: Dict[str, Any]):
+        try:
+            self._file.write(json.dumps(line, separators=(",", ":")) + "\n")
+        except Exception as e:
+            print(f"Error writing request trace: {str(e)}")
+
+    def close(self):
+        self._file.close()
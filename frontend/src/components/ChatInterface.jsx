@@ -13,6 +13,46 @@ import axios from "axios";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
+// Reads the Server-Sent Events from /enhance-prompt/stream, calling onToken for
+// each piece of the prompt, and resolves with the final keywords event
+const streamEnhancePrompt = async (body, onToken) => {
+  const response = await fetch(`${BACKEND_URL}/api/poster/enhance-prompt/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok) {
+    throw new Error(`Enhance request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      const event = rawEvent.match(/^event: (.*)$/m)?.[1];
+      const data = JSON.parse(rawEvent.match(/^data: (.*)$/m)?.[1] || "{}");
+      if (event === "token") {
+        onToken(data.text);
+      } else if (event === "keywords") {
+        return data;
+      } else if (event === "error") {
+        throw new Error(data.detail);
+      }
+    }
+  }
+  throw new Error("Enhance stream ended early");
+};
+
 const ChatInterface = ({ onAddToHistory, onGeneratePoster }) => {
   const [messages, setMessages] = useState([]);
   const [inputValue, setInputValue] = useState("");
@@ -47,29 +87,48 @@ const ChatInterface = ({ onAddToHistory, onGeneratePoster }) => {
     setInputValue("");
     setIsLoading(true);
 
+    const streamingMessage = {
+      type: "ai",
+      content: "",
+      keywords: [],
+      timestamp: new Date().toISOString(),
+    };
+    // Replaces the in-progress AI message, which is always the last one
+    const updateStreamingMessage = (update) => {
+      setMessages(prev => [...prev.slice(0, -1), { ...prev[prev.length - 1], ...update }]);
+    };
+
     try {
-      // Call backend API for prompt enhancement
-      const response = await axios.post(`${BACKEND_URL}/api/poster/enhance-prompt`, {
-        user_prompt: inputValue,
-        session_id: Date.now().toString() // Simple session ID for now
-      });
+      // Stream the enhanced prompt into the chat as it is written
+      setMessages(prev => [...prev, streamingMessage]);
+      let streamedText = "";
+      const enhanced = await streamEnhancePrompt(
+        {
+          user_prompt: inputValue,
+          session_id: Date.now().toString() // Simple session ID for now
+        },
+        (text) => {
+          streamedText += text;
+          updateStreamingMessage({ content: streamedText });
+        }
+      );
 
-      const enhanced = response.data;
       setEnhancedPrompt(enhanced.enhanced_prompt);
       setKeywords(enhanced.keywords);
       
       const aiMessage = {
-        type: "ai",
+        ...streamingMessage,
         content: enhanced.enhanced_prompt,
         keywords: enhanced.keywords,
-        timestamp: new Date().toISOString(),
       };
       
-      setMessages(prev => [...prev, aiMessage]);
+      updateStreamingMessage(aiMessage);
       onAddToHistory(aiMessage);
       setCurrentStep("prompt");
     } catch (error) {
       console.error('Error enhancing prompt:', error);
+      // Drop the partial AI message
+      setMessages(prev => prev.filter(m => !(m.type === "ai" && m.timestamp === streamingMessage.timestamp)));
       toast.error("Failed to enhance prompt. Please try again.");
     } finally {
       setIsLoading(false);
@@ -143,13 +202,16 @@ const ChatInterface = ({ onAddToHistory, onGeneratePoster }) => {
         session_id: Date.now().toString(),
         user_prompt: messages.filter(m => m.type === "user").pop()?.content || "",
         keywords: keywords,
-        logo: uploadedLogo,
+        // Uploaded logos are referenced by id; inline data is only sent if the upload failed
+        logo_id: uploadedLogo?.id,
+        logo: uploadedLogo?.id ? undefined : uploadedLogo,
         logo_position: selectedPosition
       });
 
       const poster = {
         id: response.data.id,
         image: response.data.poster_image,
+        imageUrl: response.data.poster_image_url,
         prompt: enhancedPrompt,
         logo: uploadedLogo,
         logoPosition: selectedPosition,
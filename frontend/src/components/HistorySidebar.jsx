@@ -6,10 +6,20 @@ import { ScrollArea } from "./ui/scroll-area";
 import { Badge } from "./ui/badge";
 import { X, Clock, Image, MessageSquare, Download } from "lucide-react";
 
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+// The list only needs the small rendition; the full image is only used for download
+const thumbnailSrc = (poster) => {
+  if (!poster.imageUrl) return poster.image;
+  const separator = poster.imageUrl.includes("?") ? "&" : "?";
+  return `${BACKEND_URL}${poster.imageUrl}${separator}size=thumb`;
+};
+
 const HistorySidebar = ({ isOpen, onClose, chatHistory, generatedPosters }) => {
   const handleDownload = (poster) => {
     const link = document.createElement("a");
-    link.href = poster.image;
+    // The full image is already in memory; a cross-origin URL would ignore link.download
+    link.href = poster.image || `${BACKEND_URL}${poster.imageUrl}`;
     link.download = `kala-poster-${poster.id}.png`;
     document.body.appendChild(link);
     link.click();
@@ -77,8 +87,9 @@ const HistorySidebar = ({ isOpen, onClose, chatHistory, generatedPosters }) => {
                           <Card className="overflow-hidden hover:shadow-lg transition-shadow cursor-pointer">
                             <div className="relative">
                               <img
-                                src={poster.image}
+                                src={thumbnailSrc(poster)}
                                 alt="Generated poster"
+                                loading="lazy"
                                 className="w-full h-32 object-cover"
                               />
                               <div className="absolute inset-0 bg-black/0 group-hover:bg-black/20 transition-colors flex items-center justify-center">
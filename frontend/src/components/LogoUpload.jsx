@@ -4,10 +4,22 @@ import { Card, CardContent } from "./ui/card";
 import { Button } from "./ui/button";
 import { Upload, X, Image } from "lucide-react";
 import { toast } from "sonner";
+import axios from "axios";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+// Uploads the file once; generate requests then only send its logo_id
+const uploadLogo = async (file) => {
+  const formData = new FormData();
+  formData.append("file", file);
+  const response = await axios.post(`${BACKEND_URL}/api/logos`, formData);
+  return response.data.logo_id;
+};
 
 const LogoUpload = ({ onUpload }) => {
   const [dragActive, setDragActive] = useState(false);
   const [preview, setPreview] = useState(null);
+  const [uploadedLogo, setUploadedLogo] = useState(null);
   const fileInputRef = useRef(null);
 
   const handleDrag = (e) => {
@@ -45,20 +57,26 @@ const LogoUpload = ({ onUpload }) => {
     }
 
     const reader = new FileReader();
-    reader.onload = (e) => {
+    reader.onload = async (e) => {
       const base64 = e.target.result;
       setPreview(base64);
-      
-      // Simulate processing
-      setTimeout(() => {
-        onUpload({
-          name: file.name,
-          size: file.size,
-          preview: base64,
-          base64: base64
-        });
-        toast.success("Logo uploaded successfully!");
-      }, 1000);
+
+      const logo = {
+        name: file.name,
+        size: file.size,
+        preview: base64,
+      };
+      try {
+        logo.id = await uploadLogo(file);
+      } catch (error) {
+        // Fall back to sending the logo inline with the generate request
+        console.error('Error uploading logo:', error);
+        logo.base64 = base64;
+      }
+
+      setUploadedLogo(logo);
+      onUpload(logo);
+      toast.success("Logo uploaded successfully!");
     };
     reader.readAsDataURL(file);
   };
@@ -69,6 +87,7 @@ const LogoUpload = ({ onUpload }) => {
 
   const clearPreview = () => {
     setPreview(null);
+    setUploadedLogo(null);
     if (fileInputRef.current) {
       fileInputRef.current.value = "";
     }
@@ -160,7 +179,7 @@ const LogoUpload = ({ onUpload }) => {
             </Button>
             {preview && (
               <Button
-                onClick={() => onUpload({
+                onClick={() => onUpload(uploadedLogo || {
                   name: "logo.png",
                   size: 0,
                   preview: preview,
@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# The backend is run from backend/ and imports its modules as top-level packages
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Renders in tests stay in-process
+os.environ.setdefault('RENDER_EXECUTOR', 'thread')
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from services.admission import AdmissionGate, AdmissionRejectedError
+from routes.admission import acquire_or_429
+
+
+def test_admits_up_to_concurrency_then_queues():
+    async def run():
+        gate = AdmissionGate("test", max_concurrency=2, max_queue=1, max_wait_seconds=1)
+        first = await gate.acquire()
+        await gate.acquire()
+
+        waiter = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0.01)
+        queued = gate.stats()
+
+        gate.release(first)
+        await waiter
+        return gate, queued
+
+    gate, queued = asyncio.run(run())
+
+    assert queued["active"] == 2 and queued["waiting"] == 1
+    stats = gate.stats()
+    assert stats["active"] == 2 and stats["waiting"] == 0
+    assert stats["admitted"] == 3 and stats["rejected"] == 0
+
+
+def test_rejects_at_once_when_queue_is_full():
+    async def run():
+        gate = AdmissionGate("test", max_concurrency=1, max_queue=1, max_wait_seconds=5)
+        acquired = await gate.acquire()
+        waiter = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(AdmissionRejectedError) as excinfo:
+            await gate.acquire()
+
+        gate.release(acquired)
+        gate.release(await waiter)
+        return gate, excinfo.value
+
+    gate, error = asyncio.run(run())
+
+    assert "at capacity" in str(error)
+    assert error.retry_after >= 1
+    assert gate.rejected == 1
+    assert gate.stats()["active"] == 0
+
+
+def test_wait_times_out():
+    async def run():
+        gate = AdmissionGate("test", max_concurrency=1, max_queue=4, max_wait_seconds=0.05)
+        acquired = await gate.acquire()
+        with pytest.raises(AdmissionRejectedError):
+            await gate.acquire()
+        gate.release(acquired)
+        return gate
+
+    gate = asyncio.run(run())
+
+    assert gate.timed_out == 1
+    assert gate.stats()["waiting"] == 0
+
+
+def test_retry_after_grows_with_hold_time_and_queue():
+    gate = AdmissionGate("test", max_concurrency=2, max_queue=8, max_wait_seconds=1)
+    assert gate.retry_after() == 1
+
+    gate._hold_time = 3.0
+    assert gate.retry_after() == 3
+    gate._waiting = 4
+    assert gate.retry_after() == 9
+
+
+def test_from_env_overrides_defaults(monkeypatch):
+    monkeypatch.setenv("ADMISSION_SAMPLE_CONCURRENCY", "3")
+    monkeypatch.setenv("ADMISSION_SAMPLE_WAIT_SECONDS", "2.5")
+
+    gate = AdmissionGate.from_env("sample", max_concurrency=8, max_queue=16, max_wait_seconds=10)
+
+    assert (gate.max_concurrency, gate.max_queue, gate.max_wait_seconds) == (3, 16, 2.5)
+
+
+def test_rejection_becomes_429_with_retry_after():
+    async def run():
+        gate = AdmissionGate("test", max_concurrency=1, max_queue=0, max_wait_seconds=1)
+        acquired = await gate.acquire()
+        with pytest.raises(HTTPException) as excinfo:
+            await acquire_or_429(gate)
+        gate.release(acquired)
+        return excinfo.value
+
+    error = asyncio.run(run())
+
+    assert error.status_code == 429
+    assert error.headers["Retry-After"] == "1"
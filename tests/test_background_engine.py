@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from services.background_engine import blend_panel, linear_gradient, radial_gradient, to_image
+
+PURPLE_TO_CYAN = ((0.0, (147, 51, 234)), (1.0, (64, 224, 208)))
+
+
+def legacy_gradient(width, height):
+    """The per-row loop the engine replaced"""
+    image = Image.new('RGB', (width, height), color='white')
+    draw = ImageDraw.Draw(image)
+    for y in range(height):
+        r = int(147 + (64 - 147) * y / height)
+        g = int(51 + (224 - 51) * y / height)
+        b = int(234 + (208 - 234) * y / height)
+        draw.line([(0, y), (width, y)], fill=(r, g, b))
+    return np.asarray(image)
+
+
+def test_vertical_gradient_matches_the_legacy_loop():
+    assert np.array_equal(linear_gradient(80, 120, PURPLE_TO_CYAN), legacy_gradient(80, 120))
+
+
+def test_panel_matches_pil_alpha_composite():
+    """blend_panel over (x, y, w + 1, h + 1) equals PIL's inclusive rectangle [x, y, x + w, y + h]"""
+    pixels = linear_gradient(80, 120, PURPLE_TO_CYAN)
+    x, y, w, h = 10, 40, 60, 40
+
+    overlay = Image.new('RGBA', (80, 120), (255, 255, 255, 0))
+    ImageDraw.Draw(overlay).rectangle([x, y, x + w, y + h], fill=(255, 255, 255, 180))
+    expected = Image.alpha_composite(to_image(pixels).convert('RGBA'), overlay).convert('RGB')
+
+    blend_panel(pixels, (x, y, w + 1, h + 1), (255, 255, 255), 180)
+    assert np.array_equal(pixels, np.asarray(expected))
+
+
+def test_blend_panel_only_touches_its_box_and_clips():
+    pixels = np.zeros((20, 20, 3), dtype=np.uint8)
+    blend_panel(pixels, (15, 15, 10, 10), (255, 255, 255), 255)
+
+    assert (pixels[15:, 15:] == 255).all()
+    assert (pixels[:15] == 0).all() and (pixels[:, :15] == 0).all()
+
+
+@pytest.mark.parametrize("angle", [0, 90, 180, 270, 45])
+def test_linear_gradient_endpoints(angle):
+    stops = ((0.0, (0, 0, 0)), (1.0, (255, 255, 255)))
+    pixels = linear_gradient(64, 48, stops, angle=angle)
+
+    assert pixels.shape == (48, 64, 3) and pixels.dtype == np.uint8
+    assert pixels.min() <= 8 and pixels.max() >= 240
+
+
+def test_radial_gradient_is_darkest_at_the_center():
+    stops = ((0.0, (0, 0, 0)), (1.0, (255, 255, 255)))
+    pixels = radial_gradient(41, 41, stops)
+
+    assert tuple(pixels[20, 20]) == (0, 0, 0)
+    assert pixels[0, 0, 0] >= 250
+
+
+def test_stops_are_sorted_and_validated():
+    shuffled = ((1.0, (64, 224, 208)), (0.0, (147, 51, 234)))
+    assert np.array_equal(linear_gradient(4, 10, shuffled), linear_gradient(4, 10, PURPLE_TO_CYAN))
+
+    with pytest.raises(ValueError):
+        linear_gradient(4, 4, ())
+    with pytest.raises(ValueError):
+        linear_gradient(0, 4, PURPLE_TO_CYAN)
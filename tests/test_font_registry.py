@@ -0,0 +1,71 @@
+import os
+import threading
+
+import pytest
+
+from services.font_registry import FontRegistry, FONT_DIR, DEFAULT_FONT_FAMILIES, DEFAULT_FAMILY
+
+pytestmark = pytest.mark.skipif(
+    not os.path.isfile(f"{FONT_DIR}/{DEFAULT_FONT_FAMILIES[DEFAULT_FAMILY]['regular']}"),
+    reason="the default font family is not installed"
+)
+
+
+def registry_with_missing_family():
+    families = {
+        DEFAULT_FAMILY: DEFAULT_FONT_FAMILIES[DEFAULT_FAMILY],
+        "broken": {"regular": "does-not-exist.ttf", "bold": "does-not-exist-bold.ttf"},
+    }
+    return FontRegistry(families=families, sizes=(20, 40))
+
+
+def run_with_timeout(target, timeout=10):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+
+def test_missing_face_falls_back_to_default_family_without_deadlock():
+    registry = registry_with_missing_family()
+    result = {}
+
+    # The fallback re-enters get() while the registry lock is held
+    assert run_with_timeout(lambda: result.setdefault("font", registry.get("broken", "bold", 20)))
+
+    assert result["font"] is registry.get(DEFAULT_FAMILY, "bold", 20)
+    status = registry.status()
+    assert status["fonts"]["broken/bold"]["resolved"] is False
+    assert status["ready"] is False
+
+
+def test_get_while_warming():
+    registry = registry_with_missing_family()
+    fonts = []
+
+    def get_repeatedly():
+        for _ in range(50):
+            fonts.append(registry.get("broken", "regular", 40))
+
+    warming = threading.Thread(target=registry.warm, daemon=True)
+    getting = threading.Thread(target=get_repeatedly, daemon=True)
+    warming.start()
+    getting.start()
+    warming.join(10)
+    getting.join(10)
+
+    assert not warming.is_alive() and not getting.is_alive()
+    # Every caller gets the one shared instance
+    assert len({id(font) for font in fonts}) == 1
+    assert fonts[0] is registry.get(DEFAULT_FAMILY, "regular", 40)
+    # 2 families x 2 weights x 2 sizes
+    assert registry.status()["loaded"] == 8
+
+
+def test_preloaded_fonts_are_shared():
+    registry = FontRegistry(families={DEFAULT_FAMILY: DEFAULT_FONT_FAMILIES[DEFAULT_FAMILY]}, sizes=(20,))
+
+    assert run_with_timeout(registry.warm)
+
+    assert registry.get(DEFAULT_FAMILY, "regular", 20) is registry.get(DEFAULT_FAMILY, "regular", 20)
+    assert registry.status()["ready"] is True
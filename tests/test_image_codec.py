@@ -0,0 +1,95 @@
+import io
+
+import pytest
+from PIL import Image
+
+from services.image_codec import (
+    ImageEncoding, parse_encoding, negotiate_format, encode_image,
+    PNG_COMPRESS_LEVEL, WEBP_QUALITY, JPEG_QUALITY, DEFAULT_OUTPUT_FORMAT
+)
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, None),
+    ("", None),
+    ("*/*", None),
+    ("image/*", None),
+    ("application/json", None),
+    ("image/webp", "webp"),
+    ("image/png,image/webp", "webp"),
+    ("image/webp;q=0.5, image/png", "png"),
+    ("image/jpeg;q=0.9, image/png;q=0.8", "jpeg"),
+    ("image/avif,image/webp,*/*;q=0.8", "webp"),
+    ("image/webp;q=0", None),
+    ("image/png;q=abc", None),
+    ("IMAGE/PNG", "png"),
+])
+def test_negotiate_format(accept, expected):
+    assert negotiate_format(accept) == expected
+
+
+def test_parse_encoding_defaults():
+    encoding = parse_encoding({})
+
+    assert encoding.format == DEFAULT_OUTPUT_FORMAT
+    assert encoding == ImageEncoding(DEFAULT_OUTPUT_FORMAT).resolved()
+
+
+@pytest.mark.parametrize("options, expected", [
+    ({"format": "png"}, ImageEncoding("png", compress_level=PNG_COMPRESS_LEVEL)),
+    ({"format": "png", "compress_level": 1, "quality": 50}, ImageEncoding("png", compress_level=1)),
+    ({"format": "webp"}, ImageEncoding("webp", quality=WEBP_QUALITY)),
+    ({"format": "WEBP", "quality": 70}, ImageEncoding("webp", quality=70)),
+    ({"format": "webp", "lossless": True, "quality": 70}, ImageEncoding("webp", lossless=True)),
+    ({"format": "jpg"}, ImageEncoding("jpeg", quality=JPEG_QUALITY)),
+    ({"format": "jpeg", "lossless": True, "quality": 60}, ImageEncoding("jpeg", quality=60)),
+])
+def test_parse_encoding_drops_inapplicable_settings(options, expected):
+    assert parse_encoding(options) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    (True, True), (False, False), (None, False),
+    ("true", True), ("True", True), ("1", True),
+    ("false", False), ("FALSE", False), ("0", False),
+])
+def test_parse_encoding_reads_lossless_as_a_boolean(value, expected):
+    assert parse_encoding({"format": "webp", "lossless": value}).lossless is expected
+
+
+@pytest.mark.parametrize("options, message", [
+    ({"format": "gif"}, "format"),
+    ({"format": "webp", "quality": 0}, "quality"),
+    ({"format": "webp", "quality": 101}, "quality"),
+    ({"format": "webp", "quality": "80"}, "quality"),
+    ({"format": "webp", "quality": True}, "quality"),
+    ({"format": "png", "compress_level": 10}, "compress_level"),
+    ({"format": "png", "compress_level": 1.5}, "compress_level"),
+    ({"format": "webp", "lossless": "yes"}, "lossless"),
+    ({"format": "webp", "lossless": 1}, "lossless"),
+])
+def test_parse_encoding_rejects_invalid_options(options, message):
+    with pytest.raises(ValueError, match=message):
+        parse_encoding(options)
+
+
+def test_encoding_labels():
+    assert ImageEncoding("webp", lossless=True).label == "webp_lossless"
+    assert ImageEncoding("webp", quality=80).label == "webp"
+    assert ImageEncoding("png").label == "png"
+
+
+@pytest.mark.parametrize("encoding, pil_format", [
+    (ImageEncoding("png"), "PNG"),
+    (ImageEncoding("webp", quality=80), "WEBP"),
+    (ImageEncoding("webp", lossless=True), "WEBP"),
+    (ImageEncoding("jpeg", quality=80), "JPEG"),
+])
+def test_encode_image_round_trips(encoding, pil_format):
+    image = Image.new("RGB", (32, 16), (200, 40, 90))
+
+    data = encode_image(image, encoding)
+
+    decoded = Image.open(io.BytesIO(data))
+    assert decoded.format == pil_format
+    assert decoded.size == (32, 16)
@@ -0,0 +1,95 @@
+import pytest
+from starlette.requests import Request
+
+from routes.image_response import IMMUTABLE_CACHE_CONTROL, _parse_range, etag_matches, image_response
+
+DATA = bytes(range(100))
+ETAG = '"abc123"'
+
+
+def make_request(**headers):
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": b""})
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ('"abc123"', True),
+    ('W/"abc123"', True),
+    ('"other", "abc123"', True),
+    ('"other"', False),
+    ("*", True),
+    ("abc123", False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=50-500", (50, 99)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-9", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert _parse_range(header, len(DATA)) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=20-10", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(ValueError):
+        _parse_range(header, len(DATA))
+
+
+def test_full_response_headers():
+    response = image_response(make_request(), DATA, "image/png", ETAG)
+
+    assert response.status_code == 200
+    assert response.body == DATA
+    assert response.headers["etag"] == ETAG
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_extra_headers_are_sent_with_every_status():
+    vary = {"Vary": "Accept"}
+
+    assert image_response(make_request(), DATA, "image/png", ETAG, vary).headers["vary"] == "Accept"
+    not_modified = image_response(make_request(if_none_match=ETAG), DATA, "image/png", ETAG, vary)
+    assert not_modified.status_code == 304 and not_modified.headers["vary"] == "Accept"
+    partial = image_response(make_request(range="bytes=0-9"), DATA, "image/png", ETAG, vary)
+    assert partial.status_code == 206 and partial.headers["vary"] == "Accept"
+
+
+def test_not_modified():
+    response = image_response(make_request(if_none_match=ETAG), DATA, "image/png", ETAG)
+
+    assert response.status_code == 304
+    assert response.body == b""
+
+
+def test_partial_content():
+    response = image_response(make_request(range="bytes=10-19"), DATA, "image/png", ETAG)
+
+    assert response.status_code == 206
+    assert response.body == DATA[10:20]
+    assert response.headers["content-range"] == "bytes 10-19/100"
+
+
+def test_range_not_satisfiable():
+    response = image_response(make_request(range="bytes=200-"), DATA, "image/png", ETAG)
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */100"
+
+
+def test_if_range_mismatch_serves_the_full_image():
+    response = image_response(make_request(range="bytes=0-9", if_range='"stale"'), DATA, "image/png", ETAG)
+
+    assert response.status_code == 200
+    assert response.body == DATA
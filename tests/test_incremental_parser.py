@@ -0,0 +1,62 @@
+import pytest
+
+from services.response_parser import IncrementalResponseParser, parse_response
+
+STRUCTURED = (
+    "A vintage jazz poster with bold Art Deco typography.\n"
+    "Gold and deep blue tones, with musicians in silhouette.\n"
+    "\n"
+    "Keywords: vintage, jazz, art deco, gold, deep blue"
+)
+LEADING_WHITESPACE = "  \n   Minimal tech conference poster.\n  Clean geometric shapes.  \nkeywords: minimal, tech"
+NO_KEYWORDS = "A bright summer market poster.\nStalls along the river at sunset."
+KEYWORD_LIKE_LINE = "Key visuals: lanterns and boats.\nKeywords: lanterns, boats"
+
+
+def chunkings(text):
+    """The whole reply, single characters, and fixed-size chunks that split words and lines"""
+    yield [text]
+    yield list(text)
+    for size in (3, 7, 16):
+        yield [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def stream(text, chunks):
+    parser = IncrementalResponseParser()
+    streamed = "".join(parser.feed(chunk) for chunk in chunks)
+    return streamed, parser.finish()
+
+
+@pytest.mark.parametrize("text", [STRUCTURED, LEADING_WHITESPACE, NO_KEYWORDS, KEYWORD_LIKE_LINE])
+def test_streamed_text_agrees_with_the_final_parse(text):
+    expected = parse_response(text)
+    for chunks in chunkings(text):
+        streamed, final = stream(text, chunks)
+
+        assert final == expected
+        # Streamed text never has to be taken back, and all of it is prompt text
+        assert expected[0].startswith(streamed.strip())
+
+
+@pytest.mark.parametrize("text", [STRUCTURED, LEADING_WHITESPACE, KEYWORD_LIKE_LINE])
+def test_keywords_line_is_never_streamed(text):
+    for chunks in chunkings(text):
+        streamed, (prompt, keywords) = stream(text, chunks)
+
+        assert streamed.strip() == prompt
+        assert "eywords" not in streamed
+        assert keywords
+
+
+def test_possible_keywords_prefix_is_held_back_until_decided():
+    parser = IncrementalResponseParser()
+
+    assert parser.feed("First line.\nKey") == "First line. "
+    assert parser.feed(" visuals") == "Key visuals"
+
+
+def test_parse_response_falls_back_to_design_words():
+    prompt, keywords = parse_response("A bold and vibrant modern poster.\nClean layout.")
+
+    assert prompt == "A bold and vibrant modern poster. Clean layout."
+    assert keywords == ["modern", "bold", "vibrant"]
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from services.indexes import INDEXES, QUERY_SHAPES, ensure_indexes, find_unindexed_queries
+
+
+class FakeCursor:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def sort(self, keys):
+        return self
+
+    async def explain(self):
+        return {"queryPlanner": {"winningPlan": self.plan}}
+
+
+class FakeDatabase:
+    """Answers explain() with a fixed winning plan per collection"""
+
+    def __init__(self, plans):
+        self.plans = plans
+
+    def __getitem__(self, collection):
+        plan = self.plans[collection]
+        return type("FakeCollection", (), {"find": lambda _, query: FakeCursor(plan)})()
+
+
+def ixscan(index_name):
+    return {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": index_name}}
+
+
+def test_indexed_plans_pass():
+    db = FakeDatabase({"posters": ixscan("session_id_1_created_at_-1_id_-1")})
+    shapes = [("posters", {"session_id": "x"}, [("created_at", -1), ("id", -1)])]
+
+    assert asyncio.run(find_unindexed_queries(db, shapes)) == []
+
+
+@pytest.mark.parametrize("plan, stage", [
+    ({"stage": "COLLSCAN"}, "COLLSCAN"),
+    ({"stage": "SORT", "inputStage": ixscan("id_1")}, "SORT"),
+    # Stages nested under OR / queryPlan wrappers are found too
+    ({"queryPlan": {"stage": "OR", "inputStages": [ixscan("id_1"), {"stage": "COLLSCAN"}]}}, "COLLSCAN"),
+])
+def test_collection_scans_and_memory_sorts_are_reported(plan, stage):
+    db = FakeDatabase({"posters": plan})
+    shapes = [("posters", {"session_id": "x"}, [("created_at", -1)])]
+
+    problems = asyncio.run(find_unindexed_queries(db, shapes))
+
+    assert len(problems) == 1
+    assert problems[0]["collection"] == "posters"
+    assert stage in problems[0]["stages"]
+
+
+def _served_by_declared_index(collection, query, sort):
+    """
+    Whether a declared index can serve the shape without COLLSCAN or SORT: it
+    starts with filtered fields, or with the sort when nothing is filtered, and
+    after its leading equality fields continues with the sort in either direction
+    """
+    equality = {field for field, value in query.items() if not isinstance(value, dict)}
+    sort = list(sort or [])
+
+    for spec in INDEXES:
+        if spec.collection != collection:
+            continue
+        keys = list(spec.keys)
+        skipped = 0
+        while skipped < len(keys) and keys[skipped][0] in equality:
+            skipped += 1
+        if query and keys[0][0] not in query:
+            continue
+        if sort:
+            prefix = keys[skipped:skipped + len(sort)]
+            if prefix != sort and prefix != [(field, -direction) for field, direction in sort]:
+                continue
+        return True
+    return False
+
+
+@pytest.mark.parametrize("collection, query, sort", QUERY_SHAPES)
+def test_every_query_shape_has_a_declared_index(collection, query, sort):
+    assert _served_by_declared_index(collection, query, sort)
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_MONGO_URL"), reason="set TEST_MONGO_URL to explain against a real MongoDB")
+def test_explain_plans_on_mongo():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def run():
+        client = AsyncIOMotorClient(os.environ["TEST_MONGO_URL"])
+        db = client[f"kala_index_test_{uuid.uuid4().hex[:8]}"]
+        try:
+            await ensure_indexes(db)
+            return await find_unindexed_queries(db)
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    assert asyncio.run(run()) == []
@@ -0,0 +1,350 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import services.job_queue as job_queue_module
+from models.poster import GenerationJob
+from services.job_queue import JobQueue, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+from services.render_executor import RenderQueueFullError
+
+COLLECTION = "generation_jobs"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock_motor.AsyncMongoMockClient()["kala_test"]
+    monkeypatch.setattr(job_queue_module, "get_database", lambda: db)
+    return db
+
+
+def make_queue(handler, workers=1, **options):
+    queue = JobQueue(COLLECTION, handler, workers=workers, **options)
+    # Short timings so leases expire and retries come due within a test
+    queue.lease_seconds = 0.3
+    queue.claim_interval = 0.02
+    queue.retry_backoff = 0.05
+    return queue
+
+
+async def wait_for_status(db, job_id, statuses, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await db[COLLECTION].find_one({"id": job_id}, {"_id": 0})
+        if job is not None and job["status"] in statuses:
+            return job
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError(f"job {job_id} is {job and job['status']}, expected one of {statuses}")
+        await asyncio.sleep(0.01)
+
+
+async def insert_job(db, **fields):
+    job = {**GenerationJob(params={"n": 1}).dict(), **fields}
+    await db[COLLECTION].insert_one(job)
+    return job["id"]
+
+
+def test_submitted_job_runs_and_publishes_updates(db):
+    async def handler(params):
+        await asyncio.sleep(0.01)
+        return {"echo": params["n"]}
+
+    async def run():
+        queue = make_queue(handler)
+        await queue.start()
+        try:
+            job = await queue.submit({"n": 7}, "session-1")
+            updates = queue.subscribe(job["id"])
+            done = await wait_for_status(db, job["id"], [JOB_DONE])
+            seen = []
+            while not updates.empty():
+                seen.append(updates.get_nowait()["status"])
+            return queue, job, done, seen
+        finally:
+            await queue.stop()
+
+    queue, job, done, seen = asyncio.run(run())
+
+    assert job["status"] == JOB_QUEUED and job["session_id"] == "session-1"
+    assert done["result"] == {"echo": 7}
+    assert done["attempts"] == 1
+    assert done["owner"] is None and done["lease_expires_at"] is None
+    assert seen[-1] == JOB_DONE
+    assert queue.stats()["completed"] == 1
+
+
+def test_job_submitted_elsewhere_is_claimed_by_another_queue(db):
+    async def handler(params):
+        return {"ran": True}
+
+    async def never_claim():
+        return None
+
+    async def run():
+        submitter = make_queue(handler)
+        submitter._claim = never_claim
+        worker = make_queue(handler)
+        await submitter.start()
+        await worker.start()
+        try:
+            job = await submitter.submit({"n": 1})
+            return await wait_for_status(db, job["id"], [JOB_DONE]), submitter, worker
+        finally:
+            await submitter.stop()
+            await worker.stop()
+
+    done, submitter, worker = asyncio.run(run())
+
+    assert done["result"] == {"ran": True}
+    assert worker.completed == 1 and submitter.completed == 0
+
+
+def test_expired_lease_is_taken_over(db):
+    calls = []
+
+    async def handler(params):
+        calls.append(params)
+        return {"ran": True}
+
+    async def run():
+        job_id = await insert_job(
+            db, status=JOB_RUNNING, owner="crashed-worker", attempts=1,
+            lease_expires_at=datetime.utcnow() - timedelta(seconds=1)
+        )
+        # Still leased: must be left alone
+        live_id = await insert_job(
+            db, status=JOB_RUNNING, owner="live-worker", attempts=1,
+            lease_expires_at=datetime.utcnow() + timedelta(minutes=5)
+        )
+        queue = make_queue(handler)
+        await queue.start()
+        try:
+            done = await wait_for_status(db, job_id, [JOB_DONE])
+            live = await db[COLLECTION].find_one({"id": live_id})
+            return queue, done, live
+        finally:
+            await queue.stop()
+
+    queue, done, live = asyncio.run(run())
+
+    assert done["attempts"] == 2
+    assert queue.requeued == 1
+    assert len(calls) == 1
+    assert live["status"] == JOB_RUNNING and live["owner"] == "live-worker"
+
+
+def test_job_that_keeps_losing_its_worker_is_failed(db):
+    calls = []
+
+    async def handler(params):
+        calls.append(params)
+        return {}
+
+    async def run():
+        queue = make_queue(handler)
+        job_id = await insert_job(
+            db, status=JOB_RUNNING, owner="crashed-worker", attempts=queue.max_attempts,
+            lease_expires_at=datetime.utcnow() - timedelta(seconds=1)
+        )
+        await queue.start()
+        try:
+            return queue, await wait_for_status(db, job_id, [JOB_DONE, JOB_FAILED])
+        finally:
+            await queue.stop()
+
+    queue, job = asyncio.run(run())
+
+    assert job["status"] == JOB_FAILED
+    assert "abandoned" in job["error"]
+    assert calls == []
+    assert queue.abandoned == 1
+
+
+def test_lost_lease_cancels_the_handler_and_leaves_the_job_to_its_new_owner(db):
+    async def run():
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def handler(params):
+            started.set()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return {"stored": "twice"}
+
+        queue = make_queue(handler)
+        await queue.start()
+        try:
+            job = await queue.submit({"n": 1})
+            await asyncio.wait_for(started.wait(), 5)
+            # Another worker takes the job over
+            await db[COLLECTION].update_one({"id": job["id"]}, {"$set": {"owner": "new-owner"}})
+            await asyncio.wait_for(cancelled.wait(), 5)
+            await asyncio.sleep(0.05)
+            return queue, await db[COLLECTION].find_one({"id": job["id"]}, {"_id": 0})
+        finally:
+            await queue.stop()
+
+    queue, job = asyncio.run(run())
+
+    assert job["status"] == JOB_RUNNING and job["owner"] == "new-owner"
+    assert job["result"] is None
+    assert queue.completed == 0 and queue.failed == 0
+
+
+def test_only_the_owner_records_the_result(db):
+    async def run():
+        release = asyncio.Event()
+
+        async def handler(params):
+            await release.wait()
+            return {"stored": "twice"}
+
+        queue = make_queue(handler)
+        # Renewal would cancel the handler; here the result races the takeover
+        queue.lease_seconds = 60
+        await queue.start()
+        try:
+            job = await queue.submit({"n": 1})
+            await wait_for_status(db, job["id"], [JOB_RUNNING])
+            await db[COLLECTION].update_one({"id": job["id"]}, {"$set": {"owner": "new-owner"}})
+            release.set()
+            await asyncio.sleep(0.1)
+            return queue, await db[COLLECTION].find_one({"id": job["id"]}, {"_id": 0})
+        finally:
+            await queue.stop()
+
+    queue, job = asyncio.run(run())
+
+    assert job["status"] == JOB_RUNNING and job["result"] is None
+    assert queue.completed == 0
+
+
+def test_stop_puts_running_jobs_back_in_the_queue(db):
+    async def run():
+        started = asyncio.Event()
+
+        async def handler(params):
+            started.set()
+            await asyncio.sleep(30)
+
+        queue = make_queue(handler)
+        await queue.start()
+        job = await queue.submit({"n": 1})
+        await asyncio.wait_for(started.wait(), 5)
+        await queue.stop()
+        return await db[COLLECTION].find_one({"id": job["id"]}, {"_id": 0})
+
+    job = asyncio.run(run())
+
+    assert job["status"] == JOB_QUEUED
+    assert job["owner"] is None and job["lease_expires_at"] is None
+
+
+def test_overload_errors_are_retried_with_backoff(db):
+    calls = []
+
+    async def handler(params):
+        calls.append(datetime.utcnow())
+        if len(calls) == 1:
+            raise RenderQueueFullError("render queue is full")
+        return {"ran": True}
+
+    async def run():
+        queue = make_queue(handler, retry_on=(RenderQueueFullError,))
+        await queue.start()
+        try:
+            job = await queue.submit({"n": 1})
+            return queue, await wait_for_status(db, job["id"], [JOB_DONE, JOB_FAILED])
+        finally:
+            await queue.stop()
+
+    queue, job = asyncio.run(run())
+
+    assert job["status"] == JOB_DONE
+    assert job["attempts"] == 2 and job["error"] is None
+    assert queue.retried == 1
+    assert (calls[1] - calls[0]).total_seconds() >= queue.retry_backoff
+
+
+def test_overload_retries_stop_at_max_attempts(db):
+    calls = []
+
+    async def handler(params):
+        calls.append(params)
+        raise RenderQueueFullError("render queue is full")
+
+    async def run():
+        queue = make_queue(handler, retry_on=(RenderQueueFullError,))
+        queue.max_attempts = 3
+        await queue.start()
+        try:
+            job = await queue.submit({"n": 1})
+            return queue, await wait_for_status(db, job["id"], [JOB_DONE, JOB_FAILED])
+        finally:
+            await queue.stop()
+
+    queue, job = asyncio.run(run())
+
+    assert job["status"] == JOB_FAILED
+    assert len(calls) == 3 and queue.retried == 2 and queue.failed == 1
+
+
+def test_other_errors_fail_the_job_at_once(db):
+    async def handler(params):
+        raise ValueError("bad params")
+
+    async def run():
+        queue = make_queue(handler, retry_on=(RenderQueueFullError,))
+        await queue.start()
+        try:
+            job = await queue.submit({"n": 1})
+            return queue, await wait_for_status(db, job["id"], [JOB_DONE, JOB_FAILED])
+        finally:
+            await queue.stop()
+
+    queue, job = asyncio.run(run())
+
+    assert job["status"] == JOB_FAILED and job["error"] == "bad params"
+    assert job["attempts"] == 1 and queue.retried == 0
+
+
+def test_websocket_sends_every_state_until_done(db, monkeypatch):
+    import routes.job_routes as job_routes
+
+    async def handler(params):
+        await asyncio.sleep(0.05)
+        return {"style": "placeholder"}
+
+    queue = make_queue(handler)
+    monkeypatch.setattr(job_routes, "generation_queue", queue)
+
+    app = FastAPI()
+    app.include_router(job_routes.router, prefix="/api")
+    app.add_event_handler("startup", queue.start)
+    app.add_event_handler("shutdown", queue.stop)
+
+    with TestClient(app) as client:
+        response = client.post("/api/jobs", json={"enhanced_prompt": "jazz", "session_id": "s1"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        statuses = []
+        with client.websocket_connect(f"/api/jobs/{job_id}/ws") as websocket:
+            while True:
+                update = websocket.receive_json()
+                statuses.append(update["status"])
+                if update["status"] in (JOB_DONE, JOB_FAILED):
+                    break
+
+        assert statuses[-1] == JOB_DONE
+        assert update["result"] == {"style": "placeholder"}
+
+        with client.websocket_connect("/api/jobs/missing/ws") as websocket:
+            assert websocket.receive_json() == {"error": "Job not found"}
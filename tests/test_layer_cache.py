@@ -0,0 +1,87 @@
+from PIL import Image
+
+from services.layer_cache import LayerCache, image_nbytes, logo_cache
+
+
+def solid(color, size=(10, 10)):
+    return Image.new("RGB", size, color)
+
+
+def test_image_nbytes():
+    assert image_nbytes(Image.new("RGB", (10, 20))) == 600
+    assert image_nbytes(Image.new("RGBA", (10, 20))) == 800
+
+
+def test_miss_builds_once_then_hits():
+    cache = LayerCache(max_bytes=10_000)
+    builds = []
+
+    def factory():
+        builds.append(1)
+        return solid("red")
+
+    cache.get("a", factory)
+    cache.get("a", factory)
+    cache.get("a", factory)
+
+    assert len(builds) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 0)
+    assert stats["entries"] == 1 and stats["bytes"] == 300
+
+
+def test_callers_get_copies_by_default():
+    cache = LayerCache(max_bytes=10_000)
+
+    first = cache.get("a", lambda: solid("red"))
+    first.putpixel((0, 0), (0, 0, 0))
+    second = cache.get("a", lambda: solid("blue"))
+
+    assert second is not first
+    assert second.getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_copy_false_returns_the_cached_image():
+    cache = LayerCache(max_bytes=10_000, copy=False)
+
+    first = cache.get("a", lambda: solid("red"))
+
+    assert cache.get("a", lambda: solid("blue")) is first
+    assert logo_cache.copy is False
+
+
+def test_evicts_least_recently_used_beyond_max_bytes():
+    # Room for two 300-byte layers
+    cache = LayerCache(max_bytes=700)
+    cache.get("a", lambda: solid("red"))
+    cache.get("b", lambda: solid("green"))
+    # Touch a, so b is the least recently used
+    cache.get("a", lambda: solid("red"))
+    cache.get("c", lambda: solid("blue"))
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2 and stats["bytes"] == 600
+
+    rebuilt = []
+    cache.get("a", lambda: rebuilt.append("a") or solid("red"))
+    cache.get("b", lambda: rebuilt.append("b") or solid("green"))
+    assert rebuilt == ["b"]
+
+
+def test_layers_larger_than_the_cache_are_not_stored():
+    cache = LayerCache(max_bytes=100)
+
+    image = cache.get("big", lambda: solid("red"))
+
+    assert image.size == (10, 10)
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+
+
+def test_clear():
+    cache = LayerCache(max_bytes=10_000)
+    cache.get("a", lambda: solid("red"))
+
+    cache.clear()
+
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
@@ -0,0 +1,144 @@
+import asyncio
+import socket
+
+import httpx
+import pytest
+
+from benchmarks.fake_llm_server import FakeLlmServer, reply_for
+from services.llm_client import LlmClientPool
+
+LATENCY_MS = 50.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def fake_llm():
+    with FakeLlmServer(free_port(), LATENCY_MS) as server:
+        yield server
+
+
+@pytest.fixture
+def llm_stats(fake_llm):
+    httpx.post(f"{fake_llm.base_url}/stats/reset")
+    return lambda: httpx.get(f"{fake_llm.base_url}/stats").json()
+
+
+def http_pool(fake_llm, **options):
+    return LlmClientPool(
+        api_key="test-key", provider="gemini", model="gemini-test", system_message="Enhance posters",
+        max_tokens=256, transport="http", base_url=fake_llm.base_url, **options
+    )
+
+
+def expected_reply(user_text):
+    return reply_for({"contents": [{"role": "user", "parts": [{"text": user_text}]}]})
+
+
+def test_complete_returns_the_reply(fake_llm, llm_stats):
+    async def run():
+        pool = http_pool(fake_llm)
+        try:
+            return await pool.complete("jazz night", "session-1")
+        finally:
+            await pool.aclose()
+
+    assert asyncio.run(run()) == expected_reply("jazz night")
+    assert llm_stats()["requests"] == 1
+
+
+def test_stream_yields_the_reply_in_chunks(fake_llm, llm_stats):
+    async def run():
+        pool = http_pool(fake_llm)
+        try:
+            return [chunk async for chunk in pool.stream("farmers market", "session-1")]
+        finally:
+            await pool.aclose()
+
+    chunks = asyncio.run(run())
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == expected_reply("farmers market")
+
+
+def test_sequential_calls_reuse_one_connection(fake_llm, llm_stats):
+    async def run():
+        pool = http_pool(fake_llm)
+        try:
+            for index in range(5):
+                await pool.complete(f"prompt {index}", "session-1")
+        finally:
+            await pool.aclose()
+
+    asyncio.run(run())
+
+    stats = llm_stats()
+    assert stats["requests"] == 5
+    assert stats["connections"] == 1
+
+
+def test_concurrency_is_bounded_by_the_semaphore(fake_llm, llm_stats):
+    async def run():
+        pool = http_pool(fake_llm, max_concurrency=2)
+        peak = 0
+
+        async def watch():
+            nonlocal peak
+            while True:
+                peak = max(peak, pool.stats()["in_use"])
+                await asyncio.sleep(0.005)
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await asyncio.gather(*(pool.complete(f"prompt {index}", "session-1") for index in range(6)))
+        finally:
+            watcher.cancel()
+            await pool.aclose()
+        return peak, pool.stats()
+
+    peak, stats = asyncio.run(run())
+
+    assert peak == 2
+    assert stats["in_use"] == 0
+    assert llm_stats()["connections"] <= 2
+
+
+def test_aclose_releases_the_client_and_a_later_call_reopens_it(fake_llm, llm_stats):
+    async def run():
+        pool = http_pool(fake_llm)
+        await pool.complete("first", "session-1")
+        client = pool._http_client
+        await pool.aclose()
+        closed = client.is_closed and pool._http_client is None
+
+        reply = await pool.complete("second", "session-1")
+        await pool.aclose()
+        return closed, reply
+
+    closed, reply = asyncio.run(run())
+
+    assert closed
+    assert reply == expected_reply("second")
+    assert llm_stats()["connections"] == 2
+
+
+def test_http_errors_are_raised(fake_llm):
+    async def run():
+        pool = http_pool(fake_llm)
+        pool.base_url = f"{fake_llm.base_url}/missing"
+        try:
+            await pool.complete("jazz night", "session-1")
+        finally:
+            await pool.aclose()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+
+
+def test_unknown_transport_is_rejected():
+    with pytest.raises(ValueError):
+        LlmClientPool("key", "gemini", "model", "system", 10, transport="carrier-pigeon")
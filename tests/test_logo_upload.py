@@ -0,0 +1,117 @@
+import io
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import routes.logo_routes as logo_routes
+import services.blob_store as blob_store
+import services.logo_store as logo_store_module
+from services.blob_store import LocalBlobStore
+
+BOUNDARY = "logo-test-boundary"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    db = mongomock_motor.AsyncMongoMockClient()["kala_test"]
+    monkeypatch.setattr(logo_store_module, "get_database", lambda: db)
+    monkeypatch.setattr(blob_store, "_blob_store", LocalBlobStore(str(tmp_path)))
+
+    app = FastAPI()
+    app.include_router(logo_routes.router, prefix="/api")
+    with TestClient(app) as client:
+        yield client
+
+
+def png(size=(32, 16), color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def multipart(data: bytes, field: str = "file", filename: str = "logo.png") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: image/png\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def upload(client, body, **kwargs):
+    return client.post(
+        "/api/logos", content=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}, **kwargs
+    )
+
+
+def test_upload_stores_the_logo(client):
+    response = upload(client, multipart(png()))
+
+    assert response.status_code == 201
+    logo = response.json()
+    assert logo["content_type"] == "image/png"
+    assert (logo["width"], logo["height"]) == (32, 16)
+    assert logo["deduplicated"] is False
+
+    image = client.get(f"/api/logos/{logo['logo_id']}/image")
+    assert image.status_code == 200
+    assert image.content == png()
+
+
+def test_same_file_is_deduplicated(client):
+    first = upload(client, multipart(png(), filename="first.png"))
+    second = upload(client, multipart(png(), filename="second.png"))
+
+    assert second.status_code == 200
+    assert second.json()["logo_id"] == first.json()["logo_id"]
+    assert second.json()["deduplicated"] is True
+    assert second.json()["name"] == "first.png"
+
+
+def test_oversized_content_length_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(logo_routes, "LOGO_UPLOAD_MAX_BYTES", 1024)
+
+    response = upload(client, multipart(b"\0" * 2048))
+
+    assert response.status_code == 413
+
+
+def test_oversized_chunked_body_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(logo_routes, "LOGO_UPLOAD_MAX_BYTES", 1024)
+    body = multipart(b"\0" * 4096)
+
+    def chunks():
+        for start in range(0, len(body), 512):
+            yield body[start:start + 512]
+
+    # No Content-Length: the limit has to be enforced while reading
+    response = upload(client, chunks())
+
+    assert response.status_code == 413
+
+
+def test_missing_file_is_rejected(client):
+    response = upload(client, multipart(png(), field="image"))
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing logo file"
+
+
+def test_non_image_is_rejected(client):
+    response = upload(client, multipart(b"not an image"))
+
+    assert response.status_code == 400
+
+
+def test_decompression_bomb_is_rejected(client, monkeypatch):
+    # Pillow refuses images over twice MAX_IMAGE_PIXELS
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+
+    response = upload(client, multipart(png(size=(64, 64))))
+
+    assert response.status_code == 400
+    assert "too many pixels" in response.json()["detail"]
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from services.pagination import KEYSET_SORT, InvalidCursorError, decode_cursor, encode_cursor, keyset_query
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 16, 12, 30, 5, 123456)
+    cursor = encode_cursor({"created_at": created_at, "id": "poster-1", "style": "ignored"})
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "poster-1")
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "!!!"])
+def test_invalid_cursors(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_no_cursor_leaves_the_query_alone():
+    assert keyset_query({"session_id": "s"}, None) == {"session_id": "s"}
+
+
+def test_pages_cover_every_document_once_with_tied_timestamps():
+    collection = mongomock.MongoClient().db.posters
+    base = datetime(2026, 1, 1)
+    # Pairs of documents share a created_at, so the id tie-breaker matters
+    collection.insert_many([
+        {"id": f"p{i:02d}", "session_id": "s", "created_at": base + timedelta(seconds=i // 2)}
+        for i in range(11)
+    ])
+    collection.insert_one({"id": "other", "session_id": "t", "created_at": base})
+
+    seen, cursor = [], None
+    while True:
+        page = list(collection.find(keyset_query({"session_id": "s"}, cursor), {"_id": 0}).sort(KEYSET_SORT).limit(3))
+        seen += [document["id"] for document in page]
+        if len(page) < 3:
+            break
+        cursor = encode_cursor(page[-1])
+
+    expected = [document["id"] for document in collection.find({"session_id": "s"}).sort(KEYSET_SORT)]
+    assert seen == expected
+    assert len(seen) == 11
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import services.render_cache as render_cache_module
+from services.render_cache import RenderCache, RENDER_CACHE_COLLECTION
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock_motor.AsyncMongoMockClient()["kala_test"]
+    monkeypatch.setattr(render_cache_module, "get_database", lambda: db)
+    return db
+
+
+def render(name):
+    return {"image_ref": f"blob-{name}", "format": "png", "size": 100}
+
+
+def test_shared_entry_is_found_by_another_worker(db):
+    async def run():
+        writer = RenderCache("1")
+        reader = RenderCache("1")
+        await writer.set("key-a", render("a"))
+        return await reader.get("key-a"), await reader.get("key-a"), reader.stats()
+
+    shared, local, stats = asyncio.run(run())
+
+    assert shared == local == render("a")
+    assert stats["shared_hits"] == 1 and stats["memory_hits"] == 1
+
+
+def test_invalidation_reaches_other_workers(db, monkeypatch):
+    monkeypatch.setattr(render_cache_module, "RENDER_CACHE_GENERATION_CHECK_SECONDS", 0)
+
+    async def run():
+        first = RenderCache("1")
+        second = RenderCache("1")
+        await first.set("key-a", render("a"))
+        # Now in the second worker's in-process LRU
+        assert await second.get("key-a") == render("a")
+
+        removed = await first.invalidate()
+        return removed, await second.get("key-a"), second.stats()
+
+    removed, after, stats = asyncio.run(run())
+
+    assert removed == 1
+    assert after is None
+    assert stats["generation"] == 1 and stats["misses"] == 1
+
+
+def test_other_workers_see_the_invalidation_after_the_check_interval(db, monkeypatch):
+    monkeypatch.setattr(render_cache_module, "RENDER_CACHE_GENERATION_CHECK_SECONDS", 3600)
+
+    async def run():
+        first = RenderCache("1")
+        second = RenderCache("1")
+        await first.set("key-a", render("a"))
+        await second.get("key-a")
+        await first.invalidate()
+
+        within_interval = await second.get("key-a")
+        second._generation_checked_at -= 3600
+        return within_interval, await second.get("key-a")
+
+    within_interval, after_interval = asyncio.run(run())
+
+    assert within_interval == render("a")
+    assert after_interval is None
+
+
+def test_render_finishing_after_an_invalidation_is_not_served(db, monkeypatch):
+    monkeypatch.setattr(render_cache_module, "RENDER_CACHE_GENERATION_CHECK_SECONDS", 3600)
+
+    async def run():
+        stale = RenderCache("1")
+        current = RenderCache("1")
+        await stale.get("key-warm")
+        await current.invalidate()
+        # Written by a worker that has not yet seen the new generation
+        await stale.set("key-a", render("a"))
+        return await current.get("key-a")
+
+    assert asyncio.run(run()) is None
+
+
+def test_shared_collection_is_trimmed_least_recently_used_first(db):
+    async def run():
+        cache = RenderCache("1", max_entries=3)
+        for name in ("a", "b", "c"):
+            await cache.set(f"key-{name}", render(name))
+            await asyncio.sleep(0.002)
+        # Refreshes last_used_at, so "b" is now the oldest
+        other = RenderCache("1")
+        await other.get("key-a")
+        await cache.set("key-d", render("d"))
+
+        keys = sorted([document["key"] async for document in db[RENDER_CACHE_COLLECTION].find()])
+        return keys, cache
+
+    keys, cache = asyncio.run(run())
+
+    assert keys == ["key-a", "key-c", "key-d"]
+    assert cache.evictions == 1
+    # Evicted from this worker's LRU as well
+    assert "key-b" not in cache._local
+
+
+def test_entries_are_isolated_by_renderer_version(db):
+    async def run():
+        old = RenderCache("1")
+        new = RenderCache("2")
+        await old.set("key-a", render("old"))
+        miss = await new.get("key-a")
+        await new.set("key-b", render("new"))
+
+        purged = await new.purge_stale()
+        remaining = [document["renderer_version"] async for document in db[RENDER_CACHE_COLLECTION].find()]
+        return miss, purged, remaining
+
+    miss, purged, remaining = asyncio.run(run())
+
+    assert miss is None
+    assert purged == 1
+    assert remaining == ["2"]
@@ -0,0 +1,100 @@
+import asyncio
+import pickle
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    async def run():
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"value": 42}
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(run())
+
+    assert calls == 1
+    assert all(result == {"value": 42} for result in results)
+    assert flight.stats() == {"started": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    async def run():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0)
+            return key
+
+        await asyncio.gather(flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b")))
+        await flight.do("a", lambda: work("a"))
+        return calls
+
+    assert sorted(asyncio.run(run())) == ["a", "a", "b"]
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    async def run():
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("render failed")
+
+        results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+        retry = await flight.do("k", lambda: asyncio.sleep(0, result="ok"))
+        return results, retry, flight
+
+    results, retry, flight = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retry == "ok"
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_a_cancelled_caller_does_not_cancel_the_work():
+    async def run():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        return await second, first.cancelled()
+
+    assert asyncio.run(run()) == ("done", True)
+
+
+def test_render_method_pickles_while_renders_are_in_flight():
+    """The process pool pickles the bound render method with its service"""
+    from services.imagen_service import ImagenService
+
+    async def run():
+        service = ImagenService()
+        release = asyncio.Event()
+        pending = asyncio.ensure_future(service.render_flight.do("k", release.wait))
+        await asyncio.sleep(0)
+
+        restored = pickle.loads(pickle.dumps(service._render_placeholder_poster))
+        release.set()
+        await pending
+        return restored.__self__
+
+    restored = asyncio.run(run())
+    assert not hasattr(restored, "render_flight")
+    assert restored.renderer_version
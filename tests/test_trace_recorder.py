@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from services.trace_recorder import TraceRecorder, HEADER_MAX_LENGTH
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    recorder = TraceRecorder(str(tmp_path / "trace.jsonl"), salt="test-salt")
+    yield recorder
+    recorder.close()
+
+
+def read_lines(recorder):
+    recorder.close()
+    with open(recorder.path) as trace:
+        return [json.loads(line) for line in trace]
+
+
+def test_strings_are_reduced_to_length_and_digest(recorder):
+    shape = recorder.shape({"user_prompt": "jazz night at the club", "other": "jazz night at the club"})
+
+    assert shape["user_prompt"]["$str"] == len("jazz night at the club")
+    # Repeated text stays recognisable without being recorded
+    assert shape["user_prompt"] == shape["other"]
+    assert "jazz" not in json.dumps(shape)
+
+
+def test_ids_become_stable_tokens(recorder):
+    first = recorder.shape({"session_id": "abc"})
+    second = recorder.shape({"session_id": "abc"})
+    other = recorder.shape({"session_id": "xyz"})
+
+    assert first == second != other
+    assert first["session_id"]["$id"].startswith("session_id:")
+    assert "abc" not in json.dumps(first)
+
+
+def test_tokens_depend_on_the_salt(tmp_path):
+    one = TraceRecorder(str(tmp_path / "one.jsonl"), salt="one")
+    two = TraceRecorder(str(tmp_path / "two.jsonl"), salt="two")
+    try:
+        assert one.token("poster_id", "p1") != two.token("poster_id", "p1")
+    finally:
+        one.close()
+        two.close()
+
+
+def test_enum_values_numbers_and_cursors(recorder):
+    shape = recorder.shape({
+        "logo_position": "top-left",
+        "poster_limit": 20,
+        "bypass_cache": True,
+        "keywords": ["gold", "blue"],
+        "poster_cursor": "opaque"
+    })
+
+    assert shape["logo_position"] == "top-left"
+    assert shape["poster_limit"] == 20
+    assert shape["bypass_cache"] is True
+    assert len(shape["keywords"]) == 2
+    assert shape["poster_cursor"] == {"$cursor": True}
+
+
+def test_record_line_shape(recorder):
+    recorder.record(
+        1700000000.0, 0.0123, "GET", "/api/poster/{poster_id}/image", 304,
+        path_params={"poster_id": "p1"},
+        query={"size": "thumb"},
+        request_bytes=0,
+        response_bytes=0,
+        headers={
+            "accept": "image/webp,*/*",
+            "range": "bytes=0-99",
+            "if-none-match": '"etag-one", "etag-two"'
+        }
+    )
+
+    header, line = read_lines(recorder)
+
+    assert header["trace"] == "kala"
+    assert line["route"] == "/api/poster/{poster_id}/image"
+    assert line["status"] == 304
+    assert line["duration_ms"] == 12.3
+    assert line["path"]["poster_id"]["$id"].startswith("poster_id:")
+    assert line["query"] == {"size": "thumb"}
+    assert line["headers"]["accept"] == "image/webp,*/*"
+    assert line["headers"]["range"] == "bytes=0-99"
+    # Only the number of validators, never the ETags themselves
+    assert line["headers"]["if-none-match"] == {"$etags": 2}
+
+
+def test_long_header_values_are_cut(recorder):
+    assert len(recorder.header_shape("accept", "x" * 1000)) == HEADER_MAX_LENGTH
+
+
+def test_created_ids_are_tokenized(recorder):
+    recorder.record(
+        1700000000.0, 0.5, "POST", "/api/poster/generate", 200,
+        path_params={}, query={}, request_bytes=10, response_bytes=100,
+        body={"session_id": "s1"}, created="poster-1"
+    )
+
+    _, line = read_lines(recorder)
+
+    assert line["created"] == {"$id": recorder.token("poster_id", "poster-1")}
+    assert "poster-1" not in json.dumps(line)
+    assert "headers" not in line
+
+
+def test_sampling_is_deterministic(tmp_path):
+    recorder = TraceRecorder(str(tmp_path / "trace.jsonl"), sample_rate=0.25)
+    try:
+        assert [recorder.sampled() for _ in range(8)] == [False, False, False, True] * 2
+    finally:
+        recorder.close()